@@ -13,9 +13,16 @@ to your environment PATH (or your PYTHONPATH variable).
 
 
 import sys
+from array import array
+from bisect import bisect_right
 
 import sublime_api
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 class _LogWriter:
     def flush(self):
@@ -461,16 +468,17 @@ class Window(object):
         flat_items = items
         if len(items) > 0 and isinstance(items[0], list):
             items_per_row = len(items[0])
+            padding = [""] * (items_per_row - 1)
             flat_items = []
-
-            for i in range(len(items)):
-                if isinstance(items[i], str):
-                    flat_items.append(items[i])
-                    for j in range(1, items_per_row):
-                        flat_items.append("")
+            extend = flat_items.extend
+            for item in items:
+                if isinstance(item, str):
+                    flat_items.append(item)
+                    extend(padding)
+                elif len(item) < items_per_row:
+                    raise IndexError("Quick panel item {!r} has fewer than {} rows".format(item, items_per_row))
                 else:
-                    for j in range(items_per_row):
-                        flat_items.append(items[i][j])
+                    extend(item[:items_per_row])
 
         sublime_api.window_show_quick_panel(
             self.window_id, flat_items, items_per_row, on_select, on_highlight,
@@ -511,7 +519,7 @@ class Window(object):
 
     def project_file_name(self):
         name = sublime_api.window_project_file_name(self.window_id)
-        if len(name) == 0:
+        if not name:
             return None
         else:
             return name
@@ -650,6 +658,223 @@ class Region(object):
             (lb > rb and lb < re) or (le > rb and le < re))
 
 
+class RegionList(object):
+    """
+    A list of regions stored as two flat integer arrays, holding the a and b points.
+
+    Indexing and iterating give Region objects, but the bulk operations (sorting,
+    merging, union, intersection, subtraction and point containment) work directly on
+    the arrays, and use NumPy when it is available.
+
+    The set operations treat regions as ranges of text, ignore orientation,
+    and return sorted lists of non-overlapping regions.
+
+    The merged regions used by contains() are cached until the list is changed with
+    append() or extend(); call these rather than changing the arrays directly.
+    """
+    __slots__ = ['a', 'b', '_merged']
+
+    def __init__(self, regions=()):
+        self.a = array('q')
+        self.b = array('q')
+        self._merged = None
+        self.extend(regions)
+
+    @classmethod
+    def from_arrays(cls, a, b):
+        """ Creates a RegionList from sequences (or arrays) of a and b points """
+        rl = cls()
+        if numpy is not None and isinstance(a, numpy.ndarray):
+            rl.a.frombytes(numpy.ascontiguousarray(a, dtype=numpy.int64).tobytes())
+            rl.b.frombytes(numpy.ascontiguousarray(b, dtype=numpy.int64).tobytes())
+        else:
+            rl.a.extend(a)
+            rl.b.extend(b)
+        return rl
+
+    def _cached_merged(self):
+        if self._merged is None:
+            self._merged = self.merged()
+        return self._merged
+
+    def __len__(self):
+        return len(self.a)
+
+    def __iter__(self):
+        for a, b in zip(self.a, self.b):
+            yield Region(a, b)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return RegionList.from_arrays(self.a[index], self.b[index])
+        return Region(self.a[index], self.b[index])
+
+    def __eq__(self, rhs):
+        if isinstance(rhs, RegionList):
+            return self.a == rhs.a and self.b == rhs.b
+        return list(self) == list(rhs)
+
+    def __repr__(self):
+        return "RegionList(" + ", ".join(
+            "(" + str(a) + ", " + str(b) + ")" for a, b in zip(self.a, self.b)) + ")"
+
+    def __or__(self, rhs):
+        return self.union(rhs)
+
+    def __and__(self, rhs):
+        return self.intersection(rhs)
+
+    def __sub__(self, rhs):
+        return self.subtract(rhs)
+
+    def append(self, region):
+        self._merged = None
+        self.a.append(region.a)
+        self.b.append(region.b)
+
+    def extend(self, regions):
+        self._merged = None
+        if isinstance(regions, RegionList):
+            self.a.extend(regions.a)
+            self.b.extend(regions.b)
+            return
+        for r in regions:
+            if isinstance(r, Region):
+                self.a.append(r.a)
+                self.b.append(r.b)
+            else:
+                self.a.append(r[0])
+                self.b.append(r[1])
+
+    def begins(self):
+        return array('q', map(min, self.a, self.b))
+
+    def ends(self):
+        return array('q', map(max, self.a, self.b))
+
+    def _numpy_begins_ends(self):
+        a = numpy.frombuffer(self.a, dtype=numpy.int64)
+        b = numpy.frombuffer(self.b, dtype=numpy.int64)
+        return numpy.minimum(a, b), numpy.maximum(a, b)
+
+    def sorted(self):
+        """ Returns the regions with a <= b, sorted by begin and then end """
+        if numpy is not None and len(self) > 0:
+            begins, ends = self._numpy_begins_ends()
+            order = numpy.lexsort((ends, begins))
+            return RegionList.from_arrays(begins[order], ends[order])
+        pairs = sorted(zip(self.begins(), self.ends()))
+        return RegionList.from_arrays([p[0] for p in pairs], [p[1] for p in pairs])
+
+    def merged(self):
+        """ Returns the regions sorted, with overlapping and touching regions merged """
+        if numpy is not None and len(self) > 0:
+            s = self.sorted()
+            begins, ends = s._numpy_begins_ends()
+            reach = numpy.maximum.accumulate(ends)
+            starts = numpy.flatnonzero(numpy.concatenate(([True], begins[1:] > reach[:-1])))
+            return RegionList.from_arrays(begins[starts], numpy.maximum.reduceat(ends, starts))
+        s = self.sorted()
+        a = array('q')
+        b = array('q')
+        for begin, end in zip(s.a, s.b):
+            if b and begin <= b[-1]:
+                if end > b[-1]:
+                    b[-1] = end
+            else:
+                a.append(begin)
+                b.append(end)
+        return RegionList.from_arrays(a, b)
+
+    def union(self, rhs):
+        both = RegionList(self)
+        both.extend(rhs)
+        return both.merged()
+
+    def intersection(self, rhs):
+        lhs = self.merged()
+        rhs = RegionList(rhs).merged()
+        la, lb, ra, rb = lhs.a, lhs.b, rhs.a, rhs.b
+        a = array('q')
+        b = array('q')
+        i = j = 0
+        while i < len(la) and j < len(ra):
+            begin = max(la[i], ra[j])
+            end = min(lb[i], rb[j])
+            if begin < end:
+                a.append(begin)
+                b.append(end)
+            if lb[i] < rb[j]:
+                i += 1
+            else:
+                j += 1
+        return RegionList.from_arrays(a, b)
+
+    def subtract(self, rhs):
+        lhs = self.merged()
+        rhs = RegionList(rhs).merged()
+        ra, rb = rhs.a, rhs.b
+        m = len(ra)
+        a = array('q')
+        b = array('q')
+        j = 0
+        for begin, end in zip(lhs.a, lhs.b):
+            while j < m and (rb[j] <= begin or ra[j] == rb[j]):
+                j += 1
+            if begin == end:
+                # An empty region is removed only if it is strictly inside rhs
+                if not (j < m and ra[j] < begin < rb[j]):
+                    a.append(begin)
+                    b.append(end)
+                continue
+            cur = begin
+            k = j
+            while k < m and ra[k] < end:
+                if ra[k] > cur:
+                    a.append(cur)
+                    b.append(ra[k])
+                cur = max(cur, rb[k])
+                if cur >= end:
+                    break
+                k += 1
+            if cur < end:
+                a.append(cur)
+                b.append(end)
+        return RegionList.from_arrays(a, b)
+
+    def contains(self, x):
+        """ True if any region contains x, which may be a point or a Region """
+        if isinstance(x, Region):
+            begin, end = x.begin(), x.end()
+        else:
+            begin = end = x
+        merged = self._cached_merged()
+        i = bisect_right(merged.a, begin) - 1
+        return i >= 0 and merged.b[i] >= end
+
+    def contains_points(self, pts):
+        """
+        For each point in pts, whether it is contained in any of the regions.
+        Returns a boolean array if pts is a NumPy array, and otherwise a list of bools.
+        """
+        merged = self._cached_merged()
+        if numpy is not None:
+            begins, ends = merged._numpy_begins_ends()
+            p = numpy.asarray(pts, dtype=numpy.int64)
+            if len(begins) == 0:
+                inside = numpy.zeros(p.shape, dtype=bool)
+            else:
+                i = numpy.searchsorted(begins, p, side='right') - 1
+                inside = (i >= 0) & (p <= ends[numpy.maximum(i, 0)])
+            return inside if isinstance(pts, numpy.ndarray) else inside.tolist()
+        begins, ends = merged.a, merged.b
+        result = []
+        for pt in pts:
+            i = bisect_right(begins, pt) - 1
+            result.append(i >= 0 and ends[i] >= pt)
+        return result
+
+
 class Selection(object):
     def __init__(self, id):
         self.view_id = id
@@ -697,6 +922,10 @@ class Selection(object):
     def contains(self, region):
         return sublime_api.view_selection_contains(self.view_id, region.a, region.b)
 
+    def region_list(self):
+        """ The selection as a RegionList """
+        return sublime_api.view_selection_region_list(self.view_id)
+
 
 class Sheet(object):
     def __init__(self, id):
@@ -885,6 +1114,10 @@ class View(object):
                 extractions.append(contents)
             return ret
 
+    def find_all_region_list(self, pattern, flags=0):
+        """ Like find_all(), but returns a RegionList """
+        return sublime_api.view_find_all_region_list(self.view_id, pattern, flags)
+
     def settings(self):
         if not self.settings_object:
             self.settings_object = Settings(sublime_api.view_settings(self.view_id))
@@ -982,6 +1215,17 @@ class View(object):
         """ Converts a row and column into a text point """
         return sublime_api.view_text_point(self.view_id, row, col)
 
+    def rowcols(self, tps):
+        """
+        Converts a sequence (or NumPy array) of text points into (row, col) pairs,
+        in a single API call
+        """
+        return sublime_api.view_row_cols(self.view_id, tps)
+
+    def text_points(self, rowcols):
+        """ Converts a sequence of (row, col) pairs into text points, in a single API call """
+        return sublime_api.view_text_points(self.view_id, rowcols)
+
     def visible_region(self):
         """ Returns the approximate visible region """
         return sublime_api.view_visible_region(self.view_id)
@@ -1057,6 +1301,10 @@ class View(object):
     def folded_regions(self):
         return sublime_api.view_folded_regions(self.view_id)
 
+    def folded_region_list(self):
+        """ Like folded_regions(), but returns a RegionList """
+        return sublime_api.view_folded_region_list(self.view_id)
+
     def fold(self, x):
         if isinstance(x, Region):
             return sublime_api.view_fold_region(self.view_id, x)
@@ -1080,6 +1328,10 @@ class View(object):
     def get_regions(self, key):
         return sublime_api.view_get_regions(self.view_id, key)
 
+    def get_region_list(self, key):
+        """ Like get_regions(), but returns a RegionList """
+        return sublime_api.view_get_region_list(self.view_id, key)
+
     def erase_regions(self, key):
         sublime_api.view_erase_regions(self.view_id, key)
 
@@ -1092,6 +1344,17 @@ class View(object):
     def erase_phantom_by_id(self, pid):
         sublime_api.view_erase_phantom(self.view_id, pid)
 
+    def add_phantoms(self, key, phantoms):
+        """
+        Adds several phantoms in a single API call. phantoms is a list of
+        (region, content, layout, on_navigate) tuples; returns the list of new phantom ids.
+        """
+        return sublime_api.view_add_phantoms(self.view_id, key, phantoms)
+
+    def erase_phantoms_by_id(self, pids):
+        """ Erases several phantoms, given by id, in a single API call """
+        sublime_api.view_erase_phantoms_by_id(self.view_id, pids)
+
     def query_phantom(self, pid):
         return sublime_api.view_query_phantoms(self.view_id, [pid])
 
@@ -1211,6 +1474,13 @@ class Phantom(object):
         return (self.region == rhs.region and self.content == rhs.content and
                 self.layout == rhs.layout and self.on_navigate == rhs.on_navigate)
 
+    def key(self):
+        """ Hashable identity of the phantom's current state; equal phantoms have equal keys.
+
+        Phantom itself isn't hashable, since PhantomSet.update() changes its region.
+        """
+        return (self.region.a, self.region.b, self.content, self.layout, self.on_navigate)
+
 
 class PhantomSet(object):
     def __init__(self, view, key=""):
@@ -1219,8 +1489,7 @@ class PhantomSet(object):
         self.phantoms = []
 
     def __del__(self):
-        for p in self.phantoms:
-            self.view.erase_phantom_by_id(p.id)
+        self.view.erase_phantoms_by_id([p.id for p in self.phantoms])
 
     def update(self, new_phantoms):
         # Update the list of phantoms that exist in the text buffer with their
@@ -1229,20 +1498,34 @@ class PhantomSet(object):
         for i in range(len(regions)):
             self.phantoms[i].region = regions[i]
 
+        # Diff the old and new phantoms by their identity key, rather than
+        # comparing every pair of phantoms field by field.
+        existing = {}
+        for p in self.phantoms:
+            existing.setdefault(p.key(), p.id)
+
+        added = []
         for p in new_phantoms:
-            try:
+            pid = existing.get(p.key())
+            if pid is not None:
                 # Phantom already exists, copy the id from the current one
-                idx = self.phantoms.index(p)
-                p.id = self.phantoms[idx].id
-            except ValueError:
-                p.id = self.view.add_phantom(
-                    self.key, p.region, p.content, p.layout, p.on_navigate)
-
-        for p in self.phantoms:
-            # if the region is -1, then it's already been deleted, no need to
-            # call erase
-            if p not in new_phantoms and p.region != Region(-1):
-                self.view.erase_phantom_by_id(p.id)
+                p.id = pid
+            else:
+                added.append(p)
+
+        if added:
+            pids = self.view.add_phantoms(
+                self.key, [(p.region, p.content, p.layout, p.on_navigate) for p in added])
+            for p, pid in zip(added, pids):
+                p.id = pid
+
+        # if the region is -1, then it's already been deleted, no need to
+        # call erase
+        wanted = set(p.key() for p in new_phantoms)
+        erased = [p.id for p in self.phantoms
+                  if p.key() not in wanted and p.region != Region(-1)]
+        if erased:
+            self.view.erase_phantoms_by_id(erased)
 
         self.phantoms = new_phantoms
 
@@ -0,0 +1,212 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+A minimal text buffer for the mocked views.
+
+The buffer keeps the text as a single string, together with a list of line start offsets
+which is updated incrementally on each edit.
+Shifting the line starts after an edit is done lazily: the list holds one pending offset
+for all rows from a given row onwards, and consecutive edits on nearby rows
+(i.e. typing) only need to touch the rows between them.
+
+Other parts of the mock (region stores, phantoms, etc.) that need to follow the
+text as it is edited can register themselves as listeners using `add_listener()`.
+A listener must provide two methods:
+
+    on_insert(pt, length)   # `length` characters were inserted at `pt`.
+    on_erase(a, b)          # The characters between `a` and `b` were removed.
+
+A replace is reported as an erase followed by an insert.
+
+Conversions between text points and (row, col) are available for single points,
+and in batch (`row_cols()`, `text_points()`) using one `numpy.searchsorted` over the
+line starts. NumPy is optional; without it the batch conversions use bisect.
+
+"""
+
+from bisect import bisect_right
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class Buffer(object):
+
+    def __init__(self, text=""):
+        self.text = ""
+        self._starts = [0]
+        self._shift_row = 1     # Rows from _shift_row onwards start at _starts[row] + _shift
+        self._shift = 0
+        self._starts_array = None   # (change_count, numpy array of line starts)
+        self.change_count = 0
+        self.listeners = []
+        if text:
+            self.insert(0, text)
+
+    def __len__(self):
+        return len(self.text)
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        try:
+            self.listeners.remove(listener)
+        except ValueError:
+            pass
+
+    def substr(self, a, b):
+        if a > b:
+            a, b = b, a
+        return self.text[max(a, 0):b]
+
+    def insert(self, pt, text):
+        """ Insert `text` at `pt`, returning the number of characters inserted. """
+        pt = min(max(pt, 0), len(self.text))
+        n = len(text)
+        if n == 0:
+            return 0
+        self.text = self.text[:pt] + text + self.text[pt:]
+
+        row = self.row_of(pt) + 1
+        self._shift_rows(row, n)
+        new_starts = []
+        i = text.find('\n')
+        while i != -1:
+            new_starts.append(pt + i + 1 - self._shift)
+            i = text.find('\n', i + 1)
+        if new_starts:
+            self._starts[row:row] = new_starts
+
+        self.change_count += 1
+        for listener in self.listeners:
+            listener.on_insert(pt, n)
+        return n
+
+    def erase(self, a, b):
+        if a > b:
+            a, b = b, a
+        a = max(a, 0)
+        b = min(b, len(self.text))
+        if a >= b:
+            return
+        n = b - a
+        self.text = self.text[:a] + self.text[b:]
+
+        # Line starts in (a, b] belonged to newlines that were just removed.
+        lo = self.row_of(a) + 1
+        hi = self.row_of(b) + 1
+        self._shift_rows(hi, -n)
+        if hi > lo:
+            del self._starts[lo:hi]
+            self._shift_row = lo
+
+        self.change_count += 1
+        for listener in self.listeners:
+            listener.on_erase(a, b)
+
+    def replace(self, a, b, text):
+        if a > b:
+            a, b = b, a
+        self.erase(a, b)
+        self.insert(a, text)
+
+    def _shift_rows(self, row, delta):
+        """ Move the start of all rows from `row` onwards by `delta`. """
+        starts = self._starts
+        r = self._shift_row
+        shift = self._shift if r < len(starts) else 0
+        if shift:
+            # Rows between the pending row and the new one are brought up to date
+            # (row >= r), or moved into the pending range (row < r).
+            if row >= r:
+                starts[r:row] = [s + shift for s in starts[r:row]]
+            else:
+                starts[row:r] = [s - shift for s in starts[row:r]]
+        self._shift_row = row
+        self._shift = shift + delta
+
+    @property
+    def line_starts(self):
+        """ Start offset of every line, as a list. """
+        self._shift_rows(len(self._starts), 0)
+        return self._starts
+
+    def line_count(self):
+        return len(self._starts)
+
+    def row_of(self, pt):
+        """ Zero-based row containing `pt`. """
+        starts = self._starts
+        r = self._shift_row
+        if r < len(starts) and pt >= starts[r] + self._shift:
+            return bisect_right(starts, pt - self._shift, r) - 1
+        return bisect_right(starts, pt, 0, r) - 1
+
+    def line_start(self, row):
+        if row >= self._shift_row:
+            return self._starts[row] + self._shift
+        return self._starts[row]
+
+    def line_end(self, row):
+        """ Offset of the end of `row`, excluding the newline character. """
+        if row + 1 < len(self._starts):
+            return self.line_start(row + 1) - 1
+        return len(self.text)
+
+    def row_col(self, pt):
+        pt = min(max(pt, 0), len(self.text))
+        row = self.row_of(pt)
+        return (row, pt - self.line_start(row))
+
+    def text_point(self, row, col):
+        row = min(max(row, 0), len(self._starts) - 1)
+        return min(max(self.line_start(row) + col, 0), len(self.text))
+
+    def _line_starts_array(self):
+        if self._starts_array is None or self._starts_array[0] != self.change_count:
+            self._starts_array = (self.change_count, numpy.array(self.line_starts, dtype=numpy.int64))
+        return self._starts_array[1]
+
+    def row_cols(self, pts):
+        """ (row, col) of each point in `pts`.
+
+        Returns an (n, 2) array if `pts` is a NumPy array, and otherwise a list of tuples.
+        """
+        size = len(self.text)
+        if numpy is not None:
+            starts = self._line_starts_array()
+            p = numpy.clip(numpy.asarray(pts, dtype=numpy.int64), 0, size)
+            rows = numpy.searchsorted(starts, p, side='right') - 1
+            cols = p - starts[rows]
+            if isinstance(pts, numpy.ndarray):
+                return numpy.stack([rows, cols], axis=1)
+            return list(zip(rows.tolist(), cols.tolist()))
+        starts = self.line_starts
+        result = []
+        for pt in pts:
+            pt = min(max(pt, 0), size)
+            row = bisect_right(starts, pt) - 1
+            result.append((row, pt - starts[row]))
+        return result
+
+    def text_points(self, row_cols):
+        """ Text point of each (row, col) pair in `row_cols`.
+
+        Returns an array if `row_cols` is an (n, 2) NumPy array, and otherwise a list.
+        """
+        size = len(self.text)
+        last_row = len(self._starts) - 1
+        if numpy is not None:
+            starts = self._line_starts_array()
+            rc = numpy.asarray(row_cols, dtype=numpy.int64).reshape(-1, 2)
+            rows = numpy.clip(rc[:, 0], 0, last_row)
+            pts = numpy.clip(starts[rows] + rc[:, 1], 0, size)
+            if isinstance(row_cols, numpy.ndarray):
+                return pts
+            return pts.tolist()
+        starts = self.line_starts
+        return [min(max(starts[min(max(row, 0), last_row)] + col, 0), size) for row, col in row_cols]
@@ -0,0 +1,178 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Character classification, for `view.classify()`, `view.find_by_class()`,
+`view.expand_by_class()` and `view.word()`.
+
+Text is translated into a string of single-letter class codes with a precompiled
+translation table (one per set of word separators):
+
+    U   Uppercase word character
+    w   Other word character
+    _   Underscore (when it is not a word separator)
+    p   Punctuation, i.e. a word separator
+    s   Whitespace
+    n   Newline; also used for the positions before the start and after the end of the buffer
+
+The `CLASS_*` flags from the `sublime` module then become zero-width regexes over
+the class string, and searching for a class is a regex search.
+Searches only translate a window of text around the point, which is grown as needed.
+
+"""
+
+import re
+from functools import lru_cache
+
+# The CLASS_* flags from the sublime module:
+CLASS_WORD_START = 1
+CLASS_WORD_END = 2
+CLASS_PUNCTUATION_START = 4
+CLASS_PUNCTUATION_END = 8
+CLASS_SUB_WORD_START = 16
+CLASS_SUB_WORD_END = 32
+CLASS_LINE_START = 64
+CLASS_LINE_END = 128
+CLASS_EMPTY_LINE = 256
+
+_W = "[Uw_]"
+CLASS_PATTERNS = {
+    CLASS_WORD_START: "(?<!{W})(?={W})".format(W=_W),
+    CLASS_WORD_END: "(?<={W})(?!{W})".format(W=_W),
+    CLASS_PUNCTUATION_START: "(?<!p)(?=p)",
+    CLASS_PUNCTUATION_END: "(?<=p)(?!p)",
+    CLASS_SUB_WORD_START: "(?<!{W})(?={W})|(?<=w)(?=U)|(?<=_)(?=[Uw])|(?<=U)(?=Uw)".format(W=_W),
+    CLASS_SUB_WORD_END: "(?<={W})(?!{W})|(?<=w)(?=U)|(?<=[Uw])(?=_)|(?<=U)(?=Uw)".format(W=_W),
+    CLASS_LINE_START: "(?<=n)",
+    CLASS_LINE_END: "(?=n)",
+    CLASS_EMPTY_LINE: "(?<=n)(?=n)",
+}
+
+# Initial size of the text window translated around a point; doubled until a match is found.
+WINDOW_SIZE = 256
+
+
+class _ClassTable(dict):
+    """ Translation table for str.translate(), mapping code points to class codes on demand. """
+
+    def __init__(self, separators):
+        super().__init__()
+        self.separators = set(separators)
+
+    def __missing__(self, code):
+        c = chr(code)
+        if c == "\n":
+            cls = "n"
+        elif c.isspace():
+            cls = "s"
+        elif c in self.separators:
+            cls = "p"
+        elif c == "_":
+            cls = "_"
+        elif c.isupper():
+            cls = "U"
+        else:
+            cls = "w"
+        self[code] = cls
+        return cls
+
+
+@lru_cache(maxsize=32)
+def class_table(separators):
+    table = _ClassTable(separators)
+    for code in range(128):
+        table[code]
+    return table
+
+
+@lru_cache(maxsize=256)
+def class_regex(classes):
+    patterns = [p for flag, p in sorted(CLASS_PATTERNS.items()) if classes & flag]
+    if not patterns:
+        return None
+    return re.compile("|".join(patterns))
+
+
+def _classes_between(text, lo, hi, separators):
+    """ Class string for text[lo-1:hi+2], padded with 'n' outside of the buffer. """
+    table = class_table(separators)
+    pad_left = "n" if lo == 0 else ""
+    pad_right = "n" * max(0, hi + 2 - len(text))
+    return pad_left + text[max(lo - 1, 0):hi + 2].translate(table) + pad_right
+
+
+def classify(text, pt, separators):
+    """ Bitwise OR of the CLASS_* flags matching at pt. """
+    s = _classes_between(text, pt, pt, separators)
+    result = 0
+    for flag in CLASS_PATTERNS:
+        if class_regex(flag).match(s, 1):
+            result |= flag
+    return result
+
+
+def find_by_class(text, pt, forward, classes, separators):
+    """ The nearest point after (or before) pt matching classes, else the end (or start) of the text. """
+    regex = class_regex(classes)
+    size = len(text)
+    if regex is None:
+        return size if forward else 0
+    window = WINDOW_SIZE
+    if forward:
+        lo = pt + 1
+        while lo <= size:
+            hi = min(lo + window, size)
+            s = _classes_between(text, lo, hi, separators)
+            # Match position j is text point lo - 1 + j. Don't pass endpos to the search,
+            # since the lookaheads need the context after hi.
+            m = regex.search(s, 1)
+            if m and m.start() <= hi - lo + 1:
+                return lo - 1 + m.start()
+            lo = hi + 1
+            window *= 2
+        return size
+    else:
+        hi = pt - 1
+        while hi >= 0:
+            lo = max(hi - window, 0)
+            s = _classes_between(text, lo, hi, separators)
+            last = None
+            for m in regex.finditer(s, 1):
+                if m.start() > hi - lo + 1:
+                    break
+                last = m
+            if last is not None:
+                return lo - 1 + last.start()
+            hi = lo - 1
+            window *= 2
+        return 0
+
+
+def expand_by_class(text, a, b, classes, separators):
+    """ Expand a..b to the nearest points matching classes on either side. Returns (begin, end). """
+    begin, end = (a, b) if a <= b else (b, a)
+    return (find_by_class(text, begin, False, classes, separators),
+            find_by_class(text, end, True, classes, separators))
+
+
+def word_from_point(text, pt, separators):
+    """ The word at pt, as (begin, end). """
+    table = class_table(separators)
+    before = text[pt - 1:pt].translate(table) if pt > 0 else "n"
+    after = text[pt:pt + 1].translate(table) if pt < len(text) else "n"
+    word_chars = "Uw_"
+    if before in word_chars or after in word_chars:
+        begin = pt if before not in word_chars else find_by_class(
+            text, pt, False, CLASS_WORD_START, separators)
+        end = pt if after not in word_chars else find_by_class(
+            text, pt, True, CLASS_WORD_END, separators)
+        return begin, end
+    # Not at a word; expand to the surrounding word, punctuation and line boundaries.
+    classes = (CLASS_WORD_START | CLASS_WORD_END | CLASS_PUNCTUATION_START |
+               CLASS_PUNCTUATION_END | CLASS_LINE_START | CLASS_LINE_END)
+    return expand_by_class(text, pt, pt, classes, separators)
+
+
+def word_from_region(text, a, b, separators):
+    begin, end = (a, b) if a <= b else (b, a)
+    return word_from_point(text, begin, separators)[0], word_from_point(text, end, separators)[1]
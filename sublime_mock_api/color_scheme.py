@@ -0,0 +1,272 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Color schemes (.sublime-color-scheme), for `view.style()` and `view.style_for_scope()`.
+
+A color scheme is loaded from all resources with the scheme's file name, in resource order,
+so e.g. "Packages/User/Monokai.sublime-color-scheme" extends the variables, globals and rules
+of "Packages/Color Scheme - Default/Monokai.sublime-color-scheme", like in Sublime Text.
+
+Colors can be given as hex, rgb()/rgba(), hsl()/hsla(), CSS color names, var(name),
+and color(<color> <adjuster>...) with the alpha()/a(), blend(), blenda(), lightness()
+and saturation() adjusters. Resolved colors are formatted as "#rrggbb", or "#rrggbbaa"
+when they are not opaque.
+
+A scope is styled by picking, for each of foreground, background, selection_foreground
+and font_style, the rule with the highest selector score that sets it (the later rule
+wins a tie). Styles are cached per scope name in each scheme, and schemes are cached per
+file name; a view picks up another scheme when its "color_scheme" setting changes.
+The cached schemes are dropped when the resources change (see `resources.change_count()`).
+
+"""
+
+import colorsys
+import re
+
+from . import resources
+from .scope_selector import score_selector
+
+DEFAULT_COLOR_SCHEME = "Monokai.sublime-color-scheme"
+
+_NAMED_COLORS = {
+    "black": "#000000", "white": "#ffffff", "red": "#ff0000", "green": "#008000",
+    "blue": "#0000ff", "yellow": "#ffff00", "orange": "#ffa500", "purple": "#800080",
+    "gray": "#808080", "grey": "#808080", "silver": "#c0c0c0", "maroon": "#800000",
+    "olive": "#808000", "lime": "#00ff00", "aqua": "#00ffff", "cyan": "#00ffff",
+    "teal": "#008080", "navy": "#000080", "fuchsia": "#ff00ff", "magenta": "#ff00ff",
+    "pink": "#ffc0cb", "brown": "#a52a2a", "transparent": "#00000000",
+}
+
+_VAR = re.compile(r"var\(\s*([\w-]+)\s*\)")
+_FUNCTION = re.compile(r"([\w-]+)\(")
+_STYLE_KEYS = ("foreground", "background", "selection_foreground", "font_style")
+
+
+def _split_args(text):
+    """ Split the top-level space- or comma-separated arguments of a color function. """
+    args = []
+    depth = 0
+    current = ""
+    for c in text:
+        if c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        if depth == 0 and (c.isspace() or c == ","):
+            if current:
+                args.append(current)
+            current = ""
+        else:
+            current += c
+    if current:
+        args.append(current)
+    return args
+
+
+def _number(text, scale=1.0):
+    """ Parse a number or percentage; percentages are relative to `scale`. """
+    text = text.strip()
+    if text.endswith("%"):
+        return float(text[:-1]) / 100 * scale
+    return float(text)
+
+
+def parse_color(value, variables=None, _depth=0):
+    """ Parse a color value into an (r, g, b, a) tuple of floats in 0..1, or None. """
+    if not isinstance(value, str) or _depth > 32:
+        return None
+    value = value.strip()
+    variables = variables or {}
+    m = _VAR.fullmatch(value)
+    if m:
+        return parse_color(variables.get(m.group(1)), variables, _depth + 1)
+    lower = value.lower()
+    if lower in _NAMED_COLORS:
+        value = lower = _NAMED_COLORS[lower]
+    if lower.startswith("#"):
+        digits = lower[1:]
+        if len(digits) in (3, 4):
+            digits = "".join(c * 2 for c in digits)
+        if len(digits) not in (6, 8):
+            return None
+        try:
+            channels = [int(digits[i:i + 2], 16) / 255 for i in range(0, len(digits), 2)]
+        except ValueError:
+            return None
+        return tuple(channels) if len(channels) == 4 else tuple(channels) + (1.0,)
+    m = _FUNCTION.match(lower)
+    if not m or not lower.endswith(")"):
+        return None
+    name = m.group(1)
+    args = _split_args(value[m.end():-1])
+    try:
+        if name in ("rgb", "rgba"):
+            r, g, b = (_number(a, 255) / 255 for a in args[:3])
+            return (r, g, b, _number(args[3]) if len(args) > 3 else 1.0)
+        if name in ("hsl", "hsla"):
+            h = _number(args[0].rstrip("deg")) / 360
+            s, l = _number(args[1]), _number(args[2])
+            r, g, b = colorsys.hls_to_rgb(h % 1.0, l, s)
+            return (r, g, b, _number(args[3]) if len(args) > 3 else 1.0)
+        if name == "color":
+            color = parse_color(args[0], variables, _depth + 1)
+            for adjuster in args[1:]:
+                if color is None:
+                    break
+                color = _adjust(color, adjuster, variables, _depth)
+            return color
+    except (ValueError, IndexError):
+        return None
+    return None
+
+
+def _adjust(color, adjuster, variables, depth):
+    """ Apply a color() adjuster, e.g. "alpha(0.5)" or "blend(#000 50%)". """
+    m = _FUNCTION.match(adjuster)
+    if not m or not adjuster.endswith(")"):
+        return color
+    name = m.group(1).lower()
+    args = _split_args(adjuster[m.end():-1])
+    r, g, b, a = color
+    if name in ("alpha", "a"):
+        return (r, g, b, max(0.0, min(1.0, _number(args[0]))))
+    if name in ("blend", "blenda"):
+        other = parse_color(args[0], variables, depth + 1)
+        if other is None:
+            return color
+        # The percentage is the amount of the original color kept.
+        p = _number(args[1]) if len(args) > 1 else 0.5
+        mixed = tuple(p * x + (1 - p) * y for x, y in zip(color[:3], other[:3]))
+        alpha = p * a + (1 - p) * other[3] if name == "blenda" else a
+        return mixed + (alpha,)
+    if name in ("lightness", "l", "saturation", "s"):
+        h, l, s = colorsys.rgb_to_hls(r, g, b)
+        arg = "".join(args)     # Both "+ 10%" and "+10%" are accepted.
+        relative = arg[0] in "+-"
+        amount = _number(arg)
+        if name in ("lightness", "l"):
+            l = max(0.0, min(1.0, l + amount if relative else amount))
+        else:
+            s = max(0.0, min(1.0, s + amount if relative else amount))
+        return colorsys.hls_to_rgb(h, l, s) + (a,)
+    return color
+
+
+def format_color(color):
+    channels = [int(round(max(0.0, min(1.0, c)) * 255)) for c in color]
+    if channels[3] == 255:
+        return "#{:02x}{:02x}{:02x}".format(*channels[:3])
+    return "#{:02x}{:02x}{:02x}{:02x}".format(*channels)
+
+
+class ColorScheme(object):
+
+    def __init__(self, name, sources):
+        """ `sources` is a list of the decoded JSON of the scheme's files, base first. """
+        self.name = name
+        self.variables = {}
+        self.globals = {}
+        self.rules = []
+        for data in sources:
+            self.variables.update(data.get("variables") or {})
+            self.globals.update(data.get("globals") or {})
+            self.rules.extend(r for r in data.get("rules") or () if isinstance(r, dict))
+        self._rules = [(str(r.get("scope", "")), self._resolve_rule(r)) for r in self.rules]
+        self._styles = {}
+        self._style = None
+
+    def _color(self, value):
+        if isinstance(value, list):
+            value = value[0] if value else None     # Gradients (hashed colors) use their first color.
+        color = parse_color(value, self.variables)
+        return format_color(color) if color is not None else None
+
+    def _resolve_rule(self, rule):
+        resolved = {}
+        for key in _STYLE_KEYS:
+            if key not in rule:
+                continue
+            if key == "font_style":
+                resolved[key] = str(rule[key]).split()
+            else:
+                color = self._color(rule[key])
+                if color is not None:
+                    resolved[key] = color
+        return resolved
+
+    def style(self):
+        """ The global settings, with colors resolved. """
+        if self._style is None:
+            style = {}
+            for key, value in self.globals.items():
+                color = self._color(value) if isinstance(value, (str, list)) else None
+                style[key] = color if color is not None else value
+            self._style = style
+        return dict(self._style)
+
+    def style_for_scope(self, scope):
+        style = self._styles.get(scope)
+        if style is None:
+            style = self._styles[scope] = self._resolve_scope(scope)
+        return dict(style)
+
+    def _resolve_scope(self, scope):
+        best = {}   # key -> (score, value)
+        for selector, resolved in self._rules:
+            if not resolved:
+                continue
+            score = score_selector(scope, selector)
+            if not score:
+                continue
+            for key, value in resolved.items():
+                if key not in best or score >= best[key][0]:
+                    best[key] = (score, value)
+        globals_style = self.style()
+        style = {"foreground": best["foreground"][1] if "foreground" in best
+                 else globals_style.get("foreground", "#000000")}
+        if "background" in best:
+            style["background"] = best["background"][1]
+        if "selection_foreground" in best:
+            style["selection_foreground"] = best["selection_foreground"][1]
+        font_style = best["font_style"][1] if "font_style" in best else []
+        style["bold"] = "bold" in font_style
+        style["italic"] = "italic" in font_style
+        for extra in ("underline", "glow"):
+            if extra in font_style:
+                style[extra] = True
+        return style
+
+
+_schemes = {}
+_schemes_change_count = None     # resources.change_count() when the cached schemes were loaded
+
+
+def resource_names(name):
+    """ The resources making up the color scheme `name` (a file name or resource name), base first. """
+    file_name = name.replace("\\", "/").rsplit("/", 1)[-1]
+    names = resources.find(file_name)
+    if name.startswith("Packages/") and name in names:
+        # The named resource is the base; the ones in the User package come last.
+        names.remove(name)
+        names.insert(0, name)
+    user = [n for n in names if n.startswith("Packages/User/")]
+    return [n for n in names if n not in user] + user
+
+
+def load_color_scheme(name):
+    """ The ColorScheme for `name`, e.g. "Monokai.sublime-color-scheme" or a resource name. """
+    global _schemes_change_count
+    if _schemes_change_count != resources.change_count():
+        _schemes.clear()
+        _schemes_change_count = resources.change_count()
+    scheme = _schemes.get(name)
+    if scheme is None:
+        sources = [resources.load_json(n) for n in resource_names(name)]
+        scheme = _schemes[name] = ColorScheme(name, [s for s in sources if isinstance(s, dict)])
+    return scheme
+
+
+def clear_cache():
+    """ Forget all loaded color schemes, e.g. after editing them. """
+    _schemes.clear()
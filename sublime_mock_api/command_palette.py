@@ -0,0 +1,148 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Command palette model: the entries of the .sublime-commands resources, resolved to the
+command classes registered with `sublime_plugin`, with their visibility, enabled state
+and description evaluated for a window and view.
+
+    palette = CommandPalette()
+    for item in palette.items(window_id=1, view_id=1):
+        print(item.caption, item.enabled)
+
+Each MockWindow has a CommandPalette, which the `show_overlay` command with
+`{"overlay": "command_palette"}` evaluates for the window's active view:
+
+    window.run_command("show_overlay", {"overlay": "command_palette"})
+    window_state = get_window(window.id())
+    window_state.palette_items, window_state.command_palette.seconds
+
+Evaluating 1000+ commands is what makes opening the palette slow, so:
+
+* The .sublime-commands resources are parsed once, and again when the resources change
+    (see `resources.change_count()`).
+* `is_visible_()`, `is_enabled_()` and `description_()` are only called for commands
+    that override `is_visible()`, `is_enabled()` or `description()`; the defaults are
+    known without calling them (and going through `filter_args()` and the TypeError fallback).
+* The evaluated items are cached per window, view, view change count and selection
+    (and until the entries or the registered commands change), so re-opening the palette
+    without editing or moving the cursor costs nothing.
+    Commands whose state depends on anything else should be re-evaluated with `refresh=True`.
+
+`CommandPalette.seconds` is the time taken by the last evaluation.
+
+"""
+
+import traceback
+from collections import namedtuple
+from time import perf_counter
+
+from . import resources
+from .views import get_view
+
+APPLICATION, WINDOW, TEXT = "application", "window", "text"
+
+PaletteEntry = namedtuple("PaletteEntry", "caption command args")
+PaletteItem = namedtuple("PaletteItem", "caption command args kind enabled description")
+
+_entries = None
+_entries_change_count = None    # resources.change_count() when the entries were loaded
+
+
+def load_entries():
+    """ The PaletteEntries of all .sublime-commands resources, in resource order. """
+    global _entries, _entries_change_count
+    if _entries is None or _entries_change_count != resources.change_count():
+        _entries_change_count = resources.change_count()
+        entries = []
+        for name in resources.find("*.sublime-commands"):
+            data = resources.load_json(name)
+            for entry in data if isinstance(data, list) else ():
+                if isinstance(entry, dict) and isinstance(entry.get("command"), str):
+                    entries.append(PaletteEntry(entry.get("caption"), entry["command"], entry.get("args") or {}))
+        _entries = entries
+    return _entries
+
+
+def clear_cache():
+    """ Forget the loaded .sublime-commands entries. """
+    global _entries
+    _entries = None
+
+
+def _overrides(cls, method):
+    import sublime_plugin
+    return getattr(cls, method) is not getattr(sublime_plugin.Command, method)
+
+
+class CommandPalette(object):
+
+    def __init__(self):
+        self.seconds = 0.0
+        self._cache = {}        # (window id, view id) -> (state key, entries, registry, list of PaletteItem)
+
+    @staticmethod
+    def _resolve(name):
+        """ (kind, class) of the command `name`; text commands take precedence, like in Sublime Text. """
+        import sublime_plugin
+        application, window, text = sublime_plugin.command_registry()
+        for kind, registry in ((TEXT, text), (WINDOW, window), (APPLICATION, application)):
+            cls = registry.get(name)
+            if cls is not None:
+                return kind, cls
+        return None
+
+    @staticmethod
+    def _instance(kind, name, window_id, view_id):
+        import sublime_plugin
+        if kind == TEXT:
+            return sublime_plugin.find_text_command(view_id, name)
+        if kind == WINDOW:
+            return sublime_plugin.find_window_command(window_id, name)
+        return sublime_plugin.find_application_command(name)
+
+    def _state_key(self, view_id):
+        view = get_view(view_id)
+        return view.buffer.change_count, tuple(view.selection.pairs()), view.settings().get("syntax")
+
+    def items(self, window_id=1, view_id=1, refresh=False):
+        """ The visible palette items for the window and view, in resource order. """
+        import sublime_plugin
+        state = self._state_key(view_id)
+        entries = load_entries()
+        registry = sublime_plugin.command_registry()
+        cached = self._cache.get((window_id, view_id))
+        if cached is not None and cached[:3] == (state, entries, registry) and not refresh:
+            return cached[3]
+        start = perf_counter()
+        items = self._evaluate(entries, window_id, view_id)
+        self.seconds = perf_counter() - start
+        self._cache[window_id, view_id] = (state, entries, registry, items)
+        return items
+
+    def _evaluate(self, entries, window_id, view_id):
+        # Per class: whether is_visible, is_enabled and description are overridden.
+        overridden = {}
+        items = []
+        for entry in entries:
+            found = self._resolve(entry.command)
+            if found is None:
+                continue
+            kind, cls = found
+            flags = overridden.get(cls)
+            if flags is None:
+                flags = overridden[cls] = (_overrides(cls, "is_visible"), _overrides(cls, "is_enabled"),
+                                           _overrides(cls, "description"))
+            instance = self._instance(kind, entry.command, window_id, view_id) if any(flags) else None
+            args = entry.args
+            try:
+                if flags[0] and not instance.is_visible_(args):
+                    continue
+                enabled = instance.is_enabled_(args) if flags[1] else True
+                description = instance.description_(args) if flags[2] else ""
+            except Exception:
+                traceback.print_exc()
+                continue
+            caption = entry.caption or description or entry.command
+            items.append(PaletteItem(caption, entry.command, args, kind, enabled, description))
+        return items
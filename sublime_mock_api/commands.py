@@ -0,0 +1,142 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Command dispatch, for `sublime.run_command()`, `window.run_command()` and `view.run_command()`.
+
+Commands are looked up by name in the `sublime_plugin` command registry and run like
+Sublime Text runs them:
+
+1. The `on_text_command` / `on_window_command` listeners may rewrite the command
+    (the first listener returning a command name wins).
+2. The command is skipped if `is_enabled_()` returns False.
+3. `run_()` is called. Text commands get a fresh edit token, which `view_begin_edit()`
+    checks; the view is "in edit" while the text command runs.
+4. The `on_post_text_command` / `on_post_window_command` listeners are called, unless
+    `run_()` raised an exception.
+
+The run functions return NOT_FOUND, DISABLED, FAILED (`run_()` raised) or RAN.
+
+A window command name that isn't a window command is run as a text command in the
+window's active view, and an application command name that isn't an application command
+is run as a window command in the active window.
+
+Edit tokens are open from `view_begin_edit()` until `view_end_edit()`. While a text command
+is dispatched in a view, `view_insert()`, `view_erase()` and `view_replace()` only accept an
+open token, and the token of a dispatched command is refused after the command returned,
+so an Edit object kept after its command returned can't change the buffer.
+Outside of dispatched commands, any other token is accepted, so tests can still call
+e.g. `MyCommand(view).run_(1, {})` or `view.insert(sublime.Edit(1), 0, "text")`.
+
+Call `log_commands(True)` to print each command as it is run.
+
+"""
+
+import traceback
+from itertools import count
+
+LOG_COMMANDS = False
+
+NOT_FOUND = 0
+DISABLED = 1
+FAILED = 2
+RAN = 3
+
+# Dispatched tokens start high, so they don't collide with tokens that tests pass directly.
+_edit_tokens = count(1000001)
+_issued_edits = {}      # view id -> list of the edit tokens of the running text commands
+_open_edits = {}        # view id -> list of the edit tokens between begin_edit and end_edit
+_expired_edits = set()  # Edit tokens of dispatched text commands that have returned
+
+
+def _log(kind, name, args):
+    if LOG_COMMANDS:
+        print("command: {} {} {}".format(kind, name, args))
+
+
+def _run(command, edit_token, args):
+    try:
+        if not command.is_enabled_(args):
+            return DISABLED
+        command.run_(edit_token, args)
+    except Exception:
+        traceback.print_exc()
+        return FAILED
+    return RAN
+
+
+def run_text_command(view_id, name, args=None):
+    """ Run the text command `name` in the view. Returns NOT_FOUND, DISABLED, FAILED or RAN. """
+    import sublime_plugin
+    new_name, new_args = sublime_plugin.on_text_command(view_id, name, args)
+    if new_name:
+        name, args = new_name, new_args
+    command = sublime_plugin.find_text_command(view_id, name)
+    if command is None:
+        return NOT_FOUND
+    _log("text", name, args)
+    token = next(_edit_tokens)
+    tokens = _issued_edits.setdefault(view_id, [])
+    tokens.append(token)
+    try:
+        result = _run(command, token, args)
+    finally:
+        tokens.remove(token)
+        _expired_edits.add(token)
+    if result == RAN:
+        sublime_plugin.on_post_text_command(view_id, name, args)
+    return result
+
+
+def run_window_command(window_id, active_view_id, name, args=None):
+    """ Run the window command `name`, or else the text command `name` in the active view. """
+    import sublime_plugin
+    new_name, new_args = sublime_plugin.on_window_command(window_id, name, args)
+    if new_name:
+        name, args = new_name, new_args
+    command = sublime_plugin.find_window_command(window_id, name)
+    if command is None:
+        return run_text_command(active_view_id, name, args) if active_view_id else NOT_FOUND
+    _log("window", name, args)
+    result = _run(command, 0, args)
+    if result == RAN:
+        sublime_plugin.on_post_window_command(window_id, name, args)
+    return result
+
+
+def run_application_command(window_id, active_view_id, name, args=None):
+    """ Run the application command `name`, or else the window command `name` in the active window. """
+    import sublime_plugin
+    command = sublime_plugin.find_application_command(name)
+    if command is None:
+        return run_window_command(window_id, active_view_id, name, args)
+    _log("application", name, args)
+    return _run(command, 0, args)
+
+
+def begin_edit(view_id, edit_token):
+    """ Open `edit_token`, which must belong to a text command running in the view, if any is. """
+    issued = _issued_edits.get(view_id)
+    if issued and edit_token not in issued:
+        raise ValueError("Invalid edit token {} for view {}".format(edit_token, view_id))
+    _open_edits.setdefault(view_id, []).append(edit_token)
+
+
+def end_edit(view_id, edit_token):
+    """ Close `edit_token`, at the end of the TextCommand's run method. """
+    tokens = _open_edits.get(view_id)
+    if tokens and edit_token in tokens:
+        tokens.remove(edit_token)
+
+
+def check_edit(view_id, edit_token):
+    """ Check that `edit_token` may change the view's buffer (see the module docstring). """
+    if edit_token in _open_edits.get(view_id, ()):
+        return
+    if edit_token in _expired_edits or _issued_edits.get(view_id):
+        raise ValueError("Edit token {} is not open in view {}; edits may not be used after "
+                         "the TextCommand's run method has returned".format(edit_token, view_id))
+
+
+def is_in_edit(view_id):
+    return bool(_issued_edits.get(view_id) or _open_edits.get(view_id))
@@ -0,0 +1,55 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Regex searching in the buffer, for `view.find()` and `view.find_all()`.
+
+Patterns are compiled once per (pattern, flags) and cached.
+Sublime Text uses a different regex engine; Python's `re` module is used here,
+with ^ and $ matching at line boundaries like in Sublime.
+
+"""
+
+import re
+from functools import lru_cache
+
+# Flags from the sublime module:
+LITERAL = 1
+IGNORECASE = 2
+
+_FORMAT_GROUP = re.compile(r"\$(\d+)|\$\{(\d+)\}")
+
+
+@lru_cache(maxsize=256)
+def compile_pattern(pattern, flags):
+    if flags & LITERAL:
+        pattern = re.escape(pattern)
+    return re.compile(pattern, re.MULTILINE | (re.IGNORECASE if flags & IGNORECASE else 0))
+
+
+@lru_cache(maxsize=64)
+def _python_format(fmt):
+    """ Convert Sublime's $1 / ${1} format syntax to Python's \\g<1>. """
+    return _FORMAT_GROUP.sub(lambda m: r"\g<" + (m.group(1) or m.group(2)) + ">", fmt)
+
+
+def find(text, pattern, start_pt, flags):
+    """ (begin, end) of the first match at or after start_pt, or (-1, -1). """
+    m = compile_pattern(pattern, flags).search(text, max(start_pt, 0))
+    return m.span() if m else (-1, -1)
+
+
+def find_all(text, pattern, flags):
+    """ Lists of the begin and end points of all matches. """
+    begins = []
+    ends = []
+    for m in compile_pattern(pattern, flags).finditer(text):
+        begins.append(m.start())
+        ends.append(m.end())
+    return begins, ends
+
+
+def find_all_with_contents(text, pattern, flags, fmt):
+    """ List of ((begin, end), expanded_fmt) for all matches. """
+    template = _python_format(fmt)
+    return [(m.span(), m.expand(template)) for m in compile_pattern(pattern, flags).finditer(text)]
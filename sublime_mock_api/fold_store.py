@@ -0,0 +1,165 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Per-view folding state.
+
+The folds are kept as a sorted list of disjoint (begin, end) tuples; folding a region that
+overlaps or nests with existing folds merges them into a single fold.
+
+The store switches between two representations:
+
+* While folds are being added or removed, they are kept as a plain sorted list.
+    A few new folds are inserted with bisect, merging only the folds they overlap;
+    a large batch is sorted and merged in one linear pass. Unfolding uses bisect.
+* When the buffer is edited, the list is loaded into a `PointTracker`, which then follows
+    the edits in O(log n) each. The list is only materialized again when the folds change.
+
+`is_folded()` is answered in O(log n) from whichever representation is current.
+
+As in Sublime Text, a fold whose text is erased entirely is removed.
+
+"""
+
+from bisect import bisect_left, bisect_right
+
+from .tracking import PointTracker
+
+
+def _append_merged(folds, fold):
+    """ Append `fold` to the sorted `folds`, merging it with the last fold if they overlap. """
+    if folds and folds[-1][1] > fold[0]:
+        if fold[1] > folds[-1][1]:
+            folds[-1] = (folds[-1][0], fold[1])
+    else:
+        folds.append(fold)
+
+
+class FoldStore(object):
+
+    # Batches of more than this many regions are merged in one linear pass
+    # rather than inserted one at a time.
+    BULK_FOLD_SIZE = 32
+
+    def __init__(self):
+        self._folds = []
+        self._tracker = None
+
+    def __len__(self):
+        return len(self.folds())
+
+    def folds(self):
+        """ Sorted list of the current (begin, end) folds. """
+        if self._folds is None:
+            pos = self._tracker.positions()
+            self._folds = [f for f in zip(pos[0::2], pos[1::2]) if f[0] < f[1]]
+            self._tracker = None
+        return self._folds
+
+    def _overlapping(self, folds, begin, end):
+        """ Slice indices of the folds overlapping (or nested with) begin..end. """
+        lo = bisect_left(folds, (begin, begin))
+        if lo > 0 and folds[lo - 1][1] > begin:
+            lo -= 1
+        hi = bisect_left(folds, (end, end), lo)
+        return lo, hi
+
+    def fold(self, regions):
+        """ Fold a list of (a, b) regions. Returns True if anything was folded. """
+        folds = self.folds()
+        spans = [(a, b) if a <= b else (b, a) for a, b in regions]
+        if len(spans) <= self.BULK_FOLD_SIZE:
+            changed = False
+            for begin, end in spans:
+                if begin < end and self._fold_one(folds, begin, end):
+                    changed = True
+            return changed
+        spans.sort()
+        merged = []
+        i = 0
+        n = len(folds)
+        for span in spans:
+            if span[0] == span[1]:
+                continue
+            while i < n and folds[i] < span:
+                _append_merged(merged, folds[i])
+                i += 1
+            _append_merged(merged, span)
+        # The remaining folds are disjoint, so only the first ones can overlap the last new fold.
+        while i < n and merged and merged[-1][1] > folds[i][0]:
+            _append_merged(merged, folds[i])
+            i += 1
+        merged.extend(folds[i:])
+        if merged == folds:
+            return False
+        folds[:] = merged
+        return True
+
+    def _fold_one(self, folds, begin, end):
+        """ Fold begin..end, merging it with the folds it overlaps. Returns True if anything changed. """
+        lo, hi = self._overlapping(folds, begin, end)
+        if hi > lo:
+            if hi - lo == 1 and folds[lo][0] <= begin and folds[lo][1] >= end:
+                return False
+            begin = min(begin, folds[lo][0])
+            end = max(end, folds[hi - 1][1])
+        folds[lo:hi] = [(begin, end)]
+        return True
+
+    def unfold(self, regions):
+        """ Unfold all folds intersecting the given (a, b) regions. Returns the unfolded folds. """
+        folds = self.folds()
+        unfolded = []
+        for a, b in regions:
+            begin, end = (a, b) if a <= b else (b, a)
+            if begin == end:
+                lo = bisect_right(folds, (begin, begin))
+                if lo > 0 and folds[lo - 1][1] >= begin:
+                    lo -= 1
+                hi = bisect_right(folds, (begin, float('inf')), lo)
+            else:
+                lo, hi = self._overlapping(folds, begin, end)
+            unfolded.extend(folds[lo:hi])
+            del folds[lo:hi]
+        return unfolded
+
+    def is_folded(self, a, b):
+        """ True if the region a..b lies within a fold. """
+        begin, end = (a, b) if a <= b else (b, a)
+        if self._folds is not None:
+            i = bisect_right(self._folds, (begin, float('inf'))) - 1
+            return i >= 0 and self._folds[i][1] > begin and self._folds[i][1] >= end
+        # Points alternate between fold begin (even slots) and fold end (odd slots):
+        slot, pos = self._tracker.first_at_or_after(begin + 1)
+        return slot % 2 == 1 and pos >= end
+
+    def on_insert(self, pt, length):
+        if self._tracker is None:
+            if not self._folds:
+                return
+            self._load_tracker()
+        self._tracker.on_insert(pt, length)
+
+    def on_erase(self, a, b):
+        if self._tracker is None:
+            if not self._folds:
+                return
+            self._load_tracker()
+        tracker = self._tracker
+        slot, pos = tracker.first_at_or_after(a + 1)
+        tracker.on_erase(a, b)
+        if slot < len(tracker) and pos <= b:
+            # Some fold boundaries were collapsed; materialize to drop erased folds
+            # and keep begin/end points alternating.
+            self.folds()
+
+    def _load_tracker(self):
+        points = []
+        sticky = []
+        for begin, end in self._folds:
+            points.append(begin)
+            points.append(end)
+            sticky.append(False)
+            sticky.append(True)
+        self._tracker = PointTracker(points, sticky)
+        self._folds = None
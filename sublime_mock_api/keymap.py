@@ -0,0 +1,369 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Key bindings (.sublime-keymap files), and a resolver for replaying keystrokes through the mock.
+
+The key bindings are loaded from the "Default.sublime-keymap" and "Default (<platform>).sublime-keymap"
+resources in Sublime Text's order: the Default package first, then the other packages, and
+the User package last; within a package, "Default.sublime-keymap" comes before the platform
+keymap. A later binding takes precedence over an earlier one. The bindings are kept in a trie
+over the key chords of their key sequences, with the candidate bindings of each sequence
+sorted by precedence.
+
+A binding applies if all of its contexts match. The contexts Sublime Text evaluates itself
+are evaluated directly:
+
+    selector, eol_selector, selection_empty, num_selections, preceding_text,
+    following_text, text, setting.<name>, and UI state like overlay_visible (always False)
+
+Other contexts are asked from the plugins' `on_query_context()` handlers, but only after
+all built-in contexts of the binding have matched, so plugin handlers are only reached for
+bindings that can still apply. Context results are memoized while resolving a key, since
+many candidate bindings share the same contexts.
+
+Recorded keystrokes are replayed with `replay()`:
+
+    replay(["ctrl+k", "ctrl+u", "a", "enter"], view_id=1)
+
+Keys without a binding that are a single character (or "enter" / "tab") are typed
+into the view with the "insert" command, or directly if no "insert" command is registered.
+
+"""
+
+import re
+from collections import namedtuple
+
+from . import commands
+from . import resources
+from .scope_selector import score_selector
+from .views import get_view
+from .windows import get_window
+
+_PLATFORMS = {"windows": "Windows", "osx": "OSX", "linux": "Linux"}
+_MODIFIERS = ("ctrl", "alt", "shift", "super")
+_KEY_ALIASES = {"option": "alt", "command": "super", "cmd": "super", "control": "ctrl"}
+_TYPED_KEYS = {"enter": "\n", "tab": "\t", "space": " "}
+
+# Operators, as the sublime.OP_* constants passed to on_query_context:
+_OPERATORS = {
+    "equal": 0,
+    "not_equal": 1,
+    "regex_match": 2,
+    "not_regex_match": 3,
+    "regex_contains": 4,
+    "not_regex_contains": 5,
+}
+
+# Contexts about UI elements that the mock doesn't have:
+_UI_CONTEXTS = {
+    "overlay_visible", "overlay_has_focus", "auto_complete_visible", "panel_visible",
+    "panel_has_focus", "popup_visible", "has_snippet", "has_next_field", "has_prev_field",
+    "is_recording_macro", "group_has_multiselect", "group_has_transient_sheet",
+}
+
+Context = namedtuple("Context", "key operator operand match_all")
+Binding = namedtuple("Binding", "keys command args contexts plugin_contexts precedence source")
+
+
+def normalize_key(key, platform="windows"):
+    """ Canonical form of a key chord, e.g. "shift+ctrl+P" -> "ctrl+shift+p", "primary+k" -> "ctrl+k". """
+    parts = key.split("+")
+    if key.endswith("+"):
+        # The "+" key itself, e.g. "ctrl++".
+        parts = [p for p in parts if p] + ["+"]
+    *modifiers, name = parts
+    found = set()
+    for modifier in modifiers:
+        modifier = _KEY_ALIASES.get(modifier.lower(), modifier.lower())
+        if modifier == "primary":
+            modifier = "super" if platform == "osx" else "ctrl"
+        found.add(modifier)
+    if len(name) > 1:
+        name = name.lower()
+    elif name.isalpha() and name.isupper():
+        # "ctrl+P" means "ctrl+shift+p".
+        name = name.lower()
+        found.add("shift")
+    return "+".join([m for m in _MODIFIERS if m in found] + [name])
+
+
+class _Node(object):
+    __slots__ = ['children', 'bindings']
+
+    def __init__(self):
+        self.children = {}
+        self.bindings = []      # Highest precedence first
+
+
+class Keymap(object):
+
+    def __init__(self, bindings=(), platform="windows"):
+        self.platform = platform
+        self.root = _Node()
+        self.count = 0
+        for binding in bindings:
+            self.add(binding)
+
+    def add(self, entry, source=""):
+        """ Add a key binding, given as in a .sublime-keymap file. Returns the Binding, or None if invalid. """
+        keys = entry.get("keys") if isinstance(entry, dict) else None
+        if not keys or not isinstance(entry.get("command"), str):
+            return None
+        keys = tuple(normalize_key(k, self.platform) for k in keys)
+        builtin = []
+        plugin = []
+        for context in entry.get("context") or ():
+            if not isinstance(context, dict) or "key" not in context:
+                continue
+            parsed = Context(context["key"], context.get("operator", "equal"),
+                             context.get("operand", True), bool(context.get("match_all", False)))
+            (builtin if _is_builtin(parsed.key) else plugin).append(parsed)
+        binding = Binding(keys, entry["command"], entry.get("args") or {}, tuple(builtin), tuple(plugin),
+                          self.count, source)
+        self.count += 1
+        node = self.root
+        for key in keys:
+            child = node.children.get(key)
+            if child is None:
+                child = node.children[key] = _Node()
+            node = child
+        node.bindings.insert(0, binding)
+        return binding
+
+    def candidates(self, keys):
+        """ The bindings for the key sequence, highest precedence first; None if it's not a prefix of any. """
+        node = self.root
+        for key in keys:
+            node = node.children.get(key)
+            if node is None:
+                return None
+        return node.bindings
+
+
+def _is_builtin(key):
+    return key in _BUILTIN_CONTEXTS or key in _UI_CONTEXTS or key.startswith("setting.")
+
+
+def keymap_resources(platform="windows"):
+    """ The keymap resources for `platform`, lowest precedence first. """
+    platform_name = "Default ({}).sublime-keymap".format(_PLATFORMS.get(platform, platform))
+    package_order = {}
+    found = []
+    for name in resources.find("*.sublime-keymap"):
+        file_name = name.rsplit("/", 1)[-1]
+        if file_name != "Default.sublime-keymap" and file_name != platform_name:
+            continue
+        package = name.split("/")[1]
+        rank = 0 if package == "Default" else 2 if package == "User" else 1
+        found.append((rank, package_order.setdefault(package, len(package_order)),
+                      file_name == platform_name, len(found), name))
+    return [entry[-1] for entry in sorted(found)]
+
+
+def load_keymap(platform="windows"):
+    """ A Keymap with the bindings of the keymap resources for `platform`. """
+    keymap = Keymap(platform=platform)
+    for name in keymap_resources(platform):
+        data = resources.load_json(name)
+        for entry in data if isinstance(data, list) else ():
+            keymap.add(entry, name)
+    return keymap
+
+
+_keymaps = {}
+
+
+def get_keymap(platform="windows"):
+    keymap = _keymaps.get(platform)
+    if keymap is None:
+        keymap = _keymaps[platform] = load_keymap(platform)
+    return keymap
+
+
+def clear_cache():
+    """ Forget the loaded keymaps, e.g. after changing the keymap resources. """
+    _keymaps.clear()
+
+
+def _compare(operator, value, operand):
+    """ Apply a context operator to a value. """
+    if operator == "equal":
+        return value == operand
+    if operator == "not_equal":
+        return value != operand
+    value = value if isinstance(value, str) else str(value)
+    operand = operand if isinstance(operand, str) else str(operand)
+    try:
+        if operator == "regex_match":
+            return re.fullmatch(operand, value) is not None
+        if operator == "not_regex_match":
+            return re.fullmatch(operand, value) is None
+        if operator == "regex_contains":
+            return re.search(operand, value) is not None
+        if operator == "not_regex_contains":
+            return re.search(operand, value) is None
+    except re.error:
+        return False
+    return False
+
+
+def _selection(view):
+    """ (a, b) of each selection region. """
+    return list(zip(*view.selection.pairs()))
+
+
+def _per_region(value_of):
+    """ A context evaluated for each selection region; `value_of(view, begin, end)`. """
+    def evaluate(view, context):
+        pairs = _selection(view)
+        results = (_compare(context.operator, value_of(view, a, b), context.operand) for a, b in pairs)
+        return all(results) if context.match_all else any(results)
+    return evaluate
+
+
+def _selector(view, context):
+    def matches(pt):
+        return score_selector(view.scopes.scope_name(pt), context.operand) > 0
+    results = (matches(b) for _, b in _selection(view))
+    matched = all(results) if context.match_all else any(results)
+    return matched if context.operator == "equal" else not matched
+
+
+def _eol_selector(view, context):
+    buffer = view.buffer
+
+    def matches(pt):
+        return score_selector(view.scopes.scope_name(buffer.line_end(buffer.row_of(pt))), context.operand) > 0
+    results = (matches(b) for _, b in _selection(view))
+    matched = all(results) if context.match_all else any(results)
+    return matched if context.operator == "equal" else not matched
+
+
+def _preceding_text(view, a, b):
+    buffer = view.buffer
+    begin = min(a, b)
+    return buffer.text[buffer.line_start(buffer.row_of(begin)):begin]
+
+
+def _following_text(view, a, b):
+    buffer = view.buffer
+    end = max(a, b)
+    return buffer.text[end:buffer.line_end(buffer.row_of(end))]
+
+
+_BUILTIN_CONTEXTS = {
+    "selector": _selector,
+    "eol_selector": _eol_selector,
+    "selection_empty": _per_region(lambda view, a, b: a == b),
+    "preceding_text": _per_region(_preceding_text),
+    "following_text": _per_region(_following_text),
+    "text": _per_region(lambda view, a, b: view.buffer.text[min(a, b):max(a, b)]),
+    "num_selections": lambda view, context: _compare(context.operator, len(view.selection), context.operand),
+}
+
+
+class KeyResolver(object):
+    """ Resolves a stream of key chords in a view to commands, like Sublime Text's key handling. """
+
+    def __init__(self, keymap=None, view_id=1, window_id=1):
+        self.keymap = keymap if keymap is not None else get_keymap()
+        self.view_id = view_id
+        self.window_id = window_id
+        self.pending = ()       # Keys typed so far of an unfinished key sequence
+        self.plugin_queries = 0
+
+    def _context_matches(self, view, context, memo):
+        try:
+            return memo[context]
+        except (KeyError, TypeError):
+            pass
+        key = context.key
+        if key in _BUILTIN_CONTEXTS:
+            result = _BUILTIN_CONTEXTS[key](view, context)
+        elif key in _UI_CONTEXTS:
+            result = _compare(context.operator, False, context.operand)
+        elif key.startswith("setting."):
+            result = _compare(context.operator, view.settings().get(key[8:]), context.operand)
+        else:
+            import sublime_plugin
+            self.plugin_queries += 1
+            result = sublime_plugin.on_query_context(
+                self.view_id, key, _OPERATORS.get(context.operator, 0), context.operand, context.match_all)
+        try:
+            memo[context] = result
+        except TypeError:
+            pass    # Unhashable operand, e.g. a list.
+        return result
+
+    def matching_binding(self, bindings):
+        """ The first (highest precedence) of the bindings whose contexts all match, or None. """
+        view = get_view(self.view_id)
+        memo = {}
+        for binding in bindings:
+            if all(self._context_matches(view, c, memo) for c in binding.contexts) and \
+                    all(self._context_matches(view, c, memo) for c in binding.plugin_contexts):
+                return binding
+        return None
+
+    def feed(self, key):
+        """ Handle a key chord. Returns the Binding to run, None if the key isn't bound,
+        or True if it is part of an unfinished key sequence.
+        """
+        key = normalize_key(key, self.keymap.platform)
+        keys = self.pending + (key,)
+        node = self.keymap.root
+        for k in keys:
+            node = node.children.get(k)
+            if node is None:
+                break
+        if node is None:
+            self.pending = ()
+            # Not a continuation of the pending sequence; try the key on its own.
+            return self.feed(key) if len(keys) > 1 else None
+        if node.children:
+            # Wait for the next key, like Sublime Text; a binding for the prefix itself is shadowed.
+            self.pending = keys
+            return True
+        self.pending = ()
+        return self.matching_binding(node.bindings)
+
+    def press(self, key):
+        """ Handle a key chord, running the bound command or typing the character. """
+        result = self.feed(key)
+        if result is True:
+            return
+        if result is not None:
+            commands.run_window_command(self.window_id, self.view_id, result.command, result.args)
+            return
+        characters = _typed_characters(normalize_key(key, self.keymap.platform))
+        if characters:
+            self._type(characters)
+
+    def _type(self, characters):
+        if commands.run_text_command(self.view_id, "insert", {"characters": characters}) != commands.NOT_FOUND:
+            return
+        view = get_view(self.view_id)
+        for begin, end in reversed([(min(a, b), max(a, b)) for a, b in _selection(view)]):
+            if end > begin:
+                view.buffer.erase(begin, end)
+            view.buffer.insert(begin, characters)
+
+
+def _typed_characters(key):
+    if key in _TYPED_KEYS:
+        return _TYPED_KEYS[key]
+    if key.startswith("shift+") and len(key) == 7:
+        return key[6:].upper()
+    return key if len(key) == 1 else ""
+
+
+def replay(keys, view_id=1, window_id=None):
+    """ Replay a sequence of key chords (e.g. ["ctrl+k", "ctrl+u"]) in the view. """
+    view = get_view(view_id)
+    window_id = window_id if window_id is not None else view.window_id
+    get_window(window_id).active_view_id = view_id
+    resolver = KeyResolver(view_id=view_id, window_id=window_id)
+    for key in keys:
+        resolver.press(key)
+    return resolver
@@ -0,0 +1,163 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Metadata from .tmPreferences files, for `view.meta_info()`, and indentation helpers
+for `view.indentation_level()` and `view.indented_region()`.
+
+A .tmPreferences file is a plist with a scope selector and a dict of settings, e.g.:
+
+    <dict>
+        <key>scope</key> <string>source.python</string>
+        <key>settings</key> <dict>
+            <key>shellVariables</key> <array> ... TM_COMMENT_START ... </array>
+            <key>increaseIndentPattern</key> <string>...</string>
+        </dict>
+    </dict>
+
+All .tmPreferences resources are parsed once, into an index of (selector, value) per
+settings key, in resource order. `meta_info(key, scope_name)` returns the value of the
+entry whose selector scores highest against the scope name (the later entry wins a tie),
+and is cached per (key, scope name), since toggle-comment and reindent commands ask for
+the same few keys at the same few scopes for every line. The `shellVariables` of all the
+matching entries are merged, highest score first, so e.g. TM_COMMENT_START_2 from a
+less specific file is kept. The index is rebuilt when the resources change
+(see `resources.change_count()`).
+
+"""
+
+import plistlib
+from xml.parsers.expat import ExpatError
+
+from . import resources
+from .scope_selector import score_selector
+
+_index = None           # settings key -> list of (selector, value)
+_index_change_count = None      # resources.change_count() when the index was built
+_cache = {}             # (key, scope name) -> value
+
+
+def _build_index():
+    index = {}
+    for name in resources.find("*.tmPreferences"):
+        data = resources.load_binary(name)
+        try:
+            plist = plistlib.loads(data) if data else None
+        except (plistlib.InvalidFileException, ExpatError, ValueError) as exc:
+            print("Error parsing {}: {}".format(name, exc))
+            continue
+        if not isinstance(plist, dict) or not isinstance(plist.get("settings"), dict):
+            continue
+        selector = str(plist.get("scope", ""))
+        for key, value in plist["settings"].items():
+            index.setdefault(key, []).append((selector, value))
+    return index
+
+
+def entries(key):
+    """ The (selector, value) entries for the settings `key`, in resource order. """
+    global _index, _index_change_count
+    if _index is None or _index_change_count != resources.change_count():
+        _index = _build_index()
+        _index_change_count = resources.change_count()
+        _cache.clear()
+    return _index.get(key, ())
+
+
+def meta_info(key, scope_name):
+    """ The value of the settings `key` that applies to `scope_name`, or None. """
+    candidates = entries(key)
+    try:
+        return _cache[key, scope_name]
+    except KeyError:
+        pass
+    matches = []
+    for i, (selector, candidate) in enumerate(candidates):
+        score = score_selector(scope_name, selector)
+        if score:
+            matches.append((score, i, candidate))
+    matches.sort(reverse=True)
+    if not matches:
+        value = None
+    elif key == "shellVariables":
+        value = _merge_shell_variables(candidate for _, _, candidate in matches)
+    else:
+        value = matches[0][2]
+    _cache[key, scope_name] = value
+    return value
+
+
+def _merge_shell_variables(values):
+    """ The shellVariables lists `values` merged by name; a variable of an earlier list wins. """
+    merged = []
+    names = set()
+    for variables in values:
+        if not isinstance(variables, list):
+            continue
+        for variable in variables:
+            name = variable.get("name") if isinstance(variable, dict) else None
+            if name not in names:
+                names.add(name)
+                merged.append(variable)
+    return merged
+
+
+def clear_cache():
+    """ Forget the metadata index, e.g. after changing the resources. """
+    global _index
+    _index = None
+    _cache.clear()
+
+
+def _line_indentation(text, begin, end, tab_size):
+    """ (indentation in columns, True if the line is blank) for the line text[begin:end]. """
+    tab_size = max(tab_size, 1)
+    columns = 0
+    for i in range(begin, end):
+        c = text[i]
+        if c == " ":
+            columns += 1
+        elif c == "\t":
+            columns += tab_size - columns % tab_size
+        else:
+            return columns, False
+    return columns, True
+
+
+def indentation_level(buffer, pt, tab_size):
+    """ Indentation level (in units of `tab_size` columns) of the line containing `pt`. """
+    row = buffer.row_of(min(max(pt, 0), len(buffer.text)))
+    columns, _ = _line_indentation(buffer.text, buffer.line_start(row), buffer.line_end(row), tab_size)
+    return columns // max(tab_size, 1)
+
+
+def indented_region(buffer, pt, tab_size):
+    """ (begin, end) of the block of lines around `pt` indented at least as much as the line at `pt`.
+
+    Blank lines inside the block belong to it. The block is empty (at `pt`) if the line isn't indented.
+    """
+    text = buffer.text
+    pt = min(max(pt, 0), len(text))
+    row = buffer.row_of(pt)
+    level, blank = _line_indentation(text, buffer.line_start(row), buffer.line_end(row), tab_size)
+    if blank or not level:
+        return pt, pt
+
+    def inside(r):
+        columns, is_blank = _line_indentation(text, buffer.line_start(r), buffer.line_end(r), tab_size)
+        return is_blank or columns >= level
+
+    first = row
+    while first > 0 and inside(first - 1):
+        first -= 1
+    last = row
+    count = buffer.line_count()
+    while last + 1 < count and inside(last + 1):
+        last += 1
+    # Leading and trailing blank lines aren't part of the block.
+    while first < row and _line_indentation(text, buffer.line_start(first), buffer.line_end(first), tab_size)[1]:
+        first += 1
+    while last > row and _line_indentation(text, buffer.line_start(last), buffer.line_end(last), tab_size)[1]:
+        last -= 1
+    end = buffer.line_end(last)
+    return buffer.line_start(first), min(end + 1, len(text))
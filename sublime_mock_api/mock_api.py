@@ -42,6 +42,7 @@ If the above is True, then you have the mocked module, otherwise you have the or
 # in the `sublime_api.py` module provided outside this package.
 
 
+import os
 import sys
 from pprint import pformat
 import json
@@ -49,6 +50,24 @@ import string
 import inspect
 from functools import wraps
 from .settings import ENABLE_PRINT_CALL_WRAPPING
+from . import settings as mock_settings
+from . import views
+from .views import get_view
+from . import windows as mock_windows
+from .windows import get_window
+from .settings_store import get_settings, named_settings
+from . import char_classes
+from . import commands
+from . import find
+from . import metadata
+from . import quick_panel
+from . import resources
+from . import scope_selector
+from . import symbol_index
+from . import symbol_store
+from . import syntax
+from . import syntax_profile
+from . import syntax_tests
 
 _settings_base_dir = ""
 
@@ -73,6 +92,25 @@ def print_call_info(func):
     return wrapped
 
 
+def _region(a, b=None, xpos=-1):
+    """ Create a sublime.Region; imported lazily since the sublime module imports this module. """
+    import sublime
+    return sublime.Region(a, b, xpos)
+
+
+def _region_list(a, b):
+    """ Create a sublime.RegionList from lists of a and b points. """
+    import sublime
+    return sublime.RegionList.from_arrays(a, b)
+
+
+def _region_pairs(regions):
+    """ (a, b) tuples for a list of Regions or a sublime.RegionList. """
+    if hasattr(regions, 'a'):
+        return list(zip(regions.a, regions.b))
+    return [(r.a, r.b) for r in regions]
+
+
 @print_call_info
 def log_message(s):
     print(s)
@@ -105,17 +143,17 @@ def executable_path():
 
 @print_call_info
 def packages_path():
-    return "Mock"
+    return mock_settings.PACKAGES_PATH or "Mock"
 
 
 @print_call_info
 def installed_packages_path():
-    return "Mock"
+    return mock_settings.INSTALLED_PACKAGES_PATH or "Mock"
 
 
 @print_call_info
 def cache_path():
-    return "Mock"
+    return mock_settings.CACHE_PATH or "Mock"
 
 
 @print_call_info
@@ -148,7 +186,12 @@ def yes_no_cancel_dialog(msg, yes_title="", no_title=""):
 
 @print_call_info
 def run_command(cmd, args=None):
-    print("MOCK API: Running command", cmd, "with args:", args)
+    window = get_window(1)     # The active window, see active_window()
+    result = commands.run_application_command(window.window_id, window.active_view_id, cmd, args)
+    if result == commands.NOT_FOUND:
+        print("MOCK API: No command", cmd, "to run with args:", args)
+    elif result == commands.DISABLED:
+        print("MOCK API: Command", cmd, "is disabled for args:", args)
 
 
 @print_call_info
@@ -184,6 +227,7 @@ def set_clipboard(text):
 @print_call_info
 def log_commands(flag):
     print("log_commands:", flag)
+    commands.LOG_COMMANDS = flag
 
 
 LOG_INPUT_ACTIVE = False
@@ -204,6 +248,7 @@ def log_result_regex(flag):
 @print_call_info
 def log_indexing(flag):
     print("log_indexing:", flag)
+    symbol_index.LOG_INDEXING = flag
 
 
 @print_call_info
@@ -213,22 +258,22 @@ def log_build_systems(flag):
 
 @print_call_info
 def score_selector(scope_name, selector):
-    print("score_selector:", scope_name, selector)
+    return scope_selector.score_selector(scope_name, selector)
 
 
 @print_call_info
 def load_resource(name):
-    pass
+    return resources.load(name)
 
 
 @print_call_info
 def load_binary_resource(name):
-    pass
+    return resources.load_binary(name)
 
 
 @print_call_info
 def find_resources(pattern):
-    pass
+    return resources.find(pattern)
 
 
 @print_call_info
@@ -253,12 +298,10 @@ def expand_variables(val, variables):
 
 @print_call_info
 def load_settings(base_name):
-    # settings_id = sublime_api.load_settings(base_name)
-    # return Settings(settings_id)
-    # Not really sure what the right approach is here...
-    # However, because the Sublime Text settings can include non-JSON-complient things like
-    # comments, we will certainly have to e.g. pass the settings file through jsmin or similar.
-    return 0
+    # Settings files are not read; the settings object starts out empty.
+    # (Because the Sublime Text settings can include non-JSON-complient things like
+    # comments, we will have to e.g. pass the settings file through jsmin or similar.)
+    return named_settings(base_name)
 
 
 @print_call_info
@@ -327,14 +370,28 @@ def window_active_sheet(window_id):
 @print_call_info
 def window_active_view(window_id):
     """ Returns view_id specifying the active view for the given window. """
-    return 1
+    return get_window(window_id).active_view_id
 
 
 @print_call_info
 def window_run_command(window_id, cmd, args):
-    print("Running Window Command {cmd} with args {args} in window with id {window_id}".format(
-        window_id=window_id, cmd=cmd, args=args
-    ))
+    result = commands.run_window_command(window_id, get_window(window_id).active_view_id, cmd, args)
+    if result == commands.DISABLED:
+        print("Window Command {cmd} is disabled for args {args} in window with id {window_id}".format(
+            window_id=window_id, cmd=cmd, args=args
+        ))
+    elif result != commands.NOT_FOUND:
+        return
+    elif cmd == "close_window":
+        mock_windows.close_window(window_id)
+    elif cmd == "show_overlay" and (args or {}).get("overlay") == "command_palette":
+        get_window(window_id).show_command_palette()
+    elif cmd == "hide_overlay":
+        get_window(window_id).hide_overlay()
+    else:
+        print("No Window Command {cmd} to run with args {args} in window with id {window_id}".format(
+            window_id=window_id, cmd=cmd, args=args
+        ))
 
 
 @print_call_info
@@ -346,20 +403,20 @@ def window_new_file(window_id, flags, syntax):
 
 @print_call_info
 def window_open_file(window_id, fname, flags, group):
-    print("Opening file {fname} with flags {flags} in group {group} in window with id {window_id}".format(
-        window_id=window_id, flags=flags, group=group, fname=fname
-    ))
+    return views.open_file(window_id, fname).view_id
 
 
 @print_call_info
 def window_find_open_file(window_id, fname):
-    """ Return view_id for open file `fname`. """
-    return 1
+    """ Return view_id for open file `fname`, or 0 if it isn't open. """
+    view = views.find_open_file(window_id, fname)
+    return view.view_id if view is not None else 0
 
 
 @print_call_info
 def window_close_file(window_id, view_id):
-    pass
+    mock_windows.close_view(view_id)
+    return True
 
 
 @print_call_info
@@ -409,7 +466,7 @@ def window_sheets(window_id):
 
 @print_call_info
 def window_views(window_id):
-    return 1
+    return [view.view_id for view in get_window(window_id).views()]
 
 
 @print_call_info
@@ -486,7 +543,13 @@ def window_show_input_panel(window_id, caption, initial_text, on_done, on_change
 def window_show_quick_panel(
         window_id, flat_items, items_per_row, on_select, on_highlight,
         flags, selected_index):
-    return 1
+    window = get_window(window_id)
+    if window.quick_panel is not None:
+        window.quick_panel.cancel()
+    rows = quick_panel.rows_from_flat_items(flat_items, items_per_row)
+    window.quick_panel = quick_panel.QuickPanel(rows, on_select, on_highlight, flags, selected_index)
+    if on_highlight is not None and rows:
+        on_highlight(window.quick_panel.highlighted)
 
 
 @print_call_info
@@ -521,22 +584,23 @@ def set_status_bar_visible(flag):
 
 @print_call_info
 def window_folders(window_id):
-    return []
+    return list(get_window(window_id).folders)
 
 
 @print_call_info
 def window_project_file_name(window_id):
-    return 1
+    return get_window(window_id).project.file_name or None
 
 
 @print_call_info
 def window_get_project_data(window_id):
-    return 1
+    project = get_window(window_id).project
+    return json.loads(json.dumps(project.data)) if project.file_name or project.data else None
 
 
 @print_call_info
 def window_set_project_data(window_id, v):
-    return 1
+    get_window(window_id).set_project_data(json.loads(json.dumps(v)))
 
 
 @print_call_info
@@ -551,22 +615,22 @@ def window_template_settings(window_id):
 
 @print_call_info
 def window_lookup_symbol(window_id, sym):
-    return 1
+    return symbol_index.lookup(get_window(window_id).project.trees(), sym)
 
 
 @print_call_info
 def window_lookup_symbol_in_open_files(window_id, sym):
-    return 1
+    return symbol_index.lookup_in_views(get_window(window_id).views(), sym)
 
 
 @print_call_info
 def window_lookup_references(window_id, sym):
-    return 1
+    return symbol_index.lookup(get_window(window_id).project.trees(), sym, references=True)
 
 
 @print_call_info
 def window_lookup_references_in_open_files(window_id, sym):
-    return 1
+    return symbol_index.lookup_in_views(get_window(window_id).views(), sym, references=True)
 
 
 @print_call_info
@@ -591,17 +655,20 @@ def sheet_view(sheet_id):
 
 @print_call_info
 def view_selection_size(view_id):
-    return 1
+    return len(get_view(view_id).selection)
 
 
 @print_call_info
 def view_selection_get(view_id, index):
-    return 1
+    r = get_view(view_id).selection.get(index)
+    if r is None:
+        return _region(-1, -1)
+    return _region(*r)
 
 
 @print_call_info
 def view_selection_erase(view_id, index):
-    return 1
+    get_view(view_id).selection.erase(index)
 
 
 @print_call_info
@@ -611,27 +678,33 @@ def view_buffer_id(view_id):
 
 @print_call_info
 def view_selection_clear(view_id):
-    return 1
+    get_view(view_id).selection.clear()
 
 
 @print_call_info
 def view_selection_add_region(view_id, a, b, pos):
-    return 1
+    get_view(view_id).selection.add(a, b, pos)
 
 
 @print_call_info
 def view_selection_add_point(view_id, x):
-    return 1
+    get_view(view_id).selection.add(x, x)
 
 
 @print_call_info
 def view_selection_subtract_region(view_id, a, b):
-    return 1
+    get_view(view_id).selection.subtract(a, b)
 
 
 @print_call_info
 def view_selection_contains(view_id, a, b):
-    return 1
+    return get_view(view_id).selection.contains(a, b)
+
+
+@print_call_info
+def view_selection_region_list(view_id):
+    """ The selection as a RegionList. Not part of the original sublime_api. """
+    return _region_list(*get_view(view_id).selection.pairs())
 
 
 @print_call_info
@@ -641,17 +714,17 @@ def view_is_primary(view_id):
 
 @print_call_info
 def view_window(view_id):
-    return 1
+    return get_view(view_id).window_id
 
 
 @print_call_info
 def view_file_name(view_id):
-    return 1
+    return get_view(view_id).file_name or ""
 
 
 @print_call_info
 def view_retarget(view_id, new_fname):
-    return 1
+    get_view(view_id).file_name = os.path.abspath(new_fname)
 
 
 @print_call_info
@@ -726,132 +799,153 @@ def view_set_line_endings(view_id, line_ending_name):
 
 @print_call_info
 def view_size(view_id):
-    return 1
+    return len(get_view(view_id).buffer)
 
 
 @print_call_info
 def view_begin_edit(view_id, edit_token, cmd, args):
-    return 1
+    commands.begin_edit(view_id, edit_token)
 
 
 @print_call_info
 def view_end_edit(view_id, edit_token):
-    return 1
+    commands.end_edit(view_id, edit_token)
 
 
 @print_call_info
 def view_is_in_edit(view_id):
-    return 0
+    return commands.is_in_edit(view_id)
 
 
 @print_call_info
 def view_insert(view_id, edit_token, pt, text):
-    return 1
+    commands.check_edit(view_id, edit_token)
+    return get_view(view_id).buffer.insert(pt, text)
 
 
 @print_call_info
 def view_erase(view_id, edit_token, r):
-    return 1
+    commands.check_edit(view_id, edit_token)
+    get_view(view_id).buffer.erase(r.a, r.b)
 
 
 @print_call_info
 def view_replace(view_id, edit_token, r, text):
-    return 1
+    commands.check_edit(view_id, edit_token)
+    get_view(view_id).buffer.replace(r.a, r.b, text)
 
 
 @print_call_info
 def view_change_count(view_id):
-    return 1
+    return get_view(view_id).buffer.change_count
 
 
 @print_call_info
 def view_run_command(view_id, cmd, args):
-    return 1
+    result = commands.run_text_command(view_id, cmd, args)
+    if result == commands.NOT_FOUND:
+        print("No Text Command {cmd} to run with args {args} in view with id {view_id}".format(
+            view_id=view_id, cmd=cmd, args=args
+        ))
+    elif result == commands.DISABLED:
+        print("Text Command {cmd} is disabled for args {args} in view with id {view_id}".format(
+            view_id=view_id, cmd=cmd, args=args
+        ))
 
 
 @print_call_info
 def view_cached_substr(view_id, a, b):
-    return 1
+    return get_view(view_id).buffer.substr(a, b)
 
 
 @print_call_info
 def view_find(view_id, pattern, start_pt, flags):
-    return 1
+    return _region(*find.find(get_view(view_id).buffer.text, pattern, start_pt, flags))
 
 
 @print_call_info
 def view_find_all(view_id, pattern, flags):
-    return 1
+    begins, ends = find.find_all(get_view(view_id).buffer.text, pattern, flags)
+    return [_region(a, b) for a, b in zip(begins, ends)]
+
+
+@print_call_info
+def view_find_all_region_list(view_id, pattern, flags):
+    """ Like view_find_all, but returns a RegionList. Not part of the original sublime_api. """
+    return _region_list(*find.find_all(get_view(view_id).buffer.text, pattern, flags))
 
 
 @print_call_info
 def view_find_all_with_contents(view_id, pattern, flags, fmt):
-    return 1
+    results = find.find_all_with_contents(get_view(view_id).buffer.text, pattern, flags, fmt)
+    return [(_region(a, b), contents) for (a, b), contents in results]
 
 
 @print_call_info
 def view_settings(view_id):
-    return 1
+    return get_view(view_id).settings_id
 
 
 @print_call_info
 def view_meta_info(view_id, key, pt):
-    return 1
+    return metadata.meta_info(key, get_view(view_id).scopes.scope_name(pt))
 
 
 @print_call_info
 def view_extract_tokens_with_scopes(view_id, begin, end):
-    return 1
+    return [(_region(a, b), name) for a, b, name in get_view(view_id).scopes.tokens(begin, end)]
 
 
 @print_call_info
 def view_extract_scope(view_id, pt):
-    return 1
+    return _region(*get_view(view_id).scopes.extract_scope(pt))
 
 
 @print_call_info
 def view_scope_name(view_id, pt):
-    return 1
+    return get_view(view_id).scopes.scope_name(pt)
 
 
 @print_call_info
 def view_match_selector(view_id, pt, selector):
-    return 1
+    return view_score_selector(view_id, pt, selector) > 0
 
 
 @print_call_info
 def view_score_selector(view_id, pt, selector):
-    return 1
+    return scope_selector.score_selector(get_view(view_id).scopes.scope_name(pt), selector)
 
 
 @print_call_info
 def view_find_by_selector(view_id, selector):
-    return 1
+    return [_region(a, b) for a, b in get_view(view_id).scopes.find_by_selector(selector)]
 
 
 @print_call_info
 def view_style(view_id):
-    return 1
+    return get_view(view_id).color_scheme().style()
 
 
 @print_call_info
 def view_style_for_scope(view_id, scope):
-    return 1
+    return get_view(view_id).color_scheme().style_for_scope(scope)
 
 
 @print_call_info
 def view_indented_region(view_id, pt):
-    return 1
+    view = get_view(view_id)
+    return _region(*metadata.indented_region(view.buffer, pt, view.settings().get("tab_size", 4)))
 
 
 @print_call_info
 def view_indentation_level(view_id, pt):
-    return 1
+    view = get_view(view_id)
+    return metadata.indentation_level(view.buffer, pt, view.settings().get("tab_size", 4))
 
 
 @print_call_info
 def view_has_non_empty_selection_region(view_id):
-    return 1
+    return get_view(view_id).selection.has_non_empty_region()
 
 
 @print_call_info
@@ -886,37 +980,59 @@ def view_full_line_from_point(view_id, x):
 
 @print_call_info
 def view_word_from_region(view_id, x):
-    return 1
+    view = get_view(view_id)
+    return _region(*char_classes.word_from_region(view.buffer.text, x.a, x.b, view.word_separators()))
 
 
 @print_call_info
 def view_word_from_point(view_id, x):
-    return 1
+    view = get_view(view_id)
+    return _region(*char_classes.word_from_point(view.buffer.text, x, view.word_separators()))
 
 
 @print_call_info
 def view_classify(view_id, pt):
-    return 1
+    view = get_view(view_id)
+    return char_classes.classify(view.buffer.text, pt, view.word_separators())
 
 
 @print_call_info
 def view_find_by_class(view_id, pt, forward, classes, separators):
-    return 1
+    view = get_view(view_id)
+    return char_classes.find_by_class(
+        view.buffer.text, pt, forward, classes, view.word_separators(separators))
 
 
 @print_call_info
 def view_expand_by_class(view_id, pt, forward, classes, separators):
-    return 1
+    # Note: sublime.View.expand_by_class() passes the region's a and b as `pt` and `forward`.
+    view = get_view(view_id)
+    return _region(*char_classes.expand_by_class(
+        view.buffer.text, pt, forward, classes, view.word_separators(separators)))
 
 
 @print_call_info
 def view_row_col(view_id, tp):
-    return 1
+    return get_view(view_id).buffer.row_col(tp)
 
 
 @print_call_info
 def view_text_point(view_id, row, col):
-    return 1
+    return get_view(view_id).buffer.text_point(row, col)
+
+
+@print_call_info
+def view_row_cols(view_id, tps):
+    """ Batched version of view_row_col. Not part of the original sublime_api.
+    Returns an (n, 2) array if `tps` is a NumPy array, otherwise a list of (row, col) tuples.
+    """
+    return get_view(view_id).buffer.row_cols(tps)
+
+
+@print_call_info
+def view_text_points(view_id, row_cols):
+    """ Batched version of view_text_point. Not part of the original sublime_api. """
+    return get_view(view_id).buffer.text_points(row_cols)
 
 
 @print_call_info
@@ -996,87 +1112,122 @@ def view_em_width(view_id):
 
 @print_call_info
 def view_is_folded(view_id, sr):
-    return 1
+    return get_view(view_id).folds.is_folded(sr.a, sr.b)
 
 
 @print_call_info
 def view_folded_regions(view_id):
-    return 1
+    return [_region(a, b) for a, b in get_view(view_id).folds.folds()]
+
+
+@print_call_info
+def view_folded_region_list(view_id):
+    """ Like view_folded_regions, but returns a RegionList. Not part of the original sublime_api. """
+    folds = get_view(view_id).folds.folds()
+    return _region_list([f[0] for f in folds], [f[1] for f in folds])
 
 
 @print_call_info
 def view_fold_region(view_id, x):
-    return 1
+    return get_view(view_id).folds.fold([(x.a, x.b)])
 
 
 @print_call_info
 def view_fold_regions(view_id, x):
-    return 1
+    return get_view(view_id).folds.fold(_region_pairs(x))
 
 
 @print_call_info
 def view_unfold_region(view_id, x):
-    return 1
+    return [_region(a, b) for a, b in get_view(view_id).folds.unfold([(x.a, x.b)])]
 
 
 @print_call_info
 def view_unfold_regions(view_id, x):
-    return 1
+    return [_region(a, b) for a, b in get_view(view_id).folds.unfold(_region_pairs(x))]
 
 
 @print_call_info
 def view_add_regions(view_id, key, regions, scope, icon, flags):
-    return 1
+    get_view(view_id).regions.add(key, _region_pairs(regions), scope, icon, flags)
 
 
 @print_call_info
 def view_get_regions(view_id, key):
-    return 1
+    return [_region(a, b) for a, b in get_view(view_id).regions.get(key)]
+
+
+@print_call_info
+def view_get_region_list(view_id, key):
+    """ Like view_get_regions, but returns a RegionList. Not part of the original sublime_api. """
+    return _region_list(*get_view(view_id).regions.get_arrays(key))
 
 
 @print_call_info
 def view_erase_regions(view_id, key):
-    return 1
+    get_view(view_id).regions.erase(key)
 
 
 @print_call_info
 def view_add_phantom(view_id, key, region, content, layout, on_navigate):
-    return 1
+    return get_view(view_id).phantoms.add(key, region.a, region.b, content, layout, on_navigate)
 
 
 @print_call_info
 def view_erase_phantoms(view_id, key):
-    return 1
+    get_view(view_id).phantoms.erase_key(key)
 
 
 @print_call_info
 def view_erase_phantom(view_id, key):
-    return 1
+    # Note: `key` is the phantom id.
+    get_view(view_id).phantoms.erase(key)
 
 
 @print_call_info
 def view_query_phantoms(view_id, pids):
-    return 1
+    return [_region(-1) if r is None else _region(*r) for r in get_view(view_id).phantoms.query(pids)]
+
+
+@print_call_info
+def view_add_phantoms(view_id, key, phantoms):
+    """ Batched version of view_add_phantom, taking a list of
+    (region, content, layout, on_navigate) tuples. Returns a list of phantom ids.
+    Not part of the original sublime_api; used by PhantomSet.update.
+    """
+    store = get_view(view_id).phantoms
+    return [store.add(key, region.a, region.b, content, layout, on_navigate)
+            for region, content, layout, on_navigate in phantoms]
+
+
+@print_call_info
+def view_erase_phantoms_by_id(view_id, pids):
+    """ Batched version of view_erase_phantom. Not part of the original sublime_api. """
+    store = get_view(view_id).phantoms
+    for pid in pids:
+        store.erase(pid)
 
 
 @print_call_info
 def view_assign_syntax(view_id, syntax_file):
-    return 1
+    if syntax_file.startswith("scope:"):
+        syntax_file = syntax.syntax_for_scope(syntax_file[6:]) or syntax_file
+    get_settings(get_view(view_id).settings_id).set("syntax", syntax_file)
 
 
 @print_call_info
 def view_symbols(view_id):
-    return 1
+    return [(_region(a, b), name) for a, b, name in get_view(view_id).symbols.symbols(symbol_store.SYMBOLS)]
 
 
 @print_call_info
 def view_indexed_symbols(view_id):
-    return 1
+    return [(_region(a, b), name) for a, b, name in get_view(view_id).symbols.symbols(symbol_store.INDEXED_SYMBOLS)]
 
 
 @print_call_info
 def view_indexed_references(view_id):
-    return 1
+    return [(_region(a, b), name) for a, b, name in get_view(view_id).symbols.symbols(symbol_store.INDEXED_REFERENCES)]
 
 
 @print_call_info
@@ -1096,7 +1247,7 @@ def view_erase_status(view_id, key):
 
 @print_call_info
 def view_extract_completions(view_id, prefix, tp):
-    return 1
+    return get_view(view_id).words.completions(prefix, tp)
 
 
 @print_call_info
@@ -1158,37 +1309,37 @@ def view_is_auto_complete_visible(view_id):
 
 @print_call_info
 def settings_get_default(settings_id, key, default):
-    return default
+    return get_settings(settings_id).values.get(key, default)
 
 
 @print_call_info
 def settings_get(settings_id, key):
-    return 1
+    return get_settings(settings_id).values.get(key)
 
 
 @print_call_info
 def settings_has(settings_id, key):
-    return 1
+    return key in get_settings(settings_id).values
 
 
 @print_call_info
 def settings_set(settings_id, key, value):
-    return 1
+    get_settings(settings_id).set(key, value)
 
 
 @print_call_info
 def settings_erase(settings_id, key):
-    return 1
+    get_settings(settings_id).erase(key)
 
 
 @print_call_info
 def settings_add_on_change(settings_id, tag, callback):
-    return 1
+    get_settings(settings_id).on_change[tag] = callback
 
 
 @print_call_info
 def settings_clear_on_change(settings_id, tag):
-    return 1
+    get_settings(settings_id).on_change.pop(tag, None)
 
 
 @print_call_info
@@ -1227,13 +1378,15 @@ def plugin_host_ready(**args):
 
 
 @print_call_info
-def profile_syntax_definition(**args):
-    return 0
+def profile_syntax_definition(path, syntax_name=None):
+    """ Returns the profile of tokenizing `path` as JSON-compatible data, or None. """
+    profile = syntax_profile.profile_syntax_definition(path, syntax_name)
+    return profile.to_json() if profile is not None else None
 
 
 @print_call_info
-def run_syntax_test(**args):
-    return 0
+def run_syntax_test(path):
+    return syntax_tests.run_syntax_test(path)
 
 
 @print_call_info
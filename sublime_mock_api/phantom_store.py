@@ -0,0 +1,136 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Per-view storage for phantoms.
+
+The phantom regions are tracked across buffer edits with a `PointTracker`.
+Phantoms that are added between two edits are kept in a pending list with their absolute
+positions, and are merged into the tracker (in one rebuild) right before the next edit.
+This way, adding thousands of phantoms one by one and then editing the buffer
+costs a single O(n log n) rebuild instead of one per phantom.
+Erased phantoms are left in the tracker (their points just move along) until they
+make up more than half of it, so erasing phantoms one at a time doesn't rebuild the
+tracker on every edit either.
+
+Like in Sublime Text, a non-empty phantom is deleted when all of its text is erased;
+querying a deleted (or erased) phantom gives `None` (Region(-1) in the API).
+
+"""
+
+from .tracking import PointTracker
+
+
+class _Phantom(object):
+    __slots__ = ['key', 'content', 'layout', 'on_navigate', 'nonempty', 'index', 'region']
+
+    def __init__(self, key, a, b, content, layout, on_navigate):
+        self.key = key
+        self.content = content
+        self.layout = layout
+        self.on_navigate = on_navigate
+        self.nonempty = a != b
+        self.index = -1     # Pair index in the tracker, or -1 while pending.
+        self.region = (a, b) if a <= b else (b, a)
+
+
+class PhantomStore(object):
+
+    # Above this many ids, query() materializes all tracked positions in one pass
+    # rather than doing a tree lookup per id.
+    BULK_QUERY_SIZE = 32
+
+    def __init__(self):
+        self.phantoms = {}
+        self.by_key = {}
+        self.pending = []
+        self.tracker = PointTracker([])
+        self.dead = 0       # Number of erased phantoms still in the tracker
+        self.next_id = 1
+
+    def __len__(self):
+        return len(self.phantoms)
+
+    def add(self, key, a, b, content, layout, on_navigate=None):
+        pid = self.next_id
+        self.next_id += 1
+        phantom = _Phantom(key, a, b, content, layout, on_navigate)
+        self.phantoms[pid] = phantom
+        self.by_key.setdefault(key, set()).add(pid)
+        self.pending.append(pid)
+        return pid
+
+    def erase(self, pid):
+        phantom = self.phantoms.pop(pid, None)
+        if phantom is None:
+            return
+        if phantom.index >= 0:
+            self.dead += 1
+        pids = self.by_key[phantom.key]
+        pids.discard(pid)
+        if not pids:
+            del self.by_key[phantom.key]
+
+    def erase_key(self, key):
+        for pid in self.by_key.pop(key, ()):
+            if self.phantoms.pop(pid).index >= 0:
+                self.dead += 1
+
+    def query(self, pids):
+        """ Current (begin, end) of each phantom in `pids`, or None if it has been deleted. """
+        phantoms = self.phantoms
+        positions = None
+        if len(pids) > self.BULK_QUERY_SIZE:
+            positions = self.tracker.positions()
+        result = []
+        for pid in pids:
+            phantom = phantoms.get(pid)
+            if phantom is None:
+                result.append(None)
+                continue
+            if phantom.index < 0:
+                result.append(phantom.region)
+                continue
+            i = 2 * phantom.index
+            if positions is not None:
+                begin, end = positions[i], positions[i + 1]
+            else:
+                begin, end = self.tracker.position(i), self.tracker.position(i + 1)
+            if phantom.nonempty and end <= begin:
+                # All of the phantom's text has been erased.
+                self.erase(pid)
+                result.append(None)
+            else:
+                result.append((begin, end))
+        return result
+
+    def _flush(self):
+        """ Merge pending phantoms into the tracker, dropping erased ones once there are many. """
+        if not self.pending and 4 * self.dead <= len(self.tracker):
+            return
+        pids = list(self.phantoms)
+        regions = self.query(pids)
+        points = []
+        sticky = []
+        index = 0
+        for pid, region in zip(pids, regions):
+            if region is None:
+                continue
+            phantom = self.phantoms[pid]
+            phantom.index = index
+            index += 1
+            points.append(region[0])
+            points.append(region[1])
+            sticky.append(False)
+            sticky.append(phantom.nonempty)
+        self.tracker = PointTracker(points, sticky)
+        self.pending = []
+        self.dead = 0
+
+    def on_insert(self, pt, length):
+        self._flush()
+        self.tracker.on_insert(pt, length)
+
+    def on_erase(self, a, b):
+        self._flush()
+        self.tracker.on_erase(a, b)
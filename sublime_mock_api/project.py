@@ -0,0 +1,169 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Projects (.sublime-project files) and the folder tree index of the project folders,
+for `window.folders()`, `window.project_data()` and the project symbol index.
+
+A `FolderTree` lists the files of a project folder, leaving out the folders and files
+matching the `folder_exclude_patterns` and `file_exclude_patterns` of the Preferences
+and of the project folder. The listing of each directory is cached together with the
+directory's modification time, so refreshing the tree only stats each directory, and
+only lists the directories that changed (a directory's mtime changes when entries are
+added to, removed from or renamed in it). The trees are cached per folder and patterns.
+
+"""
+
+import os
+from fnmatch import fnmatchcase
+
+from . import resources
+from .settings_store import get_settings, named_settings
+
+# Defaults of the Sublime Text Preferences:
+DEFAULT_FOLDER_EXCLUDE_PATTERNS = [".svn", ".git", ".hg", "CVS", ".Trash", ".Trash-*"]
+DEFAULT_FILE_EXCLUDE_PATTERNS = [
+    "*.pyc", "*.pyo", "*.exe", "*.dll", "*.obj", "*.o", "*.a", "*.lib", "*.so", "*.dylib",
+    "*.ncb", "*.sdf", "*.suo", "*.pdb", "*.idb", ".DS_Store", ".directory", "desktop.ini",
+    "*.class", "*.psd", "*.db", "*.sublime-workspace",
+]
+
+
+def load_project(path):
+    """ The project data of the .sublime-project file `path`, or None if it can't be read. """
+    try:
+        with open(path, encoding="utf-8") as fp:
+            text = fp.read()
+    except OSError:
+        return None
+    try:
+        data = resources.decode_json(text)
+    except ValueError as exc:
+        print("Error parsing {}: {}".format(path, exc))
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _matches(name, rel_path, patterns):
+    return any(fnmatchcase(name, p) or fnmatchcase(rel_path, p) for p in patterns)
+
+
+class FolderTree(object):
+
+    def __init__(self, path, folder_exclude_patterns=(), file_exclude_patterns=()):
+        self.path = os.path.abspath(path)
+        self.folder_exclude_patterns = tuple(folder_exclude_patterns)
+        self.file_exclude_patterns = tuple(file_exclude_patterns)
+        self._dirs = {}         # relative dir path -> (mtime_ns, subdir names, file names)
+        self._files = None      # Sorted relative paths of all files, or None if a directory changed
+
+    def _list_dir(self, rel):
+        subdirs = []
+        files = []
+        try:
+            entries = list(os.scandir(os.path.join(self.path, rel)))
+        except OSError:
+            return subdirs, files
+        for entry in entries:
+            rel_path = rel + "/" + entry.name if rel else entry.name
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                continue
+            if is_dir:
+                if not _matches(entry.name, rel_path, self.folder_exclude_patterns):
+                    subdirs.append(entry.name)
+            elif not _matches(entry.name, rel_path, self.file_exclude_patterns):
+                files.append(entry.name)
+        subdirs.sort()
+        files.sort()
+        return subdirs, files
+
+    def refresh(self):
+        """ Re-list the directories whose mtime changed, and forget the deleted ones. Returns True if anything changed. """
+        changed = False
+        seen = set()
+        stack = [""]
+        while stack:
+            rel = stack.pop()
+            seen.add(rel)
+            try:
+                mtime = os.stat(os.path.join(self.path, rel)).st_mtime_ns
+            except OSError:
+                mtime = None
+            cached = self._dirs.get(rel)
+            if cached is None or cached[0] != mtime:
+                subdirs, files = self._list_dir(rel) if mtime is not None else ([], [])
+                self._dirs[rel] = cached = (mtime, subdirs, files)
+                changed = True
+            stack.extend(rel + "/" + d if rel else d for d in reversed(cached[1]))
+        if len(seen) != len(self._dirs):
+            for rel in [rel for rel in self._dirs if rel not in seen]:
+                del self._dirs[rel]
+            changed = True
+        if changed:
+            self._files = None
+        return changed
+
+    def files(self):
+        """ Sorted paths (relative to the folder, with "/" separators) of the files in the tree. """
+        if not self._dirs:
+            self.refresh()
+        if self._files is None:
+            files = []
+            for rel, (_, _, names) in self._dirs.items():
+                files.extend(rel + "/" + name if rel else name for name in names)
+            files.sort()
+            self._files = files
+        return self._files
+
+    def folders(self):
+        """ Sorted paths (relative to the folder) of the directories in the tree, including "" for the folder itself. """
+        if not self._dirs:
+            self.refresh()
+        return sorted(self._dirs)
+
+
+_trees = {}
+
+
+def folder_tree(path, folder_exclude_patterns=(), file_exclude_patterns=()):
+    """ The cached FolderTree for the folder and exclude patterns. """
+    key = (os.path.abspath(path), tuple(folder_exclude_patterns), tuple(file_exclude_patterns))
+    tree = _trees.get(key)
+    if tree is None:
+        tree = _trees[key] = FolderTree(*key)
+    return tree
+
+
+def _global_patterns(key, default):
+    value = get_settings(named_settings("Preferences.sublime-settings")).values.get(key)
+    return list(value) if isinstance(value, list) else default
+
+
+class Project(object):
+    """ The project data of a window, with the folder paths resolved. """
+
+    def __init__(self, data=None, file_name=""):
+        self.data = data if isinstance(data, dict) else {}
+        self.file_name = file_name
+        base = os.path.dirname(file_name) if file_name else os.getcwd()
+        self.folders = []       # (absolute path, folder settings)
+        for folder in self.data.get("folders") or ():
+            if isinstance(folder, dict) and isinstance(folder.get("path"), str):
+                path = os.path.expanduser(folder["path"])
+                self.folders.append((os.path.abspath(os.path.join(base, path)), folder))
+
+    def folder_paths(self):
+        return [path for path, _ in self.folders]
+
+    def trees(self):
+        """ The FolderTree of each project folder. Call `refresh()` on a tree to pick up changes on disk. """
+        folder_excludes = _global_patterns("folder_exclude_patterns", DEFAULT_FOLDER_EXCLUDE_PATTERNS)
+        file_excludes = _global_patterns("file_exclude_patterns", DEFAULT_FILE_EXCLUDE_PATTERNS)
+        trees = []
+        for path, folder in self.folders:
+            tree = folder_tree(path, folder_excludes + list(folder.get("folder_exclude_patterns") or ()),
+                               file_excludes + list(folder.get("file_exclude_patterns") or ()))
+            trees.append(tree)
+        return trees
@@ -0,0 +1,210 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Headless quick panel, for `window.show_quick_panel()`, with a fuzzy matcher like Sublime Text's.
+
+A query matches an item if the characters of the query appear in the item's first row,
+in order, ignoring case. Matches are ranked by a score that rewards matching at the start
+of the item and of words (after a separator or at a camelCase hump), and consecutive
+characters, and that penalizes gaps; ties go to the shorter, then the earlier item.
+
+The lowercased keys of the items are computed once, when the panel is shown. The matching
+candidates of the previous query are kept, so a query that extends the previous one
+(i.e. the user typed another character) only has to filter those. Subsequence matching
+is a linear scan with `str.find`, and only the matching items are scored.
+
+Plugins' panels are driven from tests with the MockWindow's `quick_panel`:
+
+    window.show_quick_panel(items, on_select)
+    panel = get_window(window.id()).quick_panel
+    panel.query("foba")           # -> indices of the matching items, best first
+    panel.select()                # Calls on_select with the index of the highlighted (best) match
+
+Query throughput can be measured from the command line:
+
+    python -m sublime_mock_api.quick_panel [--items 100000 | --file items.txt] [query ...]
+
+"""
+
+import sys
+from time import perf_counter
+
+_SEPARATORS = frozenset(" _-./\\:,;()[]{}<>'\"")
+_MAX_SCORED_GAP = 50
+
+
+def is_subsequence(query, key):
+    """ True if the characters of `query` appear in `key`, in order. """
+    pos = -1
+    find = key.find
+    for c in query:
+        pos = find(c, pos + 1)
+        if pos < 0:
+            return False
+    return True
+
+
+def score(query, key, text):
+    """ Score of the lowercase `query` against the lowercase `key` of `text`, or 0 if it doesn't match. """
+    if not query:
+        return 1
+    start = key.find(query)
+    if start >= 0:
+        # The query is a substring: the best case, especially at a word start.
+        return 1000 + 20 * len(query) + (100 if _word_start(text, start) else 0) - min(start, _MAX_SCORED_GAP)
+    total = 0
+    pos = -1
+    find = key.find
+    for c in query:
+        p = find(c, pos + 1)
+        if p < 0:
+            return 0
+        # Prefer a later occurrence at a word start over this one, if there is one close by.
+        if p != pos + 1 and not _word_start(text, p):
+            q = p
+            while True:
+                q = find(c, q + 1)
+                if q < 0 or q - p > _MAX_SCORED_GAP:
+                    break
+                if _word_start(text, q):
+                    p = q
+                    break
+        if p == pos + 1:
+            total += 15 if pos >= 0 else 30
+        elif _word_start(text, p):
+            total += 10
+        else:
+            total -= min(p - pos - 1, _MAX_SCORED_GAP) // 4
+        pos = p
+    return max(total + 100, 1)
+
+
+def _word_start(text, p):
+    if p == 0:
+        return True
+    prev = text[p - 1]
+    if prev in _SEPARATORS:
+        return True
+    return text[p].isupper() and not prev.isupper()
+
+
+class QuickPanel(object):
+
+    def __init__(self, rows, on_select=None, on_highlight=None, flags=0, selected_index=-1):
+        """ `rows` is a list of items, each a list of strings (the first string is matched). """
+        self.rows = rows
+        texts = [row[0] if row else "" for row in rows]
+        self.keys = [text.lower() for text in texts]
+        # The original case is used to find camelCase humps, unless lowercasing changed the length.
+        self.texts = [t if len(t) == len(k) else k for t, k in zip(texts, self.keys)]
+        self.on_select = on_select
+        self.on_highlight = on_highlight
+        self.flags = flags
+        self.selected_index = selected_index
+        self.closed = False
+        self.results = list(range(len(rows)))
+        # Position in the results of the highlighted item: the selected_index until a query is typed.
+        self.highlighted = selected_index if 0 <= selected_index < len(rows) else 0
+        self._query = ""
+        self._candidates = self.results     # Indices of the items matching self._query, in item order
+
+    def candidates(self, query):
+        """ Indices of the items matching the lowercase `query`, in item order. """
+        if query.startswith(self._query):
+            pool = self._candidates
+        else:
+            pool = range(len(self.keys))
+        if query == self._query:
+            return pool
+        keys = self.keys
+        candidates = [i for i in pool if is_subsequence(query, keys[i])]
+        self._query = query
+        self._candidates = candidates
+        return candidates
+
+    def filter(self, query):
+        """ Indices of the items matching `query`, best match first. """
+        query = query.lower()
+        candidates = self.candidates(query)
+        if not query:
+            return list(candidates)
+        keys = self.keys
+        texts = self.texts
+        ranked = sorted((-score(query, keys[i], texts[i]), len(keys[i]), i) for i in candidates)
+        return [i for _, _, i in ranked]
+
+    def query(self, text):
+        """ Type `text` in the panel, highlighting the best match. Returns the ranked item indices. """
+        self.results = self.filter(text)
+        self.highlighted = 0
+        if self.on_highlight is not None:
+            self.on_highlight(self.results[0] if self.results else -1)
+        return self.results
+
+    def select(self, position=None):
+        """ Select the item at `position` in the current results (by default the highlighted item;
+        none, if out of range), closing the panel.
+        """
+        if position is None:
+            position = self.highlighted
+        index = self.results[position] if 0 <= position < len(self.results) else -1
+        self._close(index)
+        return index
+
+    def cancel(self):
+        self._close(-1)
+
+    def _close(self, index):
+        if self.closed:
+            return
+        self.closed = True
+        if self.on_select is not None:
+            self.on_select(index)
+
+
+def rows_from_flat_items(flat_items, items_per_row):
+    """ The rows of the flat item list passed to `window_show_quick_panel()`. """
+    n = max(items_per_row, 1)
+    return [flat_items[i:i + n] for i in range(0, len(flat_items), n)]
+
+
+def benchmark(items, queries):
+    """ Seconds taken by each query in `queries`, typed one character at a time, over `items`. """
+    results = []
+    for query in queries:
+        panel = QuickPanel([[item] for item in items])
+        start = perf_counter()
+        for i in range(1, len(query) + 1):
+            panel.filter(query[:i])
+        results.append((query, perf_counter() - start))
+    return results
+
+
+def main(argv=None):
+    import argparse
+    import random
+    parser = argparse.ArgumentParser(description="Measure the quick panel fuzzy matcher's query throughput.")
+    parser.add_argument("--items", type=int, default=100000, help="Number of generated file paths.")
+    parser.add_argument("--file", help="Use the lines of this file as the items instead.")
+    parser.add_argument("queries", nargs="*", default=["a", "src", "vwmod", "controllers/user"])
+    args = parser.parse_args(argv)
+    if args.file:
+        with open(args.file, encoding="utf-8") as fp:
+            items = fp.read().splitlines()
+    else:
+        rnd = random.Random(0)
+        words = ["src", "lib", "test", "view", "model", "controllers", "user", "panel", "index",
+                 "utils", "core", "api", "widget", "Quick", "Panel", "main", "config", "data"]
+        items = ["/".join(rnd.choice(words) for _ in range(rnd.randint(2, 5))) + rnd.choice([".py", ".js", ".md"])
+                 for _ in range(args.items)]
+    print("{} items".format(len(items)))
+    for query, seconds in benchmark(items, args.queries):
+        keystrokes = len(query)
+        print("{:>20}: {:8.1f} ms for {} keystrokes, {:8.1f} ms per keystroke".format(
+            query, 1000 * seconds, keystrokes, 1000 * seconds / max(keystrokes, 1)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
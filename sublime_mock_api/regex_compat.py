@@ -0,0 +1,215 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Translation of the Oniguruma regexes used in syntax definitions to Python `re` syntax.
+
+Sublime Text matches syntax patterns with Oniguruma (or its own engine), which accepts
+a few constructs that Python's `re` module does not. `translate()` rewrites the common ones:
+
+* `\\h`, `\\H` (hex digits), `\\z`, `\\Z`, `\\x{HHHH}`, `\\e`, and POSIX bracket classes like `[[:alpha:]]`.
+* Named groups `(?<name>...)` and `\\k<name>`, which become numbered groups.
+* Inline flags in the middle of a pattern, e.g. `a(?i)b`, which become scoped flag groups.
+    Oniguruma's `m` flag means "dot matches newline", i.e. Python's `s` flag.
+* `\\G` is dropped, since all searches start at the current position anyway.
+
+It also renumbers backreferences, so a pattern can be embedded in a larger regex
+(after `offset` capture groups), and can substitute backreferences with literal text
+(for patterns referring to the captures of the match that pushed the context).
+
+Anything else that `re` can't compile (e.g. `\\p{...}`) is left as is, and fails to compile.
+
+"""
+
+import re
+
+_POSIX_CLASSES = {
+    "alpha": "a-zA-Z",
+    "digit": "0-9",
+    "alnum": "a-zA-Z0-9",
+    "upper": "A-Z",
+    "lower": "a-z",
+    "xdigit": "0-9a-fA-F",
+    "space": r"\s",
+    "blank": r" \t",
+    "word": r"\w",
+    "punct": r"!-/:-@\[-`{-~",
+    "cntrl": r"\x00-\x1f\x7f",
+    "print": r"\x20-\x7e",
+    "graph": r"\x21-\x7e",
+}
+
+_SIMPLE_ESCAPES = {
+    "h": "[0-9a-fA-F]",
+    "H": "[^0-9a-fA-F]",
+    "z": r"\Z",
+    "Z": r"(?=\n?\Z)",
+    "G": "",
+    "e": r"\x1b",
+}
+
+_CLASS_ESCAPES = {
+    "h": "0-9a-fA-F",
+    "e": r"\x1b",
+}
+
+_INLINE_FLAGS = re.compile(r"\(\?([imsx]*)(?:-([imsx]*))?\)")
+_SCOPED_FLAGS = re.compile(r"\(\?([imsx]*(?:-[imsx]*)?):")
+_FLAG_MAP = str.maketrans({"m": "s"})
+
+
+def translate(pattern, offset=0, backrefs=None):
+    """ Translate `pattern` to Python syntax.
+
+    Args:
+        pattern: The Oniguruma pattern.
+        offset: Number of capture groups preceding the pattern in the final regex.
+        backrefs: If not None, a tuple of strings to substitute for backreferences \\1, \\2, ...
+
+    Returns:
+        (translated pattern, number of capture groups in the pattern)
+    """
+    out = []
+    names = {}
+    ngroups = 0
+    # One entry per open group: number of scoped flag groups opened within it, and x mode.
+    groups = [[0, False]]
+    i = 0
+    n = len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "\\" and i + 1 < n:
+            d = pattern[i + 1]
+            if d.isdigit() and d != "0":
+                j = i + 1
+                while j < n and pattern[j].isdigit():
+                    j += 1
+                num = int(pattern[i + 1:j])
+                if backrefs is not None:
+                    out.append(re.escape(backrefs[num - 1] if num <= len(backrefs) else ""))
+                else:
+                    out.append("(?:\\" + str(num + offset) + ")")
+                i = j
+            elif d == "k" and pattern.startswith("<", i + 2):
+                j = pattern.find(">", i)
+                name = pattern[i + 3:j]
+                out.append("(?:\\" + str(names.get(name, 0) + offset) + ")")
+                i = j + 1
+            elif d == "x" and pattern.startswith("{", i + 2):
+                j = pattern.find("}", i)
+                out.append("\\U" + pattern[i + 3:j].rjust(8, "0"))
+                i = j + 1
+            elif d in _SIMPLE_ESCAPES:
+                out.append(_SIMPLE_ESCAPES[d])
+                i += 2
+            else:
+                out.append(pattern[i:i + 2])
+                i += 2
+        elif c == "[":
+            i = _translate_class(pattern, i, out)
+        elif c == "(":
+            m = _INLINE_FLAGS.match(pattern, i)
+            if m:
+                on = m.group(1).translate(_FLAG_MAP)
+                off = (m.group(2) or "").translate(_FLAG_MAP)
+                if "x" in on:
+                    groups[-1][1] = True
+                elif "x" in off:
+                    groups[-1][1] = False
+                out.append("(?" + on + ("-" + off if off else "") + ":")
+                groups[-1][0] += 1
+                i = m.end()
+                continue
+            m = _SCOPED_FLAGS.match(pattern, i)
+            if m:
+                out.append("(?" + m.group(1).translate(_FLAG_MAP) + ":")
+                i = m.end()
+                groups.append([0, groups[-1][1] or "x" in m.group(1).split("-")[0]])
+                continue
+            if pattern.startswith("(?<", i) and not pattern.startswith(("(?<=", "(?<!"), i):
+                j = pattern.find(">", i)
+                ngroups += 1
+                names[pattern[i + 3:j]] = ngroups
+                out.append("(")
+                i = j + 1
+            else:
+                if not pattern.startswith("(?", i):
+                    ngroups += 1
+                elif pattern.startswith("(?#", i):
+                    # A comment; copy it verbatim, including any parentheses.
+                    j = pattern.find(")", i)
+                    j = n if j < 0 else j + 1
+                    out.append(pattern[i:j])
+                    i = j
+                    continue
+                out.append("(")
+                i += 1
+            groups.append([0, groups[-1][1]])
+        elif c == ")":
+            if len(groups) > 1:
+                scoped = groups.pop()[0]
+                out.append(")" * scoped)
+            out.append(")")
+            i += 1
+        elif c == "#" and groups[-1][1]:
+            # Comment in extended mode; skip to the end of the line.
+            j = pattern.find("\n", i)
+            i = n if j < 0 else j
+        else:
+            out.append(c)
+            i += 1
+    while groups:
+        out.append(")" * groups.pop()[0])
+    return "".join(out), ngroups
+
+
+def _translate_class(pattern, i, out):
+    """ Translate the character class starting at pattern[i], returning the index after it. """
+    n = len(pattern)
+    parts = ["["]
+    j = i + 1
+    if j < n and pattern[j] == "^":
+        parts.append("^")
+        j += 1
+    if j < n and pattern[j] == "]":
+        parts.append(r"\]")
+        j += 1
+    while j < n and pattern[j] != "]":
+        c = pattern[j]
+        if c == "\\" and j + 1 < n:
+            d = pattern[j + 1]
+            if d in _CLASS_ESCAPES:
+                parts.append(_CLASS_ESCAPES[d])
+                j += 2
+            elif d == "x" and pattern.startswith("{", j + 2):
+                k = pattern.find("}", j)
+                parts.append("\\U" + pattern[j + 3:k].rjust(8, "0"))
+                j = k + 1
+            else:
+                parts.append(pattern[j:j + 2])
+                j += 2
+        elif c == "[":
+            m = re.match(r"\[:(\^?)(\w+):\]", pattern[j:])
+            if m and m.group(2) in _POSIX_CLASSES and not m.group(1):
+                parts.append(_POSIX_CLASSES[m.group(2)])
+                j += m.end()
+            elif pattern.startswith("[", j) and j + 1 < n and pattern[j + 1] != ":":
+                # Nested class (union); flatten it into this one.
+                k = j + 1
+                while k < n and pattern[k] != "]":
+                    k += 2 if pattern[k] == "\\" else 1
+                parts.append(pattern[j + 1:k])
+                j = k + 1
+            else:
+                parts.append(r"\[")
+                j += 1
+        elif c in "&|~-" and pattern.startswith(c * 2, j):
+            # Python warns about possible set operations; escape the repeated character.
+            parts.append("\\" + c)
+            j += 1
+        else:
+            parts.append(c)
+            j += 1
+    parts.append("]")
+    out.append("".join(parts))
+    return j + 1
@@ -0,0 +1,85 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Per-view storage for the regions added with `view.add_regions()`.
+
+Each key holds a `RegionSet`, whose region end points are kept in a `PointTracker`,
+so the regions move along with edits to the buffer the way they do in Sublime Text:
+
+* Text inserted at the beginning of a region pushes the region to the right.
+* Text inserted at the end of a region is not included in the region.
+* Regions (or parts of regions) that are erased collapse onto the start of the erased text.
+
+The stored regions are only materialized when `get_regions()` is called.
+
+"""
+
+from .tracking import PointTracker
+
+
+class RegionSet(object):
+
+    def __init__(self, regions, scope="", icon="", flags=0):
+        """ `regions` is a list of (a, b) tuples. """
+        spans = sorted((a, b) if a <= b else (b, a) for a, b in regions)
+        points = []
+        sticky = []
+        for begin, end in spans:
+            points.append(begin)
+            points.append(end)
+            sticky.append(False)
+            sticky.append(begin != end)
+        self.tracker = PointTracker(points, sticky)
+        self.scope = scope
+        self.icon = icon
+        self.flags = flags
+
+    def __len__(self):
+        return len(self.tracker) // 2
+
+    def arrays(self):
+        """ Current regions, as sorted lists of begin and end points. """
+        pos = self.tracker.positions()
+        begins = pos[0::2]
+        # A region whose text was erased is empty; text inserted at that point afterwards
+        # pushes its begin point past its (sticky) end point, which still means empty.
+        ends = [end if end > begin else begin for begin, end in zip(begins, pos[1::2])]
+        return begins, ends
+
+    def regions(self):
+        """ Current regions, as a sorted list of (begin, end) tuples. """
+        return list(zip(*self.arrays()))
+
+
+class RegionStore(object):
+    """ Holds the RegionSets of a single view, by key. """
+
+    def __init__(self):
+        self.sets = {}
+
+    def add(self, key, regions, scope="", icon="", flags=0):
+        self.sets[key] = RegionSet(regions, scope, icon, flags)
+
+    def get(self, key):
+        region_set = self.sets.get(key)
+        if region_set is None:
+            return []
+        return region_set.regions()
+
+    def get_arrays(self, key):
+        region_set = self.sets.get(key)
+        if region_set is None:
+            return [], []
+        return region_set.arrays()
+
+    def erase(self, key):
+        self.sets.pop(key, None)
+
+    def on_insert(self, pt, length):
+        for region_set in self.sets.values():
+            region_set.tracker.on_insert(pt, length)
+
+    def on_erase(self, a, b):
+        for region_set in self.sets.values():
+            region_set.tracker.on_erase(a, b)
@@ -0,0 +1,178 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Resource index for `load_resource()`, `load_binary_resource()` and `find_resources()`.
+
+Resources are named like in Sublime Text, e.g. "Packages/Python/Python.sublime-syntax",
+and are found in:
+
+* The folders in `settings.PACKAGES_PATH` (each subfolder is a package).
+* The `.sublime-package` zip files in `settings.INSTALLED_PACKAGES_PATH`.
+    Loose files in the packages folder override files in the zip files.
+* Resources added in memory with `add_resource()`, which override both.
+
+The index of resource names is built on first use; call `invalidate()` after
+changing the settings or the files on disk. Caches of data loaded from the resources
+can compare `change_count()` to find out whether the resources may have changed.
+
+"""
+
+import json
+import os
+import re
+import zipfile
+from fnmatch import fnmatchcase
+
+from . import settings
+
+_index = None           # resource name -> file path, (zip path, member name), or bytes
+_memory = {}            # resources added with add_resource()
+_find_cache = {}
+_change_count = 0
+
+
+def _build_index():
+    index = {}
+    installed = settings.INSTALLED_PACKAGES_PATH
+    if installed and os.path.isdir(installed):
+        for entry in sorted(os.scandir(installed), key=lambda e: e.name):
+            if not entry.name.endswith(".sublime-package"):
+                continue
+            package = entry.name[:-len(".sublime-package")]
+            try:
+                with zipfile.ZipFile(entry.path) as zf:
+                    members = zf.namelist()
+            except (OSError, zipfile.BadZipFile):
+                continue
+            for member in members:
+                if not member.endswith("/"):
+                    index["Packages/" + package + "/" + member] = (entry.path, member)
+    packages = settings.PACKAGES_PATH
+    if packages and os.path.isdir(packages):
+        for dirpath, dirnames, filenames in os.walk(packages):
+            dirnames.sort()
+            rel = os.path.relpath(dirpath, packages).replace(os.sep, "/")
+            prefix = "Packages/" if rel == "." else "Packages/" + rel + "/"
+            for filename in filenames:
+                index[prefix + filename] = os.path.join(dirpath, filename)
+    return index
+
+
+def _get_index():
+    global _index
+    if _index is None:
+        _index = _build_index()
+        _index.update(_memory)
+    return _index
+
+
+def add_resource(name, content):
+    """ Add an in-memory resource (str or bytes), e.g. add_resource("Packages/Test/Test.sublime-syntax", text). """
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    global _change_count
+    _memory[name] = content
+    _change_count += 1
+    if _index is not None:
+        if name not in _index:
+            _find_cache.clear()
+        _index[name] = content
+
+
+def set_paths(packages_path, installed_packages_path, memory=None):
+    """ Set the package folders (see settings.py), and add the in-memory resources `memory`,
+    e.g. in a worker process, and invalidate the index.
+    """
+    settings.PACKAGES_PATH = packages_path
+    settings.INSTALLED_PACKAGES_PATH = installed_packages_path
+    if memory:
+        _memory.update(memory)
+    invalidate()
+
+
+def worker_paths():
+    """ Arguments for `set_paths()` that give a worker process the resources of this one. """
+    return settings.PACKAGES_PATH, settings.INSTALLED_PACKAGES_PATH, dict(_memory)
+
+
+def invalidate():
+    """ Forget the resource index, so it is rebuilt on the next lookup. """
+    global _index, _change_count
+    _index = None
+    _find_cache.clear()
+    _change_count += 1
+
+
+def change_count():
+    """ Number of times resources were added or the index was invalidated. """
+    return _change_count
+
+
+def load_binary(name):
+    """ Contents of the resource as bytes, or None if there is no such resource. """
+    location = _get_index().get(name)
+    if location is None:
+        return None
+    if isinstance(location, bytes):
+        return location
+    try:
+        if isinstance(location, tuple):
+            with zipfile.ZipFile(location[0]) as zf:
+                return zf.read(location[1])
+        with open(location, "rb") as fp:
+            return fp.read()
+    except (OSError, KeyError, zipfile.BadZipFile):
+        return None
+
+
+def load(name):
+    """ Contents of the resource as text, or None if there is no such resource. """
+    data = load_binary(name)
+    if data is None:
+        return None
+    return data.decode("utf-8").replace("\r\n", "\n")
+
+
+def load_resource_or_file(path):
+    """ Contents of the resource `path`, or else of the file `path`, or None. """
+    text = load(path)
+    if text is None:
+        try:
+            with open(path, encoding="utf-8") as fp:
+                text = fp.read()
+        except OSError:
+            return None
+    return text
+
+
+_JSON_COMMENTS = re.compile(r'"(?:\\.|[^"\\])*"|//[^\n]*|/\*.*?\*/', re.DOTALL)
+_JSON_TRAILING_COMMAS = re.compile(r'"(?:\\.|[^"\\])*"|,(?=\s*[\]}])')
+
+
+def decode_json(text):
+    """ Decode the relaxed JSON used by Sublime Text resources (with comments and trailing commas). """
+    keep_strings = lambda m: m.group() if m.group().startswith('"') else ""
+    text = _JSON_COMMENTS.sub(keep_strings, text)
+    return json.loads(_JSON_TRAILING_COMMAS.sub(keep_strings, text))
+
+
+def load_json(name):
+    """ The decoded contents of a JSON resource (e.g. a .sublime-keymap), or None if missing or invalid. """
+    text = load(name)
+    if text is None:
+        return None
+    try:
+        return decode_json(text)
+    except ValueError as exc:
+        print("Error parsing {}: {}".format(name, exc))
+        return None
+
+
+def find(pattern):
+    """ Sorted names of the resources whose file name matches the glob `pattern`. """
+    names = _find_cache.get(pattern)
+    if names is None:
+        names = _find_cache[pattern] = sorted(
+            name for name in _get_index() if fnmatchcase(name.rsplit("/", 1)[-1], pattern))
+    return list(names)
@@ -0,0 +1,184 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Scope selector matching, for `score_selector()`, `view.match_selector()` and `view.score_selector()`.
+
+The selector language is the one used by Sublime Text (and TextMate):
+
+    source.python string, comment       Alternatives, separated by "," (or "|")
+    source.python string                A descendant path of scope atoms
+    source - (comment | string)         "-" excludes, "&" requires both, parentheses group
+    -comment                            Negation
+
+An atom matches a scope if it is equal to the scope or a dotted prefix of it
+("string" matches "string.quoted.double").
+
+The score of a path weighs each matched atom by the number of its dotted parts and,
+more heavily, by the depth of the scope it matched, so deeper and more specific
+matches score higher. Alternatives score the best of their parts. A score of 0 means no match.
+
+Selectors are compiled once into matcher objects, which are kept in an LRU cache,
+and scores are cached per (scope name, selector), since the same few selectors are
+typically evaluated against the same few scope names over and over.
+
+"""
+
+import re
+from functools import lru_cache
+
+_TOKEN = re.compile(r"\s*([(),|&]|-(?=\s|\(|[\w.])|[^\s(),|&]+)")
+_OPERATOR_TOKENS = frozenset(["(", ")", ",", "|", "&", "-"])
+
+
+@lru_cache(maxsize=4096)
+def _split_scopes(scope_name):
+    return tuple(scope_name.split())
+
+
+class Path(object):
+    """ A descendant path of scope atoms. """
+    __slots__ = ['atoms']
+
+    def __init__(self, atoms):
+        # (atom, atom + ".", weight) from the innermost atom outwards:
+        self.atoms = [(atom, atom + ".", atom.count(".") + 1) for atom in reversed(atoms)]
+
+    def score(self, scopes):
+        score = 0
+        depth = len(scopes)
+        for atom, prefix, weight in self.atoms:
+            depth -= 1
+            while depth >= 0:
+                scope = scopes[depth]
+                if scope == atom or scope.startswith(prefix):
+                    break
+                depth -= 1
+            if depth < 0:
+                return 0
+            score += weight << (3 * depth)
+        return score
+
+
+class Negation(object):
+    __slots__ = ['operand']
+
+    def __init__(self, operand):
+        self.operand = operand
+
+    def score(self, scopes):
+        return 0 if self.operand.score(scopes) else 1
+
+
+class Composite(object):
+    """ Operands combined with "-" (exclusion), "&" (both) and "|" (either), left to right. """
+    __slots__ = ['first', 'rest']
+
+    def __init__(self, first, rest):
+        self.first = first
+        self.rest = rest
+
+    def score(self, scopes):
+        score = self.first.score(scopes)
+        for op, operand in self.rest:
+            if op == "-":
+                if score and operand.score(scopes):
+                    score = 0
+            elif op == "&":
+                if score:
+                    other = operand.score(scopes)
+                    score = max(score, other) if other else 0
+            else:
+                score = max(score, operand.score(scopes))
+        return score
+
+
+class Alternatives(object):
+    __slots__ = ['options']
+
+    def __init__(self, options):
+        self.options = options
+
+    def score(self, scopes):
+        best = 0
+        for option in self.options:
+            score = option.score(scopes)
+            if score > best:
+                best = score
+        return best
+
+
+class _Always(object):
+    """ The empty selector, which matches everything. """
+
+    def score(self, scopes):
+        return 1
+
+
+class _Parser(object):
+
+    def __init__(self, selector):
+        self.tokens = _TOKEN.findall(selector)
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def next(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def alternatives(self):
+        options = [self.composite()]
+        while self.peek() == ",":
+            self.next()
+            options.append(self.composite())
+        options = [o for o in options if o is not None]
+        if not options:
+            return None
+        if len(options) == 1:
+            return options[0]
+        return Alternatives(options)
+
+    def composite(self):
+        first = self.operand()
+        rest = []
+        while self.peek() in ("-", "&", "|"):
+            op = self.next()
+            operand = self.operand()
+            if operand is not None:
+                rest.append((op, operand))
+        if first is None:
+            return None
+        return Composite(first, rest) if rest else first
+
+    def operand(self):
+        token = self.peek()
+        if token == "-":
+            self.next()
+            operand = self.operand()
+            return Negation(operand) if operand is not None else None
+        if token == "(":
+            self.next()
+            group = self.alternatives()
+            if self.peek() == ")":
+                self.next()
+            return group
+        atoms = []
+        while self.peek() is not None and self.peek() not in _OPERATOR_TOKENS:
+            atoms.append(self.next())
+        return Path(atoms) if atoms else None
+
+
+@lru_cache(maxsize=1024)
+def compile_selector(selector):
+    """ Compile `selector` into a matcher object, with a `score(scopes)` method. """
+    matcher = _Parser(selector).alternatives()
+    return _Always() if matcher is None else matcher
+
+
+@lru_cache(maxsize=65536)
+def score_selector(scope_name, selector):
+    """ Score of `selector` against the space-separated `scope_name`. """
+    return compile_selector(selector).score(_split_scopes(scope_name))
@@ -0,0 +1,284 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Per-view syntax highlighting state, for `view.scope_name()` and the other scope functions.
+
+The syntax is taken from the view's "syntax" setting. The scope runs of each line are kept
+as a list of (column, scope name) tuples, starting at column 0, together with the tokenizer
+state at the start of each line.
+
+Tokenizing is lazy: lines are only tokenized when a scope at or below them is queried.
+An edit marks the edited lines as dirty, but keeps the cached lines after them.
+Re-tokenizing then starts at the first dirty line, and stops as soon as the state at the
+start of a clean line is the same as the cached state, since the cached lines from there
+on (up to the next dirty line) are still correct.
+
+For `view.find_by_selector()`, the runs of the whole buffer are also kept in a flat
+scope-run index: arrays of run begin and end points and scope name ids. The index keeps
+track of the range of lines that were edited or re-tokenized since it was last built;
+only the runs of those lines are rebuilt, and the runs after them are shifted by the
+change in length (with NumPy, when available). A query only scores each distinct scope
+name against the selector once, then selects the matching runs and merges adjacent ones.
+
+"""
+
+from array import array
+from bisect import bisect_right
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .scope_selector import score_selector
+from .syntax import PLAIN_TEXT_SYNTAX, load_syntax, scope_name, stack_scopes, tokenize_line
+
+_LAST = chr(0x10FFFF)
+
+
+def _shift(values, start, delta):
+    """ Add `delta` to values[start:] of an array('q'). """
+    if not delta or start >= len(values):
+        return
+    if numpy is not None:
+        numpy.frombuffer(values, dtype=numpy.int64)[start:] += delta
+    else:
+        values[start:] = array('q', [v + delta for v in values[start:]])
+
+
+class ScopeStore(object):
+
+    def __init__(self, buffer, settings):
+        self.buffer = buffer
+        self.settings = settings
+        self.syntax_name = None
+        self.syntax = None
+        self._runs = None       # Per line: list of (column, scope name) runs, or None if dirty
+        self._states = None     # Per line: tokenizer state at the start of the line
+        self._valid = 0         # Lines before this one are tokenized and up to date
+        # Scope-run index: run begins, ends and name ids, and the index of the first run of
+        # each line. Lines first..old_end of the index are out of date, and correspond to
+        # lines first..new_end of the buffer; the runs after them are `delta` points off.
+        self._run_begins = array('q')
+        self._run_ends = array('q')
+        self._run_names = array('q')
+        self._line_offsets = array('q', [0])
+        self._stale = None      # [first, old_end, new_end, delta], or None if up to date
+        self._names = []
+        self._name_ids = {}
+
+    def _check_syntax(self):
+        name = self.settings.get("syntax") or PLAIN_TEXT_SYNTAX
+        # The syntax is reloaded when the resources change, even if the name stays the same.
+        syntax = load_syntax(name) or load_syntax(PLAIN_TEXT_SYNTAX)
+        if name != self.syntax_name or syntax is not self.syntax:
+            self.syntax_name = name
+            self.syntax = syntax
+            self._runs = None
+
+    def line_runs(self, row):
+        """ The scope runs of `row`, as a list of (column, scope name) tuples. """
+        self._check_syntax()
+        if self._runs is None:
+            count = self.buffer.line_count()
+            self._runs = [None] * count
+            self._states = [self.syntax.initial_state()] + [None] * (count - 1)
+            self._valid = 0
+            self._run_begins = array('q')
+            self._run_ends = array('q')
+            self._run_names = array('q')
+            self._line_offsets = array('q', [0])
+            self._stale = [0, 0, count, 0]
+        if row >= self._valid:
+            self._tokenize(row)
+        return self._runs[row]
+
+    def _tokenize(self, last):
+        """ Tokenize the lines from the first invalid line up to (at least) `last`. """
+        buffer = self.buffer
+        text = buffer.text
+        runs_list = self._runs
+        states = self._states
+        count = len(runs_list)
+        row = self._valid
+        self._mark_stale(row, 1, 1, 0)
+        while row <= last:
+            begin = buffer.line_start(row)
+            end = buffer.line_start(row + 1) if row + 1 < count else len(text)
+            runs, state = tokenize_line(text[begin:end], states[row])
+            runs_list[row] = runs or [(0, scope_name(stack_scopes(state)))]
+            if row >= self._stale[2]:
+                self._mark_stale(row, 1, 1, 0)
+            row += 1
+            if row < count and runs_list[row] is not None and states[row] == state:
+                # Converged with the cached state; skip ahead to the next dirty line.
+                try:
+                    row = runs_list.index(None, row)
+                except ValueError:
+                    row = count
+            elif row < count:
+                # The cached runs of the next line (if any) were made from another state.
+                states[row] = state
+                runs_list[row] = None
+        self._valid = row
+
+    def _mark_stale(self, first, old_count, new_count, delta):
+        """ Extend the out-of-date lines of the scope-run index with lines first..first + old_count
+        of the buffer, which now are `new_count` lines, `delta` points longer.
+        """
+        stale = self._stale
+        if stale is None:
+            self._stale = [first, first + old_count, first + new_count, delta]
+            return
+        start, old_end, new_end, total = stale
+        end = max(new_end, first + old_count)
+        stale[0] = min(start, first)
+        stale[1] = end - (new_end - old_end)
+        stale[2] = end + new_count - old_count
+        stale[3] = total + delta
+
+    def _replace_rows(self, first, old_count, new_count, delta):
+        """ Mark the edited lines dirty, keeping the cached lines after them. """
+        if self._runs is None:
+            return
+        self._runs[first:first + old_count] = [None] * new_count
+        self._states[first + 1:first + old_count] = [None] * (new_count - 1)
+        self._valid = min(self._valid, first)
+        self._mark_stale(first, old_count, new_count, delta)
+
+    def on_insert(self, pt, length):
+        if self._runs is not None:
+            added = self.buffer.line_count() - len(self._runs)
+            self._replace_rows(self.buffer.row_of(pt), 1, added + 1, length)
+
+    def on_erase(self, a, b):
+        if self._runs is not None:
+            removed = len(self._runs) - self.buffer.line_count()
+            self._replace_rows(self.buffer.row_of(a), removed + 1, 1, a - b)
+
+    def _clamp(self, pt):
+        return min(max(pt, 0), len(self.buffer))
+
+    def scope_name(self, pt):
+        pt = self._clamp(pt)
+        row = self.buffer.row_of(pt)
+        runs = self.line_runs(row)
+        col = pt - self.buffer.line_start(row)
+        return runs[bisect_right(runs, (col, _LAST)) - 1][1]
+
+    def _row_tokens(self, row):
+        """ (begin, end, scope name) of the runs of `row`, including its newline. """
+        buffer = self.buffer
+        begin = buffer.line_start(row)
+        end = buffer.line_start(row + 1) if row + 1 < buffer.line_count() else len(buffer)
+        runs = self.line_runs(row)
+        for i, (col, name) in enumerate(runs):
+            run_end = begin + runs[i + 1][0] if i + 1 < len(runs) else end
+            yield begin + col, run_end, name
+
+    def tokens(self, begin, end):
+        """ (begin, end, scope name) of the scope runs between begin and end. """
+        begin = self._clamp(begin)
+        end = self._clamp(end)
+        result = []
+        for row in range(self.buffer.row_of(begin), self.buffer.row_of(end) + 1):
+            for a, b, name in self._row_tokens(row):
+                a = max(a, begin)
+                b = min(b, end)
+                if a >= b:
+                    continue
+                if result and result[-1][2] == name and result[-1][1] == a:
+                    result[-1] = (result[-1][0], b, name)
+                else:
+                    result.append((a, b, name))
+        return result
+
+    def extract_scope(self, pt):
+        """ Extent of the scope at pt: the adjacent runs whose scope name starts with it. """
+        pt = self._clamp(pt)
+        name = self.scope_name(pt)
+        buffer = self.buffer
+        row = buffer.row_of(pt)
+        begin = end = pt
+        r = row
+        while r >= 0:
+            tokens = [t for t in self._row_tokens(r) if t[0] < begin]
+            while tokens and tokens[-1][2].startswith(name) and tokens[-1][1] >= begin:
+                begin = tokens.pop()[0]
+            if tokens or begin > buffer.line_start(r):
+                break
+            r -= 1
+        r = row
+        while r < buffer.line_count():
+            tokens = [t for t in self._row_tokens(r) if t[1] > end][::-1]
+            while tokens and tokens[-1][2].startswith(name) and tokens[-1][0] <= end:
+                end = tokens.pop()[1]
+            if tokens or r + 1 >= buffer.line_count() or end < buffer.line_start(r + 1):
+                break
+            r += 1
+        return begin, end
+
+    def _run_index(self):
+        """ The scope-run index, as (begins, ends, name ids) arrays. """
+        buffer = self.buffer
+        count = buffer.line_count()
+        self.line_runs(count - 1)
+        if self._stale is not None:
+            first, old_end, new_end, delta = self._stale
+            self._stale = None
+            begins, ends, names = self._run_begins, self._run_ends, self._run_names
+            offsets = self._line_offsets
+            k, k_end = offsets[first], offsets[old_end]
+            new_begins, new_ends, new_names = array('q'), array('q'), array('q')
+            new_offsets = array('q')
+            name_ids = self._name_ids
+            size = len(buffer)
+            for row in range(first, new_end):
+                begin = buffer.line_start(row)
+                end = buffer.line_start(row + 1) if row + 1 < count else size
+                runs = self._runs[row]
+                for i, (col, name) in enumerate(runs):
+                    run_end = begin + runs[i + 1][0] if i + 1 < len(runs) else end
+                    if begin + col == run_end:
+                        continue
+                    name_id = name_ids.get(name)
+                    if name_id is None:
+                        name_id = name_ids[name] = len(self._names)
+                        self._names.append(name)
+                    new_begins.append(begin + col)
+                    new_ends.append(run_end)
+                    new_names.append(name_id)
+                new_offsets.append(k + len(new_begins))
+            # The runs after the stale lines only moved.
+            _shift(begins, k_end, delta)
+            _shift(ends, k_end, delta)
+            _shift(offsets, old_end + 1, len(new_begins) - (k_end - k))
+            begins[k:k_end] = new_begins
+            ends[k:k_end] = new_ends
+            names[k:k_end] = new_names
+            offsets[first + 1:old_end + 1] = new_offsets
+        return self._run_begins, self._run_ends, self._run_names
+
+    def find_by_selector(self, selector):
+        """ (begin, end) of the regions matching `selector`, with adjacent runs merged. """
+        begins, ends, names = self._run_index()
+        matching = [score_selector(name, selector) > 0 for name in self._names]
+        if numpy is not None and len(begins):
+            mask = numpy.array(matching, dtype=bool)[numpy.frombuffer(names, dtype=numpy.int64)]
+            b = numpy.frombuffer(begins, dtype=numpy.int64)[mask]
+            e = numpy.frombuffer(ends, dtype=numpy.int64)[mask]
+            if not len(b):
+                return []
+            breaks = numpy.flatnonzero(b[1:] != e[:-1]) + 1
+            first = numpy.concatenate(([0], breaks))
+            last = numpy.concatenate((breaks - 1, [len(b) - 1]))
+            return list(zip(b[first].tolist(), e[last].tolist()))
+        result = []
+        for begin, end, name_id in zip(begins, ends, names):
+            if matching[name_id]:
+                if result and result[-1][1] == begin:
+                    result[-1] = (result[-1][0], end)
+                else:
+                    result.append((begin, end))
+        return result
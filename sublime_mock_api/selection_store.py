@@ -0,0 +1,102 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+The selection of a mocked view.
+
+The selection is a sorted list of non-overlapping regions. Adding a region merges it with
+any region it overlaps (or touches, if either of them is empty), like in Sublime Text.
+Each entry is a (begin, end, a, b, xpos) tuple, so the list can be searched with bisect
+while keeping the orientation of the regions.
+
+On edits, every selection point at or after the edit position is moved;
+the selection is usually small, so this is done eagerly.
+
+"""
+
+from bisect import bisect_left
+
+
+def _merges(begin, end, other_begin, other_end):
+    """ True if the two (sorted) regions should be merged into one. """
+    if other_begin < end and other_end > begin:
+        return True
+    if begin == end or other_begin == other_end:
+        return other_begin <= end and other_end >= begin
+    return False
+
+
+class SelectionStore(object):
+
+    def __init__(self):
+        self.regions = [(0, 0, 0, 0, -1)]
+
+    def __len__(self):
+        return len(self.regions)
+
+    def get(self, index):
+        """ (a, b, xpos) of the region at index, or None if out of range. """
+        if -len(self.regions) <= index < len(self.regions):
+            return self.regions[index][2:]
+        return None
+
+    def erase(self, index):
+        if -len(self.regions) <= index < len(self.regions):
+            del self.regions[index]
+
+    def clear(self):
+        self.regions = []
+
+    def add(self, a, b, xpos=-1):
+        begin, end = (a, b) if a <= b else (b, a)
+        regions = self.regions
+        lo = bisect_left(regions, (begin,))
+        while lo > 0 and _merges(begin, end, regions[lo - 1][0], regions[lo - 1][1]):
+            lo -= 1
+        hi = lo
+        while hi < len(regions) and _merges(begin, end, regions[hi][0], regions[hi][1]):
+            hi += 1
+        if hi > lo:
+            begin = min(begin, regions[lo][0])
+            end = max(end, regions[hi - 1][1])
+            a, b = (begin, end) if a <= b else (end, begin)
+        regions[lo:hi] = [(begin, end, a, b, xpos)]
+
+    def subtract(self, a, b):
+        begin, end = (a, b) if a <= b else (b, a)
+        result = []
+        for r in self.regions:
+            r_begin, r_end = r[0], r[1]
+            if r_end <= begin or r_begin >= end:
+                if not (r_begin == r_end and begin < r_begin < end):
+                    result.append(r)
+                continue
+            if r_begin < begin:
+                result.append((r_begin, begin, r_begin, begin, -1))
+            if r_end > end:
+                result.append((end, r_end, end, r_end, -1))
+        self.regions = result
+
+    def contains(self, a, b):
+        begin, end = (a, b) if a <= b else (b, a)
+        i = bisect_left(self.regions, (begin + 1,)) - 1
+        return i >= 0 and self.regions[i][0] <= begin and self.regions[i][1] >= end
+
+    def has_non_empty_region(self):
+        return any(r[0] != r[1] for r in self.regions)
+
+    def pairs(self):
+        """ Lists of the a and b points of the selection. """
+        return [r[2] for r in self.regions], [r[3] for r in self.regions]
+
+    def _remap(self, move):
+        old = self.regions
+        self.regions = []
+        for _, _, a, b, xpos in old:
+            self.add(move(a), move(b), xpos)
+
+    def on_insert(self, pt, length):
+        self._remap(lambda p: p + length if p >= pt else p)
+
+    def on_erase(self, a, b):
+        self._remap(lambda p: a if a < p < b else (p - (b - a) if p >= b else p))
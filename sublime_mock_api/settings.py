@@ -1,6 +1,12 @@
-
-
+import os
 
 ENABLE_PRINT_CALL_WRAPPING = True
 
+# Folders searched by the mocked resource functions (load_resource(), find_resources(), ...),
+# e.g. the "Packages" and "Installed Packages" folders of a Sublime Text installation,
+# or folders with the packages used in your tests.
+PACKAGES_PATH = os.environ.get("SUBLIME_MOCK_PACKAGES_PATH", "")
+INSTALLED_PACKAGES_PATH = os.environ.get("SUBLIME_MOCK_INSTALLED_PACKAGES_PATH", "")
 
+# Folder for the mocked `cache_path()`, where e.g. the project symbol index is kept.
+CACHE_PATH = os.environ.get("SUBLIME_MOCK_CACHE_PATH", "")
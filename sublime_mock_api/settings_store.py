@@ -0,0 +1,71 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Storage for the settings objects used by the mocked API (view settings, window settings,
+and settings loaded with `load_settings()`).
+
+Each settings object is identified by an integer id, which is what the mock_api
+functions receive from `sublime.Settings`.
+
+"""
+
+from itertools import count
+
+from .word_index import DEFAULT_WORD_SEPARATORS
+
+# The view settings that plugins most commonly rely on having a value:
+DEFAULT_VIEW_SETTINGS = {
+    "word_separators": DEFAULT_WORD_SEPARATORS,
+    "tab_size": 4,
+    "translate_tabs_to_spaces": False,
+    "auto_complete": True,
+    "syntax": "Packages/Text/Plain text.tmLanguage",
+    "color_scheme": "Monokai.sublime-color-scheme",
+}
+
+
+class SettingsObject(object):
+
+    def __init__(self, values=None):
+        self.values = dict(values or {})
+        self.on_change = {}
+
+    def set(self, key, value):
+        self.values[key] = value
+        self.changed()
+
+    def erase(self, key):
+        if key in self.values:
+            del self.values[key]
+            self.changed()
+
+    def changed(self):
+        for callback in list(self.on_change.values()):
+            callback()
+
+
+_settings = {}
+_named_settings = {}
+_ids = count(1000)
+
+
+def new_settings(values=None):
+    settings_id = next(_ids)
+    _settings[settings_id] = SettingsObject(values)
+    return settings_id
+
+
+def get_settings(settings_id):
+    settings = _settings.get(settings_id)
+    if settings is None:
+        settings = _settings[settings_id] = SettingsObject()
+    return settings
+
+
+def named_settings(base_name):
+    """ Settings id for the settings file `base_name`, e.g. "Preferences.sublime-settings". """
+    settings_id = _named_settings.get(base_name)
+    if settings_id is None:
+        settings_id = _named_settings[base_name] = new_settings()
+    return settings_id
@@ -0,0 +1,230 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Project symbol index, for `window.lookup_symbol_in_index()` and `window.lookup_references_in_index()`.
+
+Each folder open in a window has a `FolderIndex` with the indexed symbols and references
+(see symbol_store.py) of every file in the folder's tree (see project.py) that has a syntax. Files are tokenized
+across a process pool, in chunks, since indexing a large folder file by file would take
+minutes. The workers get the package folders and the in-memory resources of this process.
+
+The index is kept on disk, under `cache_path()`/Index, one JSON file per folder, so it
+survives restarts. A file is re-indexed when its modification time or size differs from
+the ones recorded in the index, and dropped when it no longer exists. Folders are
+re-scanned for changed files at most every `RESCAN_SECONDS` on lookups.
+
+Call `log_indexing(True)` to print the indexing progress.
+
+"""
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from . import resources
+from . import settings
+from .buffer import Buffer
+from .scope_store import ScopeStore
+from .symbol_store import INDEXED_REFERENCES, INDEXED_SYMBOLS, SymbolStore
+from .syntax import PLAIN_TEXT_SYNTAX, syntax_for_file_name
+
+LOG_INDEXING = False
+INDEX_VERSION = 1
+RESCAN_SECONDS = 10.0
+# Files indexed in one go by a worker process, and the minimum number of files to use the pool for:
+CHUNK_SIZE = 64
+POOL_THRESHOLD = 2 * CHUNK_SIZE
+
+
+def _log(message):
+    if LOG_INDEXING:
+        print("indexing:", message)
+
+
+def index_file(path, syntax_name):
+    """ (symbols, references) of the file, as lists of (name, row, col), zero-based. """
+    try:
+        with open(path, encoding="utf-8", errors="replace") as fp:
+            text = fp.read().replace("\r\n", "\n")
+    except OSError:
+        return [], []
+    buffer = Buffer(text)
+    symbols = SymbolStore(buffer, ScopeStore(buffer, {"syntax": syntax_name}))
+    found = []
+    for kind in (INDEXED_SYMBOLS, INDEXED_REFERENCES):
+        locations = []
+        for begin, _, name in symbols.symbols(kind):
+            row, col = buffer.row_col(begin)
+            locations.append((name, row, col))
+        found.append(locations)
+    return found[0], found[1]
+
+
+def _index_files(jobs):
+    """ Index a chunk of (path, syntax name) jobs, in a worker process. """
+    return [index_file(path, syntax_name) for path, syntax_name in jobs]
+
+
+class FolderIndex(object):
+
+    def __init__(self, folder):
+        self.folder = os.path.abspath(folder)
+        self.files = {}         # relative path -> [mtime, size, symbols, references]
+        self.scanned = None     # time.time() of the last scan
+        self._symbols = None    # symbol name -> list of (relative path, row, col)
+        self._references = None
+        self.load()
+
+    @property
+    def index_path(self):
+        key = hashlib.sha1(self.folder.encode("utf-8")).hexdigest()
+        return os.path.join(settings.CACHE_PATH, "Index", key + ".json") if settings.CACHE_PATH else None
+
+    def load(self):
+        """ Load the index from disk, if there is one. """
+        path = self.index_path
+        if path is None or not os.path.isfile(path):
+            return
+        try:
+            with open(path, encoding="utf-8") as fp:
+                data = json.load(fp)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == INDEX_VERSION and data.get("folder") == self.folder:
+            self.files = data.get("files", {})
+
+    def save(self):
+        path = self.index_path
+        if path is None:
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fp:
+            json.dump({"version": INDEX_VERSION, "folder": self.folder, "files": self.files}, fp)
+        os.replace(tmp_path, path)
+
+    def update(self, files, processes=None):
+        """ Index the new and changed `files` (relative paths), and drop the others.
+        Returns the number of files indexed.
+        """
+        start = time.time()
+        jobs = []
+        stats = {}
+        seen = set()
+        for rel in files:
+            syntax_name = syntax_for_file_name(rel)
+            if syntax_name is None or syntax_name == PLAIN_TEXT_SYNTAX:
+                continue
+            seen.add(rel)
+            try:
+                stat = os.stat(os.path.join(self.folder, rel))
+            except OSError:
+                continue
+            cached = self.files.get(rel)
+            if cached is None or cached[0] != stat.st_mtime or cached[1] != stat.st_size:
+                jobs.append((rel, syntax_name))
+                stats[rel] = (stat.st_mtime, stat.st_size)
+        deleted = [rel for rel in self.files if rel not in seen]
+        for rel in deleted:
+            del self.files[rel]
+        if jobs:
+            _log("{}: {} files to index".format(self.folder, len(jobs)))
+            for (rel, _), (symbols, references) in zip(jobs, self._run(jobs, processes)):
+                self.files[rel] = [stats[rel][0], stats[rel][1], symbols, references]
+        if jobs or deleted:
+            self._symbols = self._references = None
+            self.save()
+            _log("{}: indexed {} files, removed {}, in {:.2f} s".format(
+                self.folder, len(jobs), len(deleted), time.time() - start))
+        self.scanned = time.time()
+        return len(jobs)
+
+    def _run(self, jobs, processes):
+        """ (symbols, references) of each of the (relative path, syntax name) jobs. """
+        full_jobs = [(os.path.join(self.folder, rel), syntax_name) for rel, syntax_name in jobs]
+        chunks = [full_jobs[i:i + CHUNK_SIZE] for i in range(0, len(full_jobs), CHUNK_SIZE)]
+        if processes == 1 or len(full_jobs) < POOL_THRESHOLD:
+            results = map(_index_files, chunks)
+            pool = None
+        else:
+            pool = ProcessPoolExecutor(processes, initializer=resources.set_paths,
+                                       initargs=resources.worker_paths())
+            results = pool.map(_index_files, chunks)
+        indexed = []
+        try:
+            for chunk in results:
+                indexed.extend(chunk)
+                _log("{}: {}/{} files".format(self.folder, len(indexed), len(full_jobs)))
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return indexed
+
+    def _build_lookup(self, kind):
+        lookup = {}
+        for rel, entry in self.files.items():
+            for name, row, col in entry[kind]:
+                lookup.setdefault(name, []).append((rel, row, col))
+        for locations in lookup.values():
+            locations.sort()
+        return lookup
+
+    def lookup(self, name, references=False):
+        """ List of (relative path, row, col) where `name` is defined (or referenced). """
+        if references:
+            if self._references is None:
+                self._references = self._build_lookup(3)
+            return self._references.get(name, [])
+        if self._symbols is None:
+            self._symbols = self._build_lookup(2)
+        return self._symbols.get(name, [])
+
+
+_indexes = {}
+
+
+def get_index(tree):
+    """ The FolderIndex of the project.FolderTree `tree`, with the tree refreshed and the index
+    updated if it hasn't been scanned for RESCAN_SECONDS.
+    """
+    index = _indexes.get(tree.path)
+    if index is None:
+        index = _indexes[tree.path] = FolderIndex(tree.path)
+    if index.scanned is None or time.time() - index.scanned > RESCAN_SECONDS:
+        tree.refresh()
+        index.update(tree.files())
+    return index
+
+
+def lookup(trees, name, references=False):
+    """ Locations of `name` in the project folder trees, as (path, display path, (row, col)),
+    one-based like Sublime Text.
+    """
+    result = []
+    for tree in trees:
+        index = get_index(tree)
+        base = os.path.basename(index.folder)
+        for rel, row, col in index.lookup(name, references):
+            result.append((os.path.join(index.folder, *rel.split("/")), base + "/" + rel, (row + 1, col + 1)))
+    return result
+
+
+def lookup_in_views(views, name, references=False):
+    """ Locations of `name` in the symbols of the views, like `lookup()`. """
+    kind = INDEXED_REFERENCES if references else INDEXED_SYMBOLS
+    result = []
+    for view in views:
+        path = view.file_name or ""
+        for begin, _, symbol in view.symbols.symbols(kind):
+            if symbol == name:
+                row, col = view.buffer.row_col(begin)
+                result.append((path, os.path.basename(path), (row + 1, col + 1)))
+    return result
+
+
+def clear_cache():
+    """ Forget the in-memory indexes; the on-disk indexes are kept. """
+    _indexes.clear()
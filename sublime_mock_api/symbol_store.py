@@ -0,0 +1,175 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Per-view symbols, for `view.symbols()`, `view.indexed_symbols()` and `view.indexed_references()`.
+
+Symbols come from the tokenizer and the .tmPreferences metadata, like in Sublime Text:
+a symbol is a maximal span of a line whose scopes have `showInSymbolList` (for symbols),
+`showInIndexedSymbolList` (for indexed symbols) or `showInIndexedReferenceList` (for
+indexed references) set. The symbol name is the text of the span, rewritten by the
+`symbolTransformation` (or `symbolIndexTransformation`) at the start of the span, e.g.:
+
+    s/^\\s*def\\s+//;     # Strip the keyword
+    s/\\(.*//;            # and the parameters
+
+The symbols of each line are cached together with the scope runs they were made from,
+so after an edit only the lines that were re-tokenized are scanned again. The symbol
+lists of the whole view are cached per buffer change count. Both caches are dropped
+when the resources change (see `resources.change_count()`), since the metadata may have.
+
+"""
+
+import re
+from functools import lru_cache
+
+from . import metadata
+from . import resources
+from .regex_compat import translate
+
+SYMBOLS, INDEXED_SYMBOLS, INDEXED_REFERENCES = 0, 1, 2
+
+# (metadata key of the flag, metadata key of the transformation) per kind of symbol:
+_KINDS = (
+    ("showInSymbolList", "symbolTransformation"),
+    ("showInIndexedSymbolList", "symbolIndexTransformation"),
+    ("showInIndexedReferenceList", "symbolIndexTransformation"),
+)
+
+
+def _is_set(value):
+    return value not in (None, 0, False, "0", "false", "")
+
+
+def _kinds(scope_name):
+    """ The kinds of symbol `scope_name` is part of, as a tuple of bools. """
+    return tuple(_is_set(metadata.meta_info(key, scope_name)) for key, _ in _KINDS)
+
+
+_SUBSTITUTION = re.compile(r"s/((?:\\.|[^\\/])*)/((?:\\.|[^\\/])*)/([gi]*)\s*;?")
+
+
+@lru_cache(maxsize=256)
+def compile_transformation(transformation):
+    """ Compile a symbol transformation into a list of (regex, replacement, count). """
+    substitutions = []
+    pos = 0
+    text = transformation or ""
+    while pos < len(text):
+        if text[pos].isspace() or text[pos] == ";":
+            pos += 1
+        elif text[pos] == "#":
+            end = text.find("\n", pos)
+            pos = len(text) if end < 0 else end
+        else:
+            m = _SUBSTITUTION.match(text, pos)
+            if m is None:
+                break
+            pattern, replacement, flags = m.groups()
+            try:
+                regex = re.compile(translate(pattern)[0], re.IGNORECASE if "i" in flags else 0)
+            except re.error:
+                regex = None
+            if regex is not None:
+                replacement = re.sub(r"\$(\d+)|\$\{(\d+)\}|\\/", _replacement_group, replacement)
+                substitutions.append((regex, replacement, 0 if "g" in flags else 1))
+            pos = m.end()
+    return substitutions
+
+
+def _replacement_group(m):
+    if m.group() == "\\/":
+        return "/"
+    return "\\g<" + (m.group(1) or m.group(2)) + ">"
+
+
+def transform(name, transformation):
+    for regex, replacement, count in compile_transformation(transformation):
+        try:
+            name = regex.sub(replacement, name, count)
+        except (re.error, IndexError):
+            pass
+    return name
+
+
+class SymbolStore(object):
+
+    def __init__(self, buffer, scopes):
+        self.buffer = buffer
+        self.scopes = scopes
+        self._rows = None       # Per line: (scope runs, list of (kind, begin col, end col, name)), or None
+        self._cache = None      # (change count, syntax, resources change count, symbols per kind)
+
+    def _replace_rows(self, first, old_count, new_count):
+        if self._rows is not None:
+            self._rows[first:first + old_count] = [None] * new_count
+
+    def on_insert(self, pt, length):
+        if self._rows is not None:
+            added = self.buffer.line_count() - len(self._rows)
+            self._replace_rows(self.buffer.row_of(pt), 1, added + 1)
+
+    def on_erase(self, a, b):
+        if self._rows is not None:
+            removed = len(self._rows) - self.buffer.line_count()
+            self._replace_rows(self.buffer.row_of(a), removed + 1, 1)
+
+    def _scan_row(self, row, runs):
+        """ The (kind, begin col, end col, name) symbols of `row`. """
+        buffer = self.buffer
+        begin = buffer.line_start(row)
+        length = buffer.line_end(row) - begin
+        line = buffer.text[begin:begin + length]
+        found = []
+        for kind, (_, transformation_key) in enumerate(_KINDS):
+            start = None
+            for i, (col, name) in enumerate(runs):
+                if col >= length:
+                    break
+                if _kinds(name)[kind]:
+                    if start is None:
+                        start, start_scope = col, name
+                    continue
+                if start is not None:
+                    found.append(self._symbol(kind, line, start, col, start_scope, transformation_key))
+                    start = None
+            if start is not None:
+                found.append(self._symbol(kind, line, start, length, start_scope, transformation_key))
+        return [s for s in found if s[3]]
+
+    @staticmethod
+    def _symbol(kind, line, begin, end, scope_name, transformation_key):
+        name = line[begin:end]
+        transformation = metadata.meta_info(transformation_key, scope_name)
+        if transformation:
+            name = transform(name, transformation)
+        return kind, begin, end, name.strip()
+
+    def _all_symbols(self):
+        buffer = self.buffer
+        syntax = self.scopes.settings.get("syntax")
+        resources_count = resources.change_count()
+        cache = self._cache
+        if cache is not None and cache[:3] == (buffer.change_count, syntax, resources_count):
+            return cache[3]
+        count = buffer.line_count()
+        self.scopes.line_runs(count - 1)
+        if self._rows is None or len(self._rows) != count or cache is None or cache[2] != resources_count:
+            self._rows = [None] * count
+        rows = self._rows
+        result = ([], [], [])
+        for row in range(count):
+            runs = self.scopes.line_runs(row)
+            entry = rows[row]
+            if entry is None or entry[0] is not runs:
+                entry = rows[row] = (runs, self._scan_row(row, runs))
+            if entry[1]:
+                begin = buffer.line_start(row)
+                for kind, a, b, name in entry[1]:
+                    result[kind].append((begin + a, begin + b, name))
+        self._cache = (buffer.change_count, syntax, resources_count, result)
+        return result
+
+    def symbols(self, kind=SYMBOLS):
+        """ List of (begin, end, name) of the symbols of `kind` in the view. """
+        return self._all_symbols()[kind]
@@ -0,0 +1,580 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Syntax definitions (.sublime-syntax) and the tokenizer used for the scope functions.
+
+A `Syntax` is loaded from a YAML resource (see `resources`), with variables substituted
+into the match patterns. Contexts are resolved lazily: the rules of a context are
+flattened (includes and prototype) the first time the context is used, and all the
+rules are then compiled into a single combined regex, with one outer group per rule.
+Python's regex alternation picks the leftmost match, trying the rules in order at each
+position, which is how Sublime Text picks the rule that matches.
+
+Tokenizing works line by line, like in Sublime Text. The tokenizer state between lines
+is the context stack, a tuple of `Frame` tuples, so states can be compared and stored.
+`tokenize_line()` returns the scope runs of the line as (column, scope name) tuples.
+
+Supported: match, scope, captures, push, set, pop (also with a count), embed/escape,
+meta_scope, meta_content_scope, meta_include_prototype, clear_scopes, include
+(also "scope:..." and "Packages/..." references, with "#context"), prototype, variables,
+and backreferences in pop/escape patterns to the match that pushed the context.
+Not supported: branch_point/fail, with_prototype, and syntax inheritance (`extends`).
+
+YAML loading requires PyYAML; without it, all views use the plain text syntax.
+
+Loaded syntaxes and the scope and file extension indexes are dropped when the resources
+change (see `resources.change_count()`), and views then re-tokenize with the new syntax.
+
+"""
+
+import re
+from collections import namedtuple
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+from . import resources
+from .regex_compat import translate
+
+PLAIN_TEXT_SYNTAX = "Packages/Text/Plain text.tmLanguage"
+PLAIN_TEXT_SCOPE = "text.plain"
+
+_VARIABLE = re.compile(r"\{\{(\w+)\}\}")
+_BACKREF = re.compile(r"\\[1-9]")
+
+
+# One entry of the context stack: the context, the groups of the match that pushed it
+# (if the context refers to them), the escape rule of an embed, and extra scopes
+# added by the frame (the syntax scope, when entering another syntax).
+Frame = namedtuple("Frame", "context captures escape scope")
+
+
+def _scopes(value):
+    return tuple(value.split()) if value else ()
+
+
+def _captures(value):
+    return {int(k): _scopes(v) for k, v in (value or {}).items()}
+
+
+class Rule(object):
+    """ A match rule. `action` is None, "push", "set", "pop" or "embed". """
+    __slots__ = ['syntax', 'pattern', 'ngroups', 'scope', 'captures', 'action', 'targets', 'pop',
+                 'escape', 'escape_captures', 'embed_scope', 'dynamic', '_contexts']
+
+    def __init__(self, syntax, item):
+        self.syntax = syntax
+        self.pattern = syntax.expand_variables(str(item["match"]))
+        self.ngroups = translate(self.pattern)[1]
+        self.scope = _scopes(item.get("scope"))
+        self.captures = _captures(item.get("captures"))
+        self.pop = 0
+        self.escape = None
+        self.escape_captures = {}
+        self.embed_scope = None
+        self._contexts = None
+        pop = item.get("pop")
+        if pop:
+            self.pop = 1 if pop is True else int(pop)
+        if "push" in item or "set" in item:
+            self.action = "push" if "push" in item else "set"
+            self.targets = item[self.action]
+        elif "embed" in item:
+            self.action = "embed"
+            self.targets = item["embed"]
+            self.embed_scope = _scopes(item.get("embed_scope"))
+            self.escape = syntax.expand_variables(str(item.get("escape", "(?!)")))
+            self.escape_captures = _captures(item.get("escape_captures"))
+        else:
+            self.action = "pop" if self.pop else None
+            self.targets = None
+        if self.action == "push" and self.pop:
+            # "pop: N" combined with "push" replaces the top N contexts.
+            self.action = "set"
+        # Pop patterns can refer to the groups of the match that pushed the context.
+        self.dynamic = self.action == "pop" and bool(_BACKREF.search(self.pattern))
+        if isinstance(self.targets, list) and self.targets and all(isinstance(t, dict) for t in self.targets):
+            self.targets = [self.targets]   # A single anonymous context.
+        elif self.targets is not None and not isinstance(self.targets, list):
+            self.targets = [self.targets]
+
+    def contexts(self):
+        """ The contexts pushed by the rule. """
+        if self._contexts is None:
+            self._contexts = [self.syntax.resolve(t) for t in self.targets or ()]
+        return self._contexts
+
+
+class Context(object):
+
+    def __init__(self, syntax, name, items):
+        self.syntax = syntax
+        self.name = name
+        self.items = []
+        self.meta_scope = ()
+        self.meta_content_scope = ()
+        self.meta_include_prototype = True
+        self.clear_scopes = 0
+        for item in items or ():
+            if not isinstance(item, dict):
+                continue
+            if "match" in item:
+                self.items.append(Rule(syntax, item))
+            elif "include" in item:
+                self.items.append(str(item["include"]))
+            else:
+                if "meta_scope" in item:
+                    self.meta_scope = _scopes(item["meta_scope"])
+                if "meta_content_scope" in item:
+                    self.meta_content_scope = _scopes(item["meta_content_scope"])
+                if "meta_include_prototype" in item:
+                    self.meta_include_prototype = bool(item["meta_include_prototype"])
+                if "clear_scopes" in item:
+                    value = item["clear_scopes"]
+                    self.clear_scopes = -1 if value is True else int(value)
+        self._rules = None
+        self._dynamic = None
+        self._matchers = {}
+
+    def __repr__(self):
+        return "<Context {} of {}>".format(self.name, self.syntax.name)
+
+    @property
+    def rules(self):
+        """ The rules of the context, with includes and the prototype flattened. """
+        if self._rules is None:
+            self._rules = []    # Guards against recursive includes.
+            rules = []
+            prototype = self.syntax.contexts.get("prototype")
+            if self.meta_include_prototype and prototype is not None and self is not prototype:
+                self._flatten(prototype, rules, {self, prototype})
+            self._flatten(self, rules, {self})
+            self._rules = rules
+        return self._rules
+
+    def _flatten(self, context, rules, seen):
+        for item in context.items:
+            if isinstance(item, Rule):
+                rules.append(item)
+                continue
+            included = context.syntax.resolve(item)
+            if included not in seen:
+                seen.add(included)
+                self._flatten(included, rules, seen)
+
+    def matcher(self, captures=None):
+        """ The compiled `Matcher` for the context (for the given push captures, if dynamic). """
+        matcher = self._matchers.get(captures)
+        if matcher is None:
+            matcher = self._matchers[captures] = Matcher(self.rules, captures)
+        return matcher
+
+    @property
+    def dynamic(self):
+        """ True if any rule refers to the groups of the match that pushed the context. """
+        if self._dynamic is None:
+            self._dynamic = any(rule.dynamic for rule in self.rules)
+        return self._dynamic
+
+
+class Matcher(object):
+    """ The rules of a context, compiled into a single regex. """
+
+    def __init__(self, rules, captures=None):
+        self.rules = []
+        self.groups = {}    # Outer group index -> rule
+        parts = []
+        offset = 0
+        for rule in rules:
+            backrefs = (captures or ()) if rule.dynamic else None
+            pattern, ngroups = translate(rule.pattern, offset + 1, backrefs)
+            self.groups[offset + 1] = rule
+            parts.append("(" + pattern + ")")
+            self.rules.append((rule, offset + 1, ngroups))
+            offset += 1 + ngroups
+        self.regex = None
+        self.fallback = None
+        if not parts:
+            return
+        try:
+            self.regex = re.compile("|".join(parts))
+        except (re.error, OverflowError, RecursionError):
+            # Compile the rules separately, skipping any that fail.
+            self.fallback = []
+            for rule, _, _ in self.rules:
+                pattern, _ = translate(rule.pattern, 0, (captures or ()) if rule.dynamic else None)
+                try:
+                    self.fallback.append((re.compile("(" + pattern + ")"), rule))
+                except (re.error, OverflowError, RecursionError) as exc:
+                    print("Error in syntax {}: unable to compile {!r}: {}".format(
+                        rule.syntax.name, rule.pattern, exc))
+
+    def search(self, line, pos, endpos):
+        """ The first rule matching in line[pos:endpos], as (rule, match, group offset), or None. """
+        if self.regex is not None:
+            m = self.regex.search(line, pos, endpos)
+            if m is None:
+                return None
+            return self.groups[m.lastindex], m, m.lastindex
+        if self.fallback is None:
+            return None
+        best = None
+        for regex, rule in self.fallback:
+            m = regex.search(line, pos, endpos)
+            if m is not None and (best is None or m.start() < best[1].start()):
+                best = (rule, m, 1)
+        return best
+
+
+class Syntax(object):
+
+    def __init__(self, name, data):
+        self.name = name
+        self.scope = str(data.get("scope", PLAIN_TEXT_SCOPE))
+        self.file_extensions = [str(ext) for ext in data.get("file_extensions") or ()]
+        self.first_line_match = data.get("first_line_match")
+        self.hidden = bool(data.get("hidden", False))
+        self.display_name = data.get("name") or name.rsplit("/", 1)[-1].rsplit(".", 1)[0]
+        self.variables = {str(k): str(v) for k, v in (data.get("variables") or {}).items()}
+        self._expanded = {}
+        self._anonymous = 0
+        self.contexts = {}
+        for context_name, items in (data.get("contexts") or {}).items():
+            self.contexts[context_name] = Context(self, context_name, items)
+        if "main" not in self.contexts:
+            self.contexts["main"] = Context(self, "main", [])
+
+    def __repr__(self):
+        return "<Syntax {}>".format(self.name)
+
+    @property
+    def main(self):
+        return self.contexts["main"]
+
+    def expand_variables(self, pattern):
+        return _VARIABLE.sub(lambda m: self._variable(m.group(1)), pattern)
+
+    def _variable(self, name):
+        value = self._expanded.get(name)
+        if value is None:
+            self._expanded[name] = ""   # Guards against recursive variables.
+            value = self._expanded[name] = self.expand_variables(self.variables.get(name, ""))
+        return value
+
+    def resolve(self, target):
+        """ The context for a push/set/include target: a name, reference or anonymous context. """
+        if isinstance(target, list):
+            self._anonymous += 1
+            return Context(self, "anonymous-{}".format(self._anonymous), target)
+        target = str(target)
+        if target.startswith("scope:") or target.startswith("Packages/"):
+            ref, _, context_name = target.partition("#")
+            other = load_syntax_by_scope(ref[6:]) if ref.startswith("scope:") else load_syntax(ref)
+            if other is None:
+                return _empty_context(self)
+            return other.contexts.get(context_name or "main") or _empty_context(other)
+        context = self.contexts.get(target)
+        if context is None:
+            print("Error in syntax {}: no such context {!r}".format(self.name, target))
+            context = self.contexts[target] = Context(self, target, [])
+        return context
+
+    def initial_state(self):
+        return (Frame(self.main, None, None, (self.scope,)),)
+
+
+def _empty_context(syntax):
+    return syntax.contexts.setdefault("", Context(syntax, "", []))
+
+
+_plain_text = Syntax(PLAIN_TEXT_SYNTAX, {"scope": PLAIN_TEXT_SCOPE, "name": "Plain Text"})
+_syntaxes = {}
+_scope_index = None     # Syntax scope -> resource name
+_extension_index = None
+_syntaxes_change_count = None   # resources.change_count() when the caches above were filled
+
+
+def _check_resources():
+    """ Drop the loaded syntaxes and the indexes if the resources changed since they were loaded. """
+    global _scope_index, _extension_index, _syntaxes_change_count
+    if _syntaxes_change_count != resources.change_count():
+        _syntaxes.clear()
+        _scope_index = None
+        _extension_index = None
+        _syntaxes_change_count = resources.change_count()
+
+
+def load_syntax(name):
+    """ The Syntax for the resource `name`, or None if it can't be loaded. """
+    if name == PLAIN_TEXT_SYNTAX:
+        return _plain_text
+    _check_resources()
+    if name in _syntaxes:
+        return _syntaxes[name]
+    syntax = None
+    text = resources.load(name) if name.endswith(".sublime-syntax") else None
+    if text is not None and yaml is not None:
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+        try:
+            data = yaml.load(text, Loader=loader)
+            syntax = Syntax(name, data if isinstance(data, dict) else {})
+        except yaml.YAMLError as exc:
+            print("Error loading syntax file \"{}\": {}".format(name, exc))
+    _syntaxes[name] = syntax
+    return syntax
+
+
+def syntax_for_scope(scope):
+    """ Resource name of the syntax with the given top-level scope, or None. """
+    global _scope_index
+    _check_resources()
+    if _scope_index is None:
+        _scope_index = {PLAIN_TEXT_SCOPE: PLAIN_TEXT_SYNTAX}
+        scope_line = re.compile(r"^scope:\s*(\S+)", re.MULTILINE)
+        for name in resources.find("*.sublime-syntax"):
+            m = scope_line.search(resources.load(name) or "")
+            if m:
+                _scope_index.setdefault(m.group(1).strip("'\""), name)
+    return _scope_index.get(scope)
+
+
+def load_syntax_by_scope(scope):
+    name = syntax_for_scope(scope)
+    return load_syntax(name) if name else None
+
+
+def _get_extension_index():
+    """ Extension (or file name) -> (resource order, syntax resource name) of the first syntax listing it. """
+    global _extension_index
+    _check_resources()
+    if _extension_index is None:
+        _extension_index = {}
+        for order, name in enumerate(resources.find("*.sublime-syntax")):
+            syntax = load_syntax(name)
+            for ext in syntax.file_extensions if syntax is not None else ():
+                _extension_index.setdefault(ext, (order, name))
+    return _extension_index
+
+
+def syntax_for_file_name(file_name):
+    """ Resource name of the first syntax listing the extension (or name) of `file_name`, or None. """
+    base = file_name.replace("\\", "/").rsplit("/", 1)[-1]
+    index = _get_extension_index()
+    # The base name itself, and every suffix after a dot ("a.tar.gz" -> "tar.gz", "gz"):
+    candidates = [index.get(base)] + [index.get(part) for part in _dotted_suffixes(base)]
+    found = [c for c in candidates if c is not None]
+    return min(found)[1] if found else None
+
+
+def _dotted_suffixes(base):
+    i = base.find(".")
+    while i >= 0:
+        yield base[i + 1:]
+        i = base.find(".", i + 1)
+
+
+def clear_cache():
+    """ Forget all loaded syntaxes, e.g. after changing the resources. """
+    global _scope_index, _extension_index
+    _syntaxes.clear()
+    _scope_index = None
+    _extension_index = None
+    _scope_cache.clear()
+    _scope_names.clear()
+
+
+_scope_cache = {}
+_scope_names = {}
+
+
+def stack_scopes(stack, content_upto=None):
+    """ The scopes for a context stack, as a tuple.
+
+    Frames from index `content_upto` onwards only contribute their meta_scope
+    (i.e. the text matched when pushing or popping those contexts).
+    """
+    if content_upto is None:
+        content_upto = len(stack)
+    key = (stack, content_upto)
+    scopes = _scope_cache.get(key)
+    if scopes is None:
+        result = []
+        for i, frame in enumerate(stack):
+            context = frame.context
+            if frame.scope and i < content_upto:
+                result.extend(frame.scope)
+            if context.clear_scopes:
+                del result[-context.clear_scopes if context.clear_scopes > 0 else 0:]
+            result.extend(context.meta_scope)
+            if i < content_upto:
+                result.extend(context.meta_content_scope)
+        if len(_scope_cache) > 100000:
+            _scope_cache.clear()
+        scopes = _scope_cache[key] = tuple(result)
+    return scopes
+
+
+def scope_name(scopes):
+    """ The scope name string for a tuple of scopes, e.g. "source.python string.quoted " """
+    name = _scope_names.get(scopes)
+    if name is None:
+        name = _scope_names[scopes] = "".join(s + " " for s in scopes)
+    return name
+
+
+# Number of stack changes allowed at the same position before the tokenizer skips a character.
+MAX_STALLS = 25
+
+
+def _match_groups(rule, m, g):
+    """ The groups 1.. of the rule's match, as a tuple of strings. """
+    return tuple(m.group(g + k) or "" for k in range(1, rule.ngroups + 1))
+
+
+def _push_frames(rule, m, g):
+    frames = []
+    captures = None
+    for context in rule.contexts():
+        if captures is None and context.dynamic:
+            captures = _match_groups(rule, m, g)
+        scope = None
+        if context is context.syntax.main and context.syntax is not rule.syntax:
+            scope = (context.syntax.scope,)
+        frames.append(Frame(context, captures if context.dynamic else None, None, scope))
+    if rule.action == "embed" and frames:
+        backrefs = _match_groups(rule, m, g) if _BACKREF.search(rule.escape) else None
+        escape_pattern, _ = translate(rule.escape, 0, backrefs)
+        escape = _compile_escape(escape_pattern, rule)
+        frame = frames[0]
+        frames[0] = Frame(frame.context, frame.captures, escape, rule.embed_scope or frame.scope)
+    return tuple(frames)
+
+
+_escapes = {}
+
+
+def _compile_escape(pattern, rule):
+    key = (pattern, rule)
+    escape = _escapes.get(key)
+    if escape is None:
+        try:
+            regex = re.compile(pattern)
+        except re.error as exc:
+            print("Error in syntax {}: unable to compile {!r}: {}".format(rule.syntax.name, rule.escape, exc))
+            regex = re.compile("(?!)")
+        escape = _escapes[key] = (regex, rule)
+    return escape
+
+
+def _emit(runs, col, scopes):
+    name = scope_name(scopes)
+    if runs and runs[-1][1] == name:
+        return
+    if runs and runs[-1][0] == col:
+        runs.pop()
+        if runs and runs[-1][1] == name:
+            return
+    runs.append((col, name))
+
+
+def _emit_match(runs, m, g, ngroups, scopes, scope, captures):
+    """ Emit the runs for a match with the given scopes, match scope and capture scopes. """
+    begin, end = m.span(g)
+    if begin == end:
+        return
+    base = scopes + scope
+    if not captures:
+        _emit(runs, begin, base)
+        return
+    spans = []
+    for k in sorted(captures):
+        if k <= ngroups and m.start(g + k) < m.end(g + k):
+            spans.append((m.start(g + k), m.end(g + k), captures[k]))
+    points = sorted({begin, end}.union(*[(a, b) for a, b, _ in spans]))
+    for a, b in zip(points, points[1:]):
+        segment = base
+        for sa, sb, cs in spans:
+            if sa <= a and b <= sb:
+                segment = segment + cs
+        _emit(runs, a, segment)
+
+
+def tokenize_line(line, state, profile=None):
+    """ Tokenize one line (including its newline), starting from `state`.
+
+    Returns (runs, end state), where runs is a list of (column, scope name) tuples.
+    If given, `profile.search(frame, line, pos, endpos)` is used instead of searching
+    the context directly, e.g. to time the searches (see `syntax_profile`).
+    """
+    runs = []
+    stack = state
+    pos = 0
+    n = len(line)
+    stalls = 0
+    while pos < n:
+        # The innermost embed whose escape pattern matches cuts the line short.
+        endpos = n
+        escape_match = None
+        escape_index = None
+        for i in range(len(stack) - 1, 0, -1):
+            if stack[i].escape is not None:
+                m = stack[i].escape[0].search(line, pos)
+                if m is not None:
+                    escape_match, escape_index, endpos = m, i, m.start()
+                break
+        frame = stack[-1]
+        if profile is None:
+            found = frame.context.matcher(frame.captures).search(line, pos, endpos)
+        else:
+            found = profile.search(frame, line, pos, endpos)
+        if found is None:
+            if endpos > pos:
+                _emit(runs, pos, stack_scopes(stack))
+            pos = endpos
+            if escape_match is None:
+                break
+            # Pop the embedded contexts; the escape text only gets the escape captures.
+            outer = stack[:escape_index]
+            regex, rule = stack[escape_index].escape
+            _emit_match(runs, escape_match, 0, regex.groups, stack_scopes(outer), (), rule.escape_captures)
+            stack = outer
+            pos = escape_match.end()
+            stalls = 0
+            continue
+
+        rule, m, g = found
+        if m.start() > pos:
+            _emit(runs, pos, stack_scopes(stack))
+        action = rule.action
+        if action is None:
+            _emit_match(runs, m, g, rule.ngroups, stack_scopes(stack), rule.scope, rule.captures)
+            new_stack = stack
+        elif action == "pop":
+            keep = max(len(stack) - rule.pop, 1)
+            _emit_match(runs, m, g, rule.ngroups, stack_scopes(stack, keep), rule.scope, rule.captures)
+            new_stack = stack[:keep]
+        else:
+            if action == "set":
+                base = stack[:max(len(stack) - max(rule.pop, 1), 1)]
+            else:
+                base = stack
+            new_stack = base + _push_frames(rule, m, g)
+            _emit_match(runs, m, g, rule.ngroups, stack_scopes(new_stack, len(base)), rule.scope, rule.captures)
+
+        if m.end() > pos:
+            stalls = 0
+        elif new_stack == stack or stalls >= MAX_STALLS:
+            # No progress; skip a character to avoid looping forever.
+            _emit(runs, pos, stack_scopes(new_stack))
+            stack = new_stack
+            pos += 1
+            stalls = 0
+            continue
+        else:
+            stalls += 1
+        stack = new_stack
+        pos = m.end()
+    return runs, stack
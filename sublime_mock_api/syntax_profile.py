@@ -0,0 +1,221 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Syntax definition profiling, for `profile_syntax_definition()`.
+
+A file is tokenized with a `SyntaxProfile` hooked into the tokenizer, which records:
+
+* Per context: the number of searches, how many of them found a match, and the time
+    spent in the context's combined regex.
+* Per match rule: how often the rule matched, and the time its regex takes on its own
+    (each rule is also searched separately, at every position its context is searched at),
+    together with the number of characters it was searched over. A rule with a high time
+    per character is usually backtracking a lot, e.g. because of a bad lookahead.
+* Hotspots: the slowest single rule searches, with their line and column.
+
+The results are available as a text report, sorted by time, and as JSON-compatible data.
+From the command line:
+
+    python -m sublime_mock_api.syntax_profile <file> [--syntax NAME] [--json OUT]
+
+Profiling is slow, since every rule is searched on its own as well; the absolute times
+are only meaningful relative to each other.
+
+"""
+
+import heapq
+import json
+import re
+import sys
+from time import perf_counter
+
+from . import resources
+from . import settings
+from .regex_compat import translate
+from .syntax import load_syntax, syntax_for_file_name, tokenize_line
+from .syntax_tests import parse_syntax_test
+
+
+class SyntaxProfile(object):
+
+    def __init__(self, syntax, hotspot_count=20):
+        self.syntax = syntax
+        self.row = 0
+        self.lines = 0
+        self.seconds = 0.0
+        self.contexts = {}      # Context -> [searches, matches, seconds]
+        self.rules = {}         # Rule -> [searches, matches, seconds, characters]
+        self.hotspots = []      # Min-heap of (seconds, line, column, context name, rule)
+        self.hotspot_count = hotspot_count
+        self._regexes = {}
+
+    def _regex(self, rule, captures):
+        key = (rule, captures if rule.dynamic else None)
+        regex = self._regexes.get(key)
+        if regex is None:
+            pattern, _ = translate(rule.pattern, 0, (captures or ()) if rule.dynamic else None)
+            try:
+                regex = re.compile(pattern)
+            except re.error:
+                regex = re.compile("(?!)")
+            regex = self._regexes[key] = regex
+        return regex
+
+    def search(self, frame, line, pos, endpos):
+        """ Search the context of `frame`, like the tokenizer does, recording the statistics. """
+        context = frame.context
+        matcher = context.matcher(frame.captures)
+        start = perf_counter()
+        found = matcher.search(line, pos, endpos)
+        elapsed = perf_counter() - start
+        stats = self.contexts.get(context)
+        if stats is None:
+            stats = self.contexts[context] = [0, 0, 0.0]
+        stats[0] += 1
+        stats[2] += elapsed
+        if found is not None:
+            stats[1] += 1
+
+        for rule in context.rules:
+            regex = self._regex(rule, frame.captures)
+            start = perf_counter()
+            regex.search(line, pos, endpos)
+            elapsed = perf_counter() - start
+            rule_stats = self.rules.get(rule)
+            if rule_stats is None:
+                rule_stats = self.rules[rule] = [0, 0, 0.0, 0]
+            rule_stats[0] += 1
+            rule_stats[2] += elapsed
+            rule_stats[3] += endpos - pos
+            hotspot = (elapsed, self.row + 1, pos + 1, context.name, id(rule), rule)
+            if len(self.hotspots) < self.hotspot_count:
+                heapq.heappush(self.hotspots, hotspot)
+            elif elapsed > self.hotspots[0][0]:
+                heapq.heapreplace(self.hotspots, hotspot)
+        if found is not None:
+            self.rules[found[0]][1] += 1
+        return found
+
+    def profile(self, text):
+        """ Tokenize `text`, recording the statistics. """
+        state = self.syntax.initial_state()
+        start = perf_counter()
+        # Split only at "\n", keeping it on each line, like the Buffer and ScopeStore do.
+        lines = [line + "\n" for line in text.split("\n")]
+        lines[-1] = lines[-1][:-1]
+        for row, line in enumerate(lines):
+            self.row = row
+            _, state = tokenize_line(line, state, self)
+        self.seconds += perf_counter() - start
+        self.lines += len(lines)
+        return self
+
+    def to_json(self):
+        """ The results, as a dict of JSON-compatible data. """
+        contexts = [{
+            "context": context.name,
+            "syntax": context.syntax.name,
+            "searches": searches,
+            "matches": matches,
+            "seconds": seconds,
+        } for context, (searches, matches, seconds) in self.contexts.items()]
+        rules = [{
+            "pattern": rule.pattern,
+            "scope": " ".join(rule.scope),
+            "syntax": rule.syntax.name,
+            "searches": searches,
+            "matches": matches,
+            "seconds": seconds,
+            "characters": characters,
+            "us_per_kchar": 1e9 * seconds / characters if characters else 0.0,
+        } for rule, (searches, matches, seconds, characters) in self.rules.items()]
+        hotspots = [{
+            "seconds": seconds,
+            "line": line,
+            "column": column,
+            "context": context_name,
+            "pattern": rule.pattern,
+        } for seconds, line, column, context_name, _, rule in sorted(self.hotspots, reverse=True)]
+        return {
+            "syntax": self.syntax.name,
+            "lines": self.lines,
+            "seconds": self.seconds,
+            "contexts": sorted(contexts, key=lambda c: c["seconds"], reverse=True),
+            "rules": sorted(rules, key=lambda r: r["seconds"], reverse=True),
+            "hotspots": hotspots,
+        }
+
+    def report(self, limit=20):
+        """ The results, as a text report sorted by time. """
+        data = self.to_json()
+        out = ["Syntax {}: {} lines in {:.3f} s".format(data["syntax"], data["lines"], data["seconds"]), ""]
+        out.append("Contexts by time:")
+        out.append("{:>10}  {:>9}  {:>9}  {}".format("ms", "searches", "matches", "context"))
+        for c in data["contexts"][:limit]:
+            out.append("{:10.3f}  {:9d}  {:9d}  {}".format(
+                1000 * c["seconds"], c["searches"], c["matches"],
+                c["syntax"].rsplit("/", 1)[-1] + "#" + c["context"]))
+        out.append("")
+        out.append("Rules by time:")
+        out.append("{:>10}  {:>9}  {:>9}  {:>10}  {}".format("ms", "searches", "matches", "us/kchar", "pattern"))
+        for r in data["rules"][:limit]:
+            out.append("{:10.3f}  {:9d}  {:9d}  {:10.1f}  {}".format(
+                1000 * r["seconds"], r["searches"], r["matches"], r["us_per_kchar"], _shorten(r["pattern"])))
+        out.append("")
+        out.append("Slowest single searches:")
+        out.append("{:>10}  {:>12}  {}".format("ms", "line:col", "context / pattern"))
+        for h in data["hotspots"][:limit]:
+            out.append("{:10.3f}  {:>12}  {} / {}".format(
+                1000 * h["seconds"], "{}:{}".format(h["line"], h["column"]), h["context"], _shorten(h["pattern"])))
+        return "\n".join(out)
+
+
+def _shorten(pattern, width=60):
+    pattern = " ".join(pattern.split())
+    return pattern if len(pattern) <= width else pattern[:width - 3] + "..."
+
+
+def profile_syntax_definition(path, syntax_name=None):
+    """ Profile tokenizing the resource (or file) `path`. Returns a SyntaxProfile, or None.
+
+    The syntax is `syntax_name` if given, else the syntax named in a syntax test header,
+    else the syntax for the file extension.
+    """
+    text = resources.load_resource_or_file(path)
+    if text is None:
+        return None
+    if syntax_name is None:
+        parsed = parse_syntax_test(text)
+        syntax_name = parsed[0] if parsed else syntax_for_file_name(path)
+    syntax = load_syntax(syntax_name) if syntax_name else None
+    if syntax is None:
+        return None
+    return SyntaxProfile(syntax).profile(text)
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Profile a syntax definition on a file.")
+    parser.add_argument("path", help="The file to tokenize.")
+    parser.add_argument("--syntax", help="Resource name of the syntax (default: from the file).")
+    parser.add_argument("--json", help="Also write the results as JSON to this file.")
+    parser.add_argument("--limit", type=int, default=20, help="Number of entries in each table.")
+    parser.add_argument("--packages", help="Packages folder (default: settings.PACKAGES_PATH).")
+    args = parser.parse_args(argv)
+    if args.packages:
+        settings.PACKAGES_PATH = args.packages
+        resources.invalidate()
+    profile = profile_syntax_definition(args.path, args.syntax)
+    if profile is None:
+        print("Unable to load {} or its syntax".format(args.path), file=sys.stderr)
+        return 1
+    print(profile.report(args.limit))
+    if args.json:
+        with open(args.json, "w") as fp:
+            json.dump(profile.to_json(), fp, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
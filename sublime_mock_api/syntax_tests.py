@@ -0,0 +1,195 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Syntax tests, for `run_syntax_test()`, and a parallel runner for directories of syntax tests.
+
+A syntax test file starts with a header line naming the syntax to test, e.g.:
+
+    # SYNTAX TEST "Packages/Python/Python.sublime-syntax"
+    <!-- SYNTAX TEST "Packages/HTML/HTML.sublime-syntax" -->
+
+The header also defines the comment token ("#" and "<!--" above), and optionally the
+comment end token ("-->"). Lines starting with the comment token followed by `^` or `<-`
+are assertions about the closest preceding line that is not an assertion (this may be a
+plain comment line):
+
+    def foo():
+    #   ^^^ entity.name.function        Each ^ checks the character in that column.
+    # <- storage.type                   Checks the column of the comment token.
+
+The whole file (including the assertion lines) is tokenized with the mock tokenizer.
+`run_syntax_test()` returns (number of assertions, list of failure messages), like the
+`sublime_api` function used by Sublime Text's "run_syntax_tests" command.
+
+The runner can be used from the command line, running the tests across a process pool:
+
+    python -m sublime_mock_api.syntax_tests <folder or file>... [-j PROCESSES]
+
+Since worker processes may not share the resources of the parent process, the folders
+in `settings.PACKAGES_PATH` and `settings.INSTALLED_PACKAGES_PATH` and the resources
+added with `resources.add_resource()` are passed to the workers explicitly.
+
+"""
+
+import os
+import re
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from . import resources
+from . import settings
+from .buffer import Buffer
+from .scope_selector import score_selector
+from .scope_store import ScopeStore
+from .syntax import load_syntax
+
+_HEADER = re.compile(r'^(\s*)(\S+)\s+SYNTAX TEST\s+(?:[\w-]+\s+)*"([^"]+)"\s*(\S+)?')
+
+# An assertion about the characters in columns [begin, end) of a tested line.
+Assertion = namedtuple("Assertion", "line row begin end selector")
+SyntaxTestResult = namedtuple("SyntaxTestResult", "path assertions failures seconds")
+
+
+def parse_syntax_test(text):
+    """ Parse a syntax test, returning (syntax resource name, list of Assertions), or None if
+    the text doesn't start with a syntax test header. Rows and columns are zero-based.
+    """
+    lines = text.split("\n")
+    m = _HEADER.match(lines[0]) if lines else None
+    if m is None:
+        return None
+    comment, syntax_name, comment_end = m.group(2), m.group(3), m.group(4)
+    assertions = []
+    tested = 0
+    for row, line in enumerate(lines[1:], 1):
+        stripped = line.lstrip()
+        if not stripped.startswith(comment):
+            tested = row
+            continue
+        token_col = len(line) - len(stripped)
+        rest_col = token_col + len(comment)
+        rest = line[rest_col:]
+        body = rest.lstrip()
+        col = rest_col + len(rest) - len(body)
+        if body.startswith("<-"):
+            begin, end = token_col, token_col + 1
+            selector = body[2:]
+        elif body.startswith("^"):
+            carets = len(body) - len(body.lstrip("^"))
+            begin, end = col, col + carets
+            selector = body[carets:]
+        else:
+            # A comment that isn't an assertion is tested like any other line.
+            tested = row
+            continue
+        if comment_end and comment_end in selector:
+            selector = selector[:selector.index(comment_end)]
+        assertions.append(Assertion(row, tested, begin, end, selector.strip()))
+    return syntax_name, assertions
+
+
+def run_syntax_test_text(path, text):
+    """ Run the syntax test in `text`. Returns (number of assertions, list of failure messages). """
+    parsed = parse_syntax_test(text)
+    if parsed is None:
+        return 0, ["{}: not a syntax test, missing the SYNTAX TEST header".format(path)]
+    syntax_name, assertions = parsed
+    if load_syntax(syntax_name) is None:
+        return 0, ["{}: unable to load syntax {}".format(path, syntax_name)]
+    buffer = Buffer(text)
+    scopes = ScopeStore(buffer, {"syntax": syntax_name})
+    count = 0
+    failures = []
+    for assertion in assertions:
+        line_start = buffer.line_start(assertion.row)
+        line_end = buffer.line_end(assertion.row)
+        for col in range(assertion.begin, assertion.end):
+            count += 1
+            pt = line_start + col
+            scope = scopes.scope_name(pt) if pt <= line_end else ""
+            if pt > line_end or not score_selector(scope, assertion.selector):
+                failures.append("{}:{}:{}: [{}] does not match scope [{}]".format(
+                    path, assertion.row + 1, col + 1, assertion.selector, scope.strip()))
+    return count, failures
+
+
+def run_syntax_test(path):
+    """ Run the syntax test in the resource (or file) `path`. """
+    text = resources.load_resource_or_file(path)
+    if text is None:
+        return 0, ["{}: unable to read the file".format(path)]
+    return run_syntax_test_text(path, text)
+
+
+def find_syntax_tests(paths):
+    """ The syntax test files (named syntax_test_*) in the given files and folders. """
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                found.extend(os.path.join(dirpath, f) for f in sorted(filenames) if f.startswith("syntax_test_"))
+        else:
+            found.append(path)
+    return found
+
+
+def _timed_run(path):
+    start = time.perf_counter()
+    assertions, failures = run_syntax_test(path)
+    return SyntaxTestResult(path, assertions, failures, time.perf_counter() - start)
+
+
+def run_syntax_tests(paths, processes=None):
+    """ Run the syntax tests in the given files and folders across a process pool.
+
+    Returns a list of SyntaxTestResult, in the order of the test files.
+    With processes=1, the tests are run in this process.
+    """
+    tests = find_syntax_tests(paths)
+    if processes == 1 or len(tests) <= 1:
+        return [_timed_run(path) for path in tests]
+    with ProcessPoolExecutor(processes, initializer=resources.set_paths,
+                             initargs=resources.worker_paths()) as pool:
+        return list(pool.map(_timed_run, tests))
+
+
+def print_report(results, file=None):
+    """ Print the failures and the per-file timing of syntax test results. Returns True if all passed. """
+    file = file or sys.stdout
+    total = sum(r.assertions for r in results)
+    failed = sum(len(r.failures) for r in results)
+    for result in results:
+        for failure in result.failures:
+            print(failure, file=file)
+    print("", file=file)
+    for result in sorted(results, key=lambda r: r.seconds, reverse=True):
+        print("{:8.3f} s  {:6d} assertions  {:4d} failed  {}".format(
+            result.seconds, result.assertions, len(result.failures), result.path), file=file)
+    print("", file=file)
+    if failed:
+        print("FAILED: {} of {} assertions in {} files failed".format(
+            failed, total, sum(1 for r in results if r.failures)), file=file)
+    else:
+        print("Success: {} assertions in {} files passed".format(total, len(results)), file=file)
+    return not failed
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Run Sublime Text syntax tests with the mock tokenizer.")
+    parser.add_argument("paths", nargs="+", help="Syntax test files, or folders to search for syntax_test_* files.")
+    parser.add_argument("-j", "--processes", type=int, default=None, help="Number of worker processes.")
+    parser.add_argument("--packages", help="Packages folder (default: settings.PACKAGES_PATH).")
+    args = parser.parse_args(argv)
+    if args.packages:
+        settings.PACKAGES_PATH = args.packages
+        resources.invalidate()
+    return 0 if print_report(run_syntax_tests(args.paths, args.processes)) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Tests for the character classes behind view.classify(), find_by_class(), expand_by_class() and word().
+
+"""
+
+import random
+
+import pytest
+
+import sublime
+
+from . import char_classes
+from .char_classes import classify, find_by_class, word_from_point, word_from_region
+from .views import get_view
+
+VIEW_ID = 601
+SEPARATORS = "./\\()\"'-:,.;<>~!@#$%^&*|+=[]{}`~?"
+
+
+def test_classify():
+    text = "fooBar_baz(x)\n\nend"
+    assert classify(text, 0, SEPARATORS) == (
+        sublime.CLASS_WORD_START | sublime.CLASS_SUB_WORD_START | sublime.CLASS_LINE_START)
+    assert classify(text, 3, SEPARATORS) == sublime.CLASS_SUB_WORD_START | sublime.CLASS_SUB_WORD_END
+    assert classify(text, 6, SEPARATORS) == sublime.CLASS_SUB_WORD_END
+    assert classify(text, 10, SEPARATORS) == (
+        sublime.CLASS_WORD_END | sublime.CLASS_SUB_WORD_END | sublime.CLASS_PUNCTUATION_START)
+    assert classify(text, 14, SEPARATORS) == (
+        sublime.CLASS_LINE_START | sublime.CLASS_LINE_END | sublime.CLASS_EMPTY_LINE)
+    assert classify(text, len(text), SEPARATORS) & sublime.CLASS_LINE_END
+
+
+def _find_by_class_reference(text, pt, forward, classes):
+    points = range(pt + 1, len(text) + 1) if forward else range(pt - 1, -1, -1)
+    for p in points:
+        if classify(text, p, SEPARATORS) & classes:
+            return p
+    return len(text) if forward else 0
+
+
+@pytest.mark.parametrize("classes", [
+    sublime.CLASS_WORD_START,
+    sublime.CLASS_WORD_END | sublime.CLASS_PUNCTUATION_START,
+    sublime.CLASS_SUB_WORD_START | sublime.CLASS_LINE_END,
+    sublime.CLASS_EMPTY_LINE,
+])
+def test_find_by_class_matches_classify(monkeypatch, classes):
+    # A small window makes the searches grow it several times.
+    monkeypatch.setattr(char_classes, "WINDOW_SIZE", 4)
+    rng = random.Random(classes)
+    text = "".join(rng.choice(["foo", "Bar", "_", " ", "\n", "(", ".", "x"]) for _ in range(200))
+    for pt in range(len(text) + 1):
+        for forward in (True, False):
+            assert (find_by_class(text, pt, forward, classes, SEPARATORS) ==
+                    _find_by_class_reference(text, pt, forward, classes)), (pt, forward)
+
+
+def test_find_by_class_without_classes():
+    assert find_by_class("foo bar", 2, True, 0, SEPARATORS) == 7
+    assert find_by_class("foo bar", 2, False, 0, SEPARATORS) == 0
+
+
+def test_word():
+    text = "foo.bar  baz\n"
+    assert word_from_point(text, 1, SEPARATORS) == (0, 3)
+    assert word_from_point(text, 3, SEPARATORS) == (0, 3)
+    assert word_from_point(text, 4, SEPARATORS) == (4, 7)
+    assert word_from_point(text, 8, SEPARATORS) == (7, 9)
+    assert word_from_region(text, 5, 1, SEPARATORS) == (0, 7)
+    # Without "." as a separator, foo.bar is one word.
+    assert word_from_point(text, 1, " ") == (0, 7)
+
+
+@pytest.fixture
+def view():
+    mock_view = get_view(VIEW_ID)
+    mock_view.buffer.erase(0, len(mock_view.buffer))
+    mock_view.buffer.insert(0, "foo-bar baz")
+    mock_view.settings().pop("word_separators", None)
+    return sublime.View(VIEW_ID)
+
+
+def test_view_uses_word_separators_setting(view):
+    assert view.word(1) == sublime.Region(0, 3)
+    assert view.find_by_class(0, True, sublime.CLASS_WORD_END) == 3
+    view.settings().set("word_separators", " ")
+    assert view.word(1) == sublime.Region(0, 7)
+    assert view.find_by_class(0, True, sublime.CLASS_WORD_END) == 7
+    # Explicit separators override the setting.
+    assert view.find_by_class(0, True, sublime.CLASS_WORD_END, separators="-") == 3
+    assert view.expand_by_class(sublime.Region(5, 5), sublime.CLASS_WORD_START | sublime.CLASS_WORD_END) == (
+        sublime.Region(0, 7))
@@ -0,0 +1,107 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Tests for resolving colors and scope styles from .sublime-color-scheme resources.
+
+"""
+
+import json
+
+import pytest
+
+import sublime
+
+from . import color_scheme
+from . import resources
+from .color_scheme import format_color, load_color_scheme, parse_color
+from .views import get_view
+
+SCHEME = "Test Colors.sublime-color-scheme"
+BASE = "Packages/Zeta/Test Colors.sublime-color-scheme"
+USER = "Packages/User/Test Colors.sublime-color-scheme"
+
+
+def _color(value, variables=None):
+    return format_color(parse_color(value, variables))
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("#abc", "#aabbcc"),
+    ("#AABBCC80", "#aabbcc80"),
+    ("red", "#ff0000"),
+    ("rgb(255, 0, 0)", "#ff0000"),
+    ("rgba(0, 0, 255, 0.5)", "#0000ff80"),
+    ("rgb(100%, 50%, 0%)", "#ff8000"),
+    ("hsl(120, 100%, 50%)", "#00ff00"),
+    ("hsla(240deg, 100%, 50%, 0.25)", "#0000ff40"),
+    ("var(accent)", "#336699"),
+    ("var(alias)", "#336699"),
+    ("color(var(accent) alpha(0.5))", "#33669980"),
+    ("color(#000 blend(#fff 25%))", "#bfbfbf"),
+    ("color(#000 blenda(#ffffff00 50%))", "#80808080"),
+    ("color(#808080 lightness(+ 10%))", "#9a9a9a"),
+    ("color(hsl(0, 100%, 50%) saturation(0%))", "#808080"),
+    ("color(color(white a(0.5)) blend(black 50%))", "#80808080"),
+])
+def test_parse_color(value, expected):
+    assert _color(value, {"accent": "#336699", "alias": "var(accent)"}) == expected
+
+
+@pytest.mark.parametrize("value", ["", "#12", "#ggg", "rgb(1)", "nope", "var(missing)", "var(loop)", None])
+def test_invalid_colors(value):
+    assert parse_color(value, {"loop": "var(loop)"}) is None
+
+
+@pytest.fixture
+def scheme():
+    resources.add_resource(BASE, json.dumps({
+        "variables": {"fg": "#eeeeee", "accent": "#ff0000"},
+        "globals": {"foreground": "var(fg)", "background": "#222", "caret": "color(var(accent) alpha(0.5))"},
+        "rules": [
+            {"scope": "string", "foreground": "var(accent)"},
+            {"scope": "string.quoted", "font_style": "italic"},
+            {"scope": "comment, string.regexp", "foreground": "#888", "font_style": "bold underline"},
+        ],
+    }))
+    resources.add_resource(USER, json.dumps({
+        "variables": {"accent": "#00ff00"},
+        "rules": [{"scope": "source string", "background": "#000"}],
+    }))
+    return load_color_scheme(SCHEME)
+
+
+def test_user_scheme_is_merged_last(scheme):
+    assert color_scheme.resource_names(SCHEME) == [BASE, USER]
+    assert color_scheme.resource_names(BASE) == [BASE, USER]
+    assert scheme.variables == {"fg": "#eeeeee", "accent": "#00ff00"}
+    assert scheme.style() == {"foreground": "#eeeeee", "background": "#222222", "caret": "#00ff0080"}
+
+
+def test_style_for_scope(scheme):
+    assert scheme.style_for_scope("source.python") == {"foreground": "#eeeeee", "bold": False, "italic": False}
+    assert scheme.style_for_scope("source.python string.quoted.double") == {
+        "foreground": "#00ff00", "background": "#000000", "bold": False, "italic": True}
+    assert scheme.style_for_scope("text.plain string.regexp") == {
+        "foreground": "#888888", "bold": True, "italic": False, "underline": True}
+    # The returned styles are copies of the cached ones.
+    scheme.style_for_scope("text.plain")["foreground"] = "changed"
+    assert scheme.style_for_scope("text.plain")["foreground"] == "#eeeeee"
+
+
+def test_schemes_follow_resource_changes(scheme):
+    assert load_color_scheme(SCHEME) is scheme
+    resources.add_resource(USER, json.dumps({"variables": {"accent": "#0000ff"}}))
+    reloaded = load_color_scheme(SCHEME)
+    assert reloaded is not scheme
+    assert reloaded.style_for_scope("string")["foreground"] == "#0000ff"
+
+
+def test_view_style_follows_the_color_scheme_setting(scheme):
+    view = sublime.View(641)
+    view.settings().set("color_scheme", SCHEME)
+    assert view.style()["foreground"] == "#eeeeee"
+    assert view.style_for_scope("string")["foreground"] == "#00ff00"
+    view.settings().set("color_scheme", "Missing.sublime-color-scheme")
+    assert view.style_for_scope("string")["foreground"] == "#000000"
+    assert get_view(641).color_scheme().name == "Missing.sublime-color-scheme"
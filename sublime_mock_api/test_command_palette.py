@@ -0,0 +1,113 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Tests for the command palette: visibility, enabled state, descriptions and the item cache.
+
+"""
+
+import json
+
+import pytest
+
+import sublime
+import sublime_plugin
+
+from . import resources
+from .views import get_view
+from .windows import get_window
+
+VIEW_ID = 801
+WINDOW_ID = 8
+RESOURCE = "Packages/PaletteTest/Default.sublime-commands"
+
+
+class PaletteHiddenCommand(sublime_plugin.TextCommand):
+    def is_visible(self):
+        return False
+
+
+class PaletteDisabledCommand(sublime_plugin.WindowCommand):
+    def is_enabled(self):
+        return False
+
+
+class PaletteDescribedCommand(sublime_plugin.TextCommand):
+    calls = 0
+
+    def description(self, name="world"):
+        PaletteDescribedCommand.calls += 1
+        return "Hello {}".format(name)
+
+
+class PalettePlainCommand(sublime_plugin.ApplicationCommand):
+    pass
+
+
+class PaletteFailingCommand(sublime_plugin.TextCommand):
+    def is_visible(self):
+        raise RuntimeError("failing on purpose")
+
+
+CLASSES = [PaletteHiddenCommand, PaletteDisabledCommand, PaletteDescribedCommand,
+           PalettePlainCommand, PaletteFailingCommand]
+ENTRIES = [
+    {"caption": "Hidden", "command": "palette_hidden"},
+    {"caption": "Disabled", "command": "palette_disabled"},
+    {"command": "palette_described", "args": {"name": "palette"}},
+    {"caption": "Plain", "command": "palette_plain"},
+    {"caption": "Failing", "command": "palette_failing"},
+    {"caption": "Missing", "command": "palette_missing"},
+]
+
+
+@pytest.fixture
+def window():
+    sublime_plugin.text_command_classes.extend([PaletteHiddenCommand, PaletteDescribedCommand, PaletteFailingCommand])
+    sublime_plugin.window_command_classes.append(PaletteDisabledCommand)
+    sublime_plugin.application_command_classes.append(PalettePlainCommand)
+    resources.add_resource(RESOURCE, json.dumps(ENTRIES))
+    window = get_window(WINDOW_ID)
+    window.active_view_id = VIEW_ID
+    yield window
+    resources.add_resource(RESOURCE, "[]")
+    for classes in sublime_plugin.all_command_classes:
+        for class_ in CLASSES:
+            if class_ in classes:
+                classes.remove(class_)
+    sublime_plugin.invalidate_command_registry()
+
+
+def _items(window):
+    return [item for item in window.command_palette.items(WINDOW_ID, VIEW_ID) if item.command.startswith("palette_")]
+
+
+def test_palette_items(window):
+    items = _items(window)
+    assert [(item.caption, item.kind, item.enabled) for item in items] == [
+        ("Disabled", "window", False),
+        ("Hello palette", "text", True),
+        ("Plain", "application", True),
+    ]
+    assert items[1].description == "Hello palette"
+
+
+def test_show_overlay_evaluates_the_palette(window):
+    sublime.Window(WINDOW_ID).run_command("show_overlay", {"overlay": "command_palette"})
+    assert "Plain" in [item.caption for item in window.palette_items]
+    sublime.Window(WINDOW_ID).run_command("hide_overlay")
+    assert window.palette_items is None
+
+
+def test_items_are_cached_until_the_view_or_resources_change(window):
+    _items(window)
+    calls = PaletteDescribedCommand.calls
+    _items(window)
+    assert PaletteDescribedCommand.calls == calls
+    get_view(VIEW_ID).buffer.insert(0, "x")
+    _items(window)
+    assert PaletteDescribedCommand.calls == calls + 1
+    resources.add_resource(RESOURCE, json.dumps(ENTRIES[3:4]))
+    assert [item.caption for item in _items(window)] == ["Plain"]
+    window.command_palette.items(WINDOW_ID, VIEW_ID, refresh=True)
+    assert PaletteDescribedCommand.calls == calls + 1
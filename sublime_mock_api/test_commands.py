@@ -0,0 +1,191 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Tests for command dispatch: listeners, enabled state, failures and edit tokens.
+
+"""
+
+import pytest
+
+import sublime
+import sublime_plugin
+
+from . import commands
+from .views import get_view
+from .windows import get_window
+
+VIEW_ID = 701
+WINDOW_ID = 7
+
+
+class MockInsertTextCommand(sublime_plugin.TextCommand):
+    edits = []
+
+    def run(self, edit, characters=""):
+        self.edits.append(edit)
+        self.view.insert(edit, 0, characters)
+
+
+class MockDisabledTextCommand(sublime_plugin.TextCommand):
+    def is_enabled(self):
+        return False
+
+
+class MockFailingTextCommand(sublime_plugin.TextCommand):
+    def run(self, edit):
+        raise RuntimeError("failing on purpose")
+
+
+class MockNoopWindowCommand(sublime_plugin.WindowCommand):
+    def run(self):
+        pass
+
+
+class Listener(object):
+    def __init__(self):
+        self.post = []
+
+    def on_text_command(self, view, name, args):
+        if name == "mock_alias":
+            return "mock_insert_text", {"characters": "alias "}
+
+    def on_post_text_command(self, view, name, args):
+        self.post.append(name)
+
+    def on_post_window_command(self, window, name, args):
+        self.post.append(name)
+
+
+@pytest.fixture
+def listener():
+    classes = [MockInsertTextCommand, MockDisabledTextCommand, MockFailingTextCommand]
+    sublime_plugin.text_command_classes.extend(classes)
+    sublime_plugin.window_command_classes.append(MockNoopWindowCommand)
+    sublime_plugin.invalidate_command_registry()
+    listener = Listener()
+    for event in ("on_text_command", "on_post_text_command", "on_post_window_command"):
+        sublime_plugin.all_callbacks[event].append(listener)
+    view = get_view(VIEW_ID)
+    view.buffer.erase(0, len(view.buffer))
+    get_window(WINDOW_ID).active_view_id = VIEW_ID
+    yield listener
+    for event in ("on_text_command", "on_post_text_command", "on_post_window_command"):
+        sublime_plugin.all_callbacks[event].remove(listener)
+    for class_ in classes:
+        sublime_plugin.text_command_classes.remove(class_)
+    sublime_plugin.window_command_classes.remove(MockNoopWindowCommand)
+    sublime_plugin.invalidate_command_registry()
+
+
+def test_dispatch_results(listener):
+    assert commands.run_text_command(VIEW_ID, "mock_insert_text", {"characters": "x"}) == commands.RAN
+    assert commands.run_text_command(VIEW_ID, "mock_disabled_text") == commands.DISABLED
+    assert commands.run_text_command(VIEW_ID, "mock_failing_text") == commands.FAILED
+    assert commands.run_text_command(VIEW_ID, "mock_missing") == commands.NOT_FOUND
+    # The post hooks only run for commands that ran without an exception.
+    assert listener.post == ["mock_insert_text"]
+    assert get_view(VIEW_ID).buffer.text == "x"
+
+
+def test_window_command_falls_back_to_text_command(listener):
+    assert commands.run_window_command(WINDOW_ID, VIEW_ID, "mock_noop_window") == commands.RAN
+    assert commands.run_window_command(WINDOW_ID, VIEW_ID, "mock_insert_text", {"characters": "y"}) == commands.RAN
+    assert commands.run_window_command(WINDOW_ID, 0, "mock_insert_text") == commands.NOT_FOUND
+    assert listener.post == ["mock_noop_window", "mock_insert_text"]
+    assert get_view(VIEW_ID).buffer.text == "y"
+
+
+def test_on_text_command_rewrites_command(listener):
+    sublime.View(VIEW_ID).run_command("mock_alias")
+    assert get_view(VIEW_ID).buffer.text == "alias "
+    assert listener.post == ["mock_insert_text"]
+
+
+def test_disabled_and_missing_commands_are_reported(listener, capsys):
+    view = sublime.View(VIEW_ID)
+    view.run_command("mock_disabled_text")
+    assert "Text Command mock_disabled_text is disabled" in capsys.readouterr().out
+    view.run_command("mock_missing")
+    assert "No Text Command mock_missing" in capsys.readouterr().out
+    sublime.Window(WINDOW_ID).run_command("mock_disabled_text")
+    out = capsys.readouterr().out
+    assert "is disabled" in out and "No Window Command" not in out
+
+
+def test_edit_can_not_be_used_after_its_command_returned(listener):
+    view = sublime.View(VIEW_ID)
+    MockInsertTextCommand.edits[:] = []
+    view.run_command("mock_insert_text", {"characters": "a"})
+    edit = MockInsertTextCommand.edits[-1]
+    with pytest.raises(ValueError):
+        view.insert(edit, 0, "b")
+    assert view.substr(sublime.Region(0, view.size())) == "a"
+
+
+def test_direct_run_and_edits_outside_commands(listener):
+    view = sublime.View(VIEW_ID)
+    MockInsertTextCommand(view).run_(1, {"characters": "direct "})
+    view.insert(sublime.Edit(1), view.size(), "edit")
+    assert get_view(VIEW_ID).buffer.text == "direct edit"
+    assert not view.is_in_edit()
+
+
+def test_command_name():
+    assert sublime_plugin.command_name(MockInsertTextCommand) == "mock_insert_text"
+    assert sublime_plugin.command_name(MockNoopWindowCommand) == "mock_noop_window"
+
+
+def test_registry_sees_classes_replaced_in_place(listener):
+    def run(self, edit, characters=""):
+        self.view.insert(edit, 0, "replaced")
+
+    replacement = type("MockInsertTextCommand", (sublime_plugin.TextCommand,), {"run": run})
+    classes = sublime_plugin.text_command_classes
+    sublime.View(VIEW_ID).run_command("mock_insert_text", {"characters": "a"})
+    classes[classes.index(MockInsertTextCommand)] = replacement
+    try:
+        sublime.View(VIEW_ID).run_command("mock_insert_text")
+        assert get_view(VIEW_ID).buffer.text == "replaceda"
+    finally:
+        classes[classes.index(replacement)] = MockInsertTextCommand
+
+
+def test_lazy_command_list(listener):
+    created = []
+
+    def instance(class_):
+        created.append(class_)
+        return sublime_plugin.text_command(VIEW_ID, class_)
+
+    lazy = sublime_plugin.LazyCommandList([MockInsertTextCommand, MockDisabledTextCommand], instance)
+    assert len(lazy) == 2 and created == []
+    assert isinstance(lazy[1], MockDisabledTextCommand)
+    assert [type(cmd) for cmd in lazy[:1]] == [MockInsertTextCommand]
+    assert [type(cmd) for cmd in lazy] == [MockInsertTextCommand, MockDisabledTextCommand]
+    # Instances are created once per class and view.
+    assert lazy[0] is lazy[0]
+    assert len(set(map(id, lazy))) == 2
+
+
+def test_command_instances_are_dropped_with_their_window_and_view(listener):
+    view_cmd = sublime_plugin.find_text_command(VIEW_ID, "mock_insert_text")
+    assert sublime_plugin.find_text_command(VIEW_ID, "mock_insert_text") is view_cmd
+    window_cmd = sublime_plugin.find_window_command(WINDOW_ID, "mock_noop_window")
+    sublime_plugin.detach_view(sublime.View(VIEW_ID))
+    sublime_plugin.detach_window(WINDOW_ID)
+    assert VIEW_ID not in sublime_plugin.text_commands
+    assert WINDOW_ID not in sublime_plugin.window_commands
+    assert sublime_plugin.find_text_command(VIEW_ID, "mock_insert_text") is not view_cmd
+    assert sublime_plugin.find_window_command(WINDOW_ID, "mock_noop_window") is not window_cmd
+
+
+def test_unloaded_command_instances_are_forgotten(listener):
+    sublime_plugin.find_text_command(VIEW_ID, "mock_failing_text")
+    sublime_plugin.text_command_classes.remove(MockFailingTextCommand)
+    try:
+        sublime_plugin.invalidate_command_registry()
+        assert MockFailingTextCommand not in sublime_plugin.text_commands[VIEW_ID]
+        assert sublime_plugin.find_text_command(VIEW_ID, "mock_failing_text") is None
+    finally:
+        sublime_plugin.text_command_classes.append(MockFailingTextCommand)
@@ -0,0 +1,80 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Tests for merging the completions of the on_query_completions listeners.
+
+"""
+
+import pytest
+
+import sublime
+import sublime_plugin
+
+VIEW_ID = 401
+
+
+def test_merge_without_limit_keeps_everything():
+    results = [[["foo\tfunction", "foo()"], ["bar"]], [("foo\tvariable", "foo"), ["bar"]]]
+    assert sublime_plugin.merge_completions(results, "f") == [
+        ("foo\tfunction", "", "foo()"), ("bar", "", ""), ("foo\tvariable", "", "foo"), ("bar", "", "")]
+
+
+def test_merge_with_limit_dedups_trigger_words_and_ranks():
+    results = [[["xfoo", "xfoo"], ["Foo\tclass", "Foo"]], (c for c in [["foo\tfunction", "foo()"],
+                                                                       ["foo\tvariable", "foo"]])]
+    assert sublime_plugin.merge_completions(results, "foo", limit=10) == [
+        ("foo\tfunction", "", "foo()"), ("Foo\tclass", "", "Foo"), ("xfoo", "", "xfoo")]
+    assert sublime_plugin.merge_completions([[["b", "b"], ["a", "a"]]], "a", limit=1) == [("a", "", "a")]
+
+
+def test_merge_with_limit_is_lazy():
+    consumed = []
+
+    def completions():
+        for i in range(5):
+            consumed.append(i)
+            yield ["w{}".format(i), "w"]
+
+    merged = sublime_plugin.merge_completions([completions()], "w", limit=2)
+    assert merged == [("w0", "", "w"), ("w1", "", "w")]
+    # The generator is consumed in full, since a later completion may rank higher.
+    assert consumed == [0, 1, 2, 3, 4]
+
+
+class Listener(object):
+    def __init__(self, result):
+        self.result = result
+
+    def on_query_completions(self, view, prefix, locations):
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+@pytest.fixture
+def listeners():
+    added = []
+
+    def add(result):
+        listener = Listener(result)
+        sublime_plugin.all_callbacks['on_query_completions'].append(listener)
+        added.append(listener)
+
+    yield add
+    for listener in added:
+        sublime_plugin.all_callbacks['on_query_completions'].remove(listener)
+
+
+def test_on_query_completions(listeners, monkeypatch):
+    listeners([["a\thint", "a"]])
+    listeners(([["a\tother", "a2"]], sublime.INHIBIT_WORD_COMPLETIONS))
+    listeners(RuntimeError("failing on purpose"))
+    listeners(c for c in [["b", "b"]])
+    completions, flags = sublime_plugin.on_query_completions(VIEW_ID, "a", [0])
+    assert completions == [("a\thint", "", "a"), ("a\tother", "", "a2"), ("b", "", "b")]
+    assert flags == sublime.INHIBIT_WORD_COMPLETIONS
+    monkeypatch.setattr(sublime_plugin, "max_completions", 5)
+    listeners(c for c in [["c", "c"]])
+    completions, _ = sublime_plugin.on_query_completions(VIEW_ID, "a", [0])
+    assert completions == [("a\thint", "", "a"), ("c", "", "c")]
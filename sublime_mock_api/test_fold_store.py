@@ -0,0 +1,72 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Tests for the FoldStore: merging folds, unfolding, and following buffer edits.
+
+"""
+
+import random
+
+from .buffer import Buffer
+from .fold_store import FoldStore
+
+
+def _merge(regions):
+    """ Naive model: merge overlapping (not just touching) regions. """
+    merged = []
+    for begin, end in sorted((min(r), max(r)) for r in regions if r[0] != r[1]):
+        if merged and merged[-1][1] > begin:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((begin, end))
+    return merged
+
+
+def test_fold_merges_overlapping_and_nested():
+    store = FoldStore()
+    assert store.fold([(10, 20)])
+    assert store.fold([(30, 25)])
+    assert not store.fold([(12, 18)])
+    assert not store.fold([(5, 5)])
+    assert store.fold([(20, 22)])
+    assert store.folds() == [(10, 20), (20, 22), (25, 30)]
+    assert store.fold([(15, 26)])
+    assert store.folds() == [(10, 30)]
+
+
+def test_single_and_batch_folds_match_naive_model():
+    rnd = random.Random(0)
+    regions = [(a, a + rnd.randint(0, 30)) for a in (rnd.randrange(2000) for _ in range(300))]
+    single = FoldStore()
+    for region in regions:
+        single.fold([region])
+    batch = FoldStore()
+    batch.fold(regions[:100])
+    batch.fold(regions[100:])
+    assert single.folds() == batch.folds() == _merge(regions)
+
+
+def test_unfold():
+    store = FoldStore()
+    store.fold([(0, 5), (10, 15), (20, 25)])
+    assert store.unfold([(12, 22)]) == [(10, 15), (20, 25)]
+    assert store.unfold([(5, 5)]) == [(0, 5)]
+    assert store.folds() == []
+
+
+def test_folds_follow_edits():
+    buffer = Buffer("0123456789" * 3)
+    store = FoldStore()
+    buffer.add_listener(store)
+    store.fold([(2, 5), (10, 20)])
+    buffer.insert(0, "ab")
+    assert store.is_folded(5, 7)
+    assert not store.is_folded(7, 13)
+    # Text inserted at the fold boundaries isn't folded.
+    buffer.insert(4, "x")
+    buffer.insert(8, "y")
+    assert store.folds() == [(5, 8), (14, 24)]
+    # A fold whose text is erased entirely is removed.
+    buffer.erase(4, 10)
+    assert store.folds() == [(8, 18)]
@@ -0,0 +1,169 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Tests for the keymap: load order and precedence of the key bindings, and context evaluation.
+
+"""
+
+import json
+
+import pytest
+
+from . import keymap
+from . import resources
+from .keymap import Keymap, KeyResolver, normalize_key
+from .views import get_view
+
+VIEW_ID = 901
+
+
+def _binding(keys, command, context=None):
+    entry = {"keys": keys, "command": command}
+    if context is not None:
+        entry["context"] = context
+    return entry
+
+
+@pytest.fixture
+def view():
+    view = get_view(VIEW_ID)
+    view.buffer.erase(0, len(view.buffer))
+    view.buffer.insert(0, "foo(bar)\nbaz")
+    view.selection.clear()
+    view.selection.add(4, 4)
+    view.settings().pop("my_flag", None)
+    return view
+
+
+def _resolve(bindings, key, view_id=VIEW_ID):
+    result = KeyResolver(Keymap(bindings), view_id=view_id).feed(key)
+    return result.command if result not in (None, True) else result
+
+
+def test_normalize_key():
+    assert normalize_key("shift+ctrl+P") == "ctrl+shift+p"
+    assert normalize_key("ctrl+P") == "ctrl+shift+p"
+    assert normalize_key("primary+k") == "ctrl+k"
+    assert normalize_key("primary+k", platform="osx") == "super+k"
+    assert normalize_key("ctrl++") == "ctrl++"
+    assert normalize_key("Enter") == "enter"
+
+
+def test_load_order():
+    keymaps = {
+        "Packages/Default/Default.sublime-keymap": [
+            _binding(["ctrl+k"], "default_generic"), _binding(["ctrl+j"], "default")],
+        "Packages/Default/Default (Linux).sublime-keymap": [_binding(["ctrl+k"], "default_platform")],
+        "Packages/Abc/Default.sublime-keymap": [
+            _binding(["ctrl+j"], "abc"), _binding(["ctrl+u"], "abc"), _binding(["ctrl+l"], "abc_generic")],
+        "Packages/Abc/Default (Linux).sublime-keymap": [_binding(["ctrl+l"], "abc_platform")],
+        "Packages/Abc/Default (OSX).sublime-keymap": [_binding(["ctrl+l"], "abc_osx")],
+        "Packages/User/Default.sublime-keymap": [_binding(["ctrl+u"], "user")],
+    }
+    for name, bindings in keymaps.items():
+        resources.add_resource(name, json.dumps(bindings))
+    keymap.clear_cache()
+    try:
+        names = [n for n in keymap.keymap_resources("linux") if n in keymaps]
+        assert names == [
+            "Packages/Default/Default.sublime-keymap",
+            "Packages/Default/Default (Linux).sublime-keymap",
+            "Packages/Abc/Default.sublime-keymap",
+            "Packages/Abc/Default (Linux).sublime-keymap",
+            "Packages/User/Default.sublime-keymap",
+        ]
+        resolver = KeyResolver(keymap.get_keymap("linux"), view_id=VIEW_ID)
+        # The platform keymap overrides the generic one of the same package,
+        assert resolver.feed("ctrl+k").command == "default_platform"
+        assert resolver.feed("ctrl+l").command == "abc_platform"
+        # other packages override the Default package, and User overrides them all.
+        assert resolver.feed("ctrl+j").command == "abc"
+        assert resolver.feed("ctrl+u").command == "user"
+    finally:
+        for name in keymaps:
+            resources.add_resource(name, "[]")
+        keymap.clear_cache()
+
+
+def test_later_binding_wins_unless_its_context_fails(view):
+    bindings = [
+        _binding(["tab"], "first"),
+        _binding(["tab"], "second", [{"key": "setting.my_flag"}]),
+    ]
+    assert _resolve(bindings, "tab") == "first"
+    view.settings()["my_flag"] = True
+    assert _resolve(bindings, "tab") == "second"
+
+
+def test_key_sequence(view):
+    bindings = [_binding(["ctrl+k", "ctrl+u"], "upper_case"), _binding(["a"], "a")]
+    resolver = KeyResolver(Keymap(bindings), view_id=VIEW_ID)
+    assert resolver.feed("ctrl+k") is True
+    assert resolver.feed("ctrl+u").command == "upper_case"
+    # A key that doesn't continue the sequence is resolved on its own.
+    assert resolver.feed("ctrl+k") is True
+    assert resolver.feed("a").command == "a"
+    assert resolver.pending == ()
+
+
+@pytest.mark.parametrize("context, expected", [
+    ({"key": "selection_empty", "operand": True}, True),
+    ({"key": "selection_empty", "operand": False}, False),
+    ({"key": "num_selections", "operand": 1}, True),
+    ({"key": "num_selections", "operator": "not_equal", "operand": 1}, False),
+    ({"key": "preceding_text", "operator": "regex_contains", "operand": "\\($"}, True),
+    ({"key": "preceding_text", "operator": "regex_match", "operand": "foo"}, False),
+    ({"key": "following_text", "operator": "regex_match", "operand": "bar\\)"}, True),
+    ({"key": "selector", "operand": "text.plain"}, True),
+    ({"key": "selector", "operator": "not_equal", "operand": "text.plain"}, False),
+    ({"key": "eol_selector", "operand": "source"}, False),
+    ({"key": "setting.tab_size", "operand": 4}, True),
+    ({"key": "overlay_visible", "operand": True}, False),
+    ({"key": "overlay_visible", "operand": False}, True),
+])
+def test_builtin_contexts(view, context, expected):
+    bindings = [_binding(["f1"], "matched", [context])]
+    assert (_resolve(bindings, "f1") == "matched") is expected
+
+
+def test_match_all(view):
+    view.selection.add(9, 10)
+    context = {"key": "selection_empty", "operand": True}
+    assert _resolve([_binding(["f1"], "any", [context])], "f1") == "any"
+    context["match_all"] = True
+    assert _resolve([_binding(["f1"], "all", [context])], "f1") is None
+
+
+def test_plugin_contexts_only_queried_after_builtin_contexts_match(view):
+    import sublime_plugin
+
+    queries = []
+
+    class Listener(object):
+        def on_query_context(self, view, key, operator, operand, match_all):
+            queries.append(key)
+            return key == "my_context"
+
+    listener = Listener()
+    sublime_plugin.all_callbacks['on_query_context'].append(listener)
+    try:
+        bindings = [
+            _binding(["f2"], "plugin", [{"key": "my_context"}]),
+            _binding(["f2"], "blocked", [{"key": "other_context"}, {"key": "selection_empty", "operand": False}]),
+        ]
+        resolver = KeyResolver(Keymap(bindings), view_id=VIEW_ID)
+        assert resolver.feed("f2").command == "plugin"
+        # The "blocked" binding fails its built-in context, so "other_context" is never asked.
+        assert queries == ["my_context"]
+        assert resolver.plugin_queries == 1
+    finally:
+        sublime_plugin.all_callbacks['on_query_context'].remove(listener)
+
+
+def test_replay_types_unbound_keys(view):
+    view.selection.clear()
+    view.selection.add(0, 0)
+    keymap.clear_cache()
+    keymap.replay(["x", "shift+y", "space"], view_id=VIEW_ID)
+    assert view.buffer.text.startswith("xY foo")
@@ -0,0 +1,57 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Tests for the .tmPreferences metadata and the indentation helpers.
+
+"""
+
+import plistlib
+
+from . import metadata
+from . import resources
+from .buffer import Buffer
+
+
+def _preferences(scope, settings):
+    return plistlib.dumps({"scope": scope, "settings": settings})
+
+
+def _shell_variables(**variables):
+    return [{"name": name, "value": value} for name, value in variables.items()]
+
+
+def test_meta_info_sees_resources_added_later():
+    assert metadata.meta_info("metaTestKey", "source.metatest") is None
+    resources.add_resource("Packages/MetaTest/Late.tmPreferences",
+                           _preferences("source.metatest", {"metaTestKey": "late"}))
+    assert metadata.meta_info("metaTestKey", "source.metatest") == "late"
+
+
+def test_meta_info_prefers_the_best_selector():
+    resources.add_resource("Packages/MetaTest/Specific.tmPreferences",
+                           _preferences("source.metatest string", {"metaTestBest": "string"}))
+    resources.add_resource("Packages/MetaTest/General.tmPreferences",
+                           _preferences("source.metatest", {"metaTestBest": "source"}))
+    assert metadata.meta_info("metaTestBest", "source.metatest string.quoted ") == "string"
+    assert metadata.meta_info("metaTestBest", "source.metatest ") == "source"
+
+
+def test_shell_variables_are_merged():
+    resources.add_resource("Packages/MetaTest/Comments.tmPreferences", _preferences(
+        "source.metamerge", {"shellVariables": _shell_variables(
+            TM_COMMENT_START="# ", TM_COMMENT_START_2="/* ", TM_COMMENT_END_2=" */")}))
+    resources.add_resource("Packages/MetaTest/Embedded.tmPreferences", _preferences(
+        "source.metamerge meta.embedded", {"shellVariables": _shell_variables(TM_COMMENT_START="// ")}))
+    variables = metadata.meta_info("shellVariables", "source.metamerge meta.embedded ")
+    assert {v["name"]: v["value"] for v in variables} == {
+        "TM_COMMENT_START": "// ", "TM_COMMENT_START_2": "/* ", "TM_COMMENT_END_2": " */"}
+    assert variables[0] == {"name": "TM_COMMENT_START", "value": "// "}
+
+
+def test_indentation():
+    buffer = Buffer("def f():\n    if x:\n\n\ty = 1\n    return\nz\n")
+    assert metadata.indentation_level(buffer, buffer.text_point(3, 0), 4) == 1
+    assert metadata.indentation_level(buffer, buffer.text_point(3, 0), 0) == 1
+    begin, end = metadata.indented_region(buffer, buffer.text_point(1, 4), 4)
+    assert (begin, end) == (buffer.text_point(1, 0), buffer.text_point(5, 0))
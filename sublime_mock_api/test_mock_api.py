@@ -249,3 +249,19 @@ TEST_ARGS = [
 ]
 
 
+
+
+# Arguments of the mock functions that differ from the captured TEST_ARGS above, since the
+# captured functions take no introspectable arguments but the mock needs some:
+MOCK_ARGS = {
+    'profile_syntax_definition': ['path', 'syntax_name'],
+    'run_syntax_test': ['path'],
+}
+
+
+def test_mock_api_signatures():
+    import inspect
+    from . import mock_api
+    for name, args, _, _ in TEST_ARGS:
+        func = inspect.unwrap(getattr(mock_api, name))
+        assert inspect.getfullargspec(func).args == MOCK_ARGS.get(name, args), name
@@ -0,0 +1,70 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Tests for sublime.PhantomSet, diffing the phantoms on update().
+
+"""
+
+import pytest
+
+import sublime
+
+from .views import get_view
+
+VIEW_ID = 501
+
+
+@pytest.fixture
+def view():
+    mock_view = get_view(VIEW_ID)
+    mock_view.buffer.erase(0, len(mock_view.buffer))
+    mock_view.buffer.insert(0, "hello world, hello phantoms")
+    return sublime.View(VIEW_ID)
+
+
+def _phantom(a, b, content="x"):
+    return sublime.Phantom(sublime.Region(a, b), content, sublime.LAYOUT_INLINE)
+
+
+def test_phantoms_are_not_hashable():
+    with pytest.raises(TypeError):
+        hash(_phantom(0, 1))
+    assert _phantom(0, 1).key() == _phantom(0, 1).key()
+
+
+def test_update_keeps_equal_phantoms(view):
+    phantom_set = sublime.PhantomSet(view, "test")
+    first, second = _phantom(0, 5), _phantom(6, 11)
+    phantom_set.update([first, second])
+    assert first.id is not None and second.id is not None and first.id != second.id
+    assert len(get_view(VIEW_ID).phantoms) == 2
+
+    same, third = _phantom(0, 5), _phantom(13, 18, "y")
+    phantom_set.update([same, third])
+    assert same.id == first.id
+    assert third.id not in (first.id, second.id)
+    assert view.query_phantoms([first.id, second.id, third.id]) == [
+        sublime.Region(0, 5), sublime.Region(-1), sublime.Region(13, 18)]
+
+
+def test_update_follows_edits(view):
+    phantom_set = sublime.PhantomSet(view, "test")
+    phantom = _phantom(6, 11)
+    phantom_set.update([phantom])
+    get_view(VIEW_ID).buffer.insert(0, ">> ")
+    # The phantom moved with the text, so a phantom at the new position is the same one.
+    moved = _phantom(9, 14)
+    phantom_set.update([moved])
+    assert moved.id == phantom.id
+    assert len(get_view(VIEW_ID).phantoms) == 1
+
+
+def test_update_with_deleted_phantom(view):
+    phantom_set = sublime.PhantomSet(view, "test")
+    phantom = _phantom(0, 5)
+    phantom_set.update([phantom])
+    get_view(VIEW_ID).buffer.erase(0, 6)
+    phantom_set.update([])
+    assert phantom.region == sublime.Region(-1)
+    assert len(get_view(VIEW_ID).phantoms) == 0
@@ -0,0 +1,68 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Tests for the PhantomStore following buffer edits.
+
+"""
+
+from .buffer import Buffer
+from .phantom_store import PhantomStore
+
+
+def _store(text):
+    buffer = Buffer(text)
+    store = PhantomStore()
+    buffer.add_listener(store)
+    return buffer, store
+
+
+def test_phantoms_follow_edits():
+    buffer, store = _store("hello world")
+    p1 = store.add("key", 6, 11, "<b>1</b>", 0)
+    p2 = store.add("key", 5, 5, "<b>2</b>", 0)
+    buffer.insert(0, ">> ")
+    assert store.query([p1, p2]) == [(9, 14), (8, 8)]
+    # Pending phantoms added after an edit are tracked from the next edit on.
+    p3 = store.add("other", 0, 2, "", 0)
+    buffer.erase(0, 1)
+    assert store.query([p1, p2, p3]) == [(8, 13), (7, 7), (0, 1)]
+
+
+def test_erasing_all_text_deletes_phantom():
+    buffer, store = _store("abc def")
+    pid = store.add("key", 4, 7, "", 0)
+    empty = store.add("key", 3, 3, "", 0)
+    buffer.erase(3, 7)
+    assert store.query([pid, empty]) == [None, (3, 3)]
+    assert len(store) == 1
+
+
+def test_erase_does_not_rebuild_tracker_on_every_edit():
+    buffer, store = _store("x" * 1000)
+    pids = [store.add("key", i, i + 1, "", 0) for i in range(0, 1000, 10)]
+    buffer.insert(0, "y")
+    tracker = store.tracker
+    for pid in pids[:40]:
+        store.erase(pid)
+        buffer.insert(0, "y")
+    # Fewer than half of the tracked phantoms are erased, so the tracker is kept.
+    assert store.tracker is tracker
+    assert store.query(pids[40:41]) == [(441, 442)]
+    for pid in pids[40:60]:
+        store.erase(pid)
+    buffer.insert(0, "y")
+    assert store.tracker is not tracker
+    assert len(store.tracker) == 2 * 40
+    assert store.query(pids[60:61]) == [(642, 643)]
+
+
+def test_erase_key_prunes_keys():
+    buffer, store = _store("abc")
+    a = store.add("a", 0, 1, "", 0)
+    store.add("b", 1, 2, "", 0)
+    store.erase(a)
+    assert "a" not in store.by_key
+    store.erase_key("b")
+    assert store.by_key == {}
+    assert len(store) == 0
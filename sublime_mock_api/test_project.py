@@ -0,0 +1,58 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Tests for projects and the project folder trees.
+
+"""
+
+import json
+import os
+
+from .project import FolderTree, Project
+from .windows import MockWindow
+
+
+def _write(path, text=""):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def test_folders_are_absolute_with_a_relative_project_file(tmp_path, monkeypatch):
+    (tmp_path / "src").mkdir()
+    _write(tmp_path / "My.sublime-project", json.dumps({"folders": [{"path": "src"}, {"path": "."}]}))
+    monkeypatch.chdir(tmp_path)
+    window = MockWindow(9)
+    assert window.open_project("My.sublime-project")
+    assert window.folders == [str(tmp_path / "src"), str(tmp_path)]
+    assert all(os.path.isabs(path) for path in window.folders)
+
+
+def test_set_project_data_resolves_folders_from_the_project_file(tmp_path):
+    project = Project({"folders": [{"path": "../other"}]}, str(tmp_path / "sub" / "My.sublime-project"))
+    assert project.folder_paths() == [str(tmp_path / "other")]
+
+
+def test_folder_tree_excludes_and_refresh(tmp_path):
+    _write(tmp_path / "a.py")
+    _write(tmp_path / "b.pyc")
+    _write(tmp_path / "pkg" / "c.py")
+    _write(tmp_path / ".git" / "HEAD")
+    tree = FolderTree(str(tmp_path), [".git"], ["*.pyc"])
+    assert tree.files() == ["a.py", "pkg/c.py"]
+    assert tree.folders() == ["", "pkg"]
+    assert not tree.refresh()
+    _write(tmp_path / "pkg" / "d.py")
+    os.utime(str(tmp_path / "pkg"), ns=(0, 0))
+    # Trees are only re-listed when refreshed.
+    assert tree.files() == ["a.py", "pkg/c.py"]
+    assert tree.refresh()
+    assert tree.files() == ["a.py", "pkg/c.py", "pkg/d.py"]
+
+
+def test_project_folder_exclude_patterns(tmp_path):
+    _write(tmp_path / "keep.txt")
+    _write(tmp_path / "build" / "out.txt")
+    project = Project({"folders": [{"path": str(tmp_path), "folder_exclude_patterns": ["build"]}]})
+    tree, = project.trees()
+    assert tree.files() == ["keep.txt"]
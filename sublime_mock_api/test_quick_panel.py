@@ -0,0 +1,55 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Tests for the quick panel's fuzzy matcher.
+
+"""
+
+from time import perf_counter
+
+from .quick_panel import QuickPanel, is_subsequence
+
+
+def _panel(items, **kwargs):
+    return QuickPanel([[item] for item in items], **kwargs)
+
+
+def test_is_subsequence():
+    assert is_subsequence("fb", "foobar")
+    assert is_subsequence("", "foobar")
+    assert not is_subsequence("bf", "foobar")
+    assert not is_subsequence("oo", "of")
+
+
+def test_query_ranks_matches():
+    panel = _panel(["foo_bar.py", "xfooyybar", "bar", "FooBar"])
+    assert panel.query("foba") == [3, 0, 1]
+    assert panel.query("") == [0, 1, 2, 3]
+
+
+def test_long_items_that_dont_match_are_fast():
+    items = ["a" * 60, "-" * 80, "ab" * 500]
+    panel = _panel(items)
+    start = perf_counter()
+    assert panel.query("aaaaaaab") == [2]
+    assert panel.query("----------x") == []
+    assert perf_counter() - start < 0.5
+
+
+def test_extended_query_filters_previous_candidates():
+    panel = _panel(["abc", "abd", "xyz"])
+    assert panel.query("ab") == [0, 1]
+    assert panel.query("abd") == [1]
+    assert panel.query("x") == [2]
+
+
+def test_select_defaults_to_highlighted():
+    selected = []
+    panel = _panel(["a", "b", "c"], on_select=selected.append, selected_index=2)
+    assert panel.select() == 2
+    assert selected == [2]
+    panel = _panel(["foo", "bar"], on_select=selected.append)
+    panel.query("ba")
+    panel.select()
+    assert selected == [2, 1]
@@ -0,0 +1,55 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Tests for sublime.RegionList and the API functions that take or return it.
+
+"""
+
+import pytest
+
+import sublime
+
+from .views import get_view
+from .windows import get_window
+
+VIEW_ID = 601
+
+
+def test_set_operations():
+    lhs = sublime.RegionList([(5, 0), (3, 8), (10, 12)])
+    rhs = sublime.RegionList([sublime.Region(7, 11)])
+    assert list(lhs.merged()) == [sublime.Region(0, 8), sublime.Region(10, 12)]
+    assert list(lhs | rhs) == [sublime.Region(0, 12)]
+    assert list(lhs & rhs) == [sublime.Region(7, 8), sublime.Region(10, 11)]
+    assert list(lhs - rhs) == [sublime.Region(0, 7), sublime.Region(11, 12)]
+
+
+def test_contains_follows_appends():
+    regions = sublime.RegionList([(0, 2), (6, 4)])
+    assert regions.contains(5) and regions.contains(sublime.Region(4, 6))
+    assert not regions.contains(3)
+    assert regions.contains_points([1, 3, 6]) == [True, False, True]
+    regions.append(sublime.Region(3, 3))
+    assert regions.contains(3)
+    regions.extend([(8, 10)])
+    assert regions.contains(9)
+    assert regions.contains_points([3, 7, 9]) == [True, False, True]
+
+
+def test_show_quick_panel_rows(monkeypatch):
+    rows = []
+    monkeypatch.setattr(get_window(1), "quick_panel", None)
+    sublime.Window(1).show_quick_panel([["a", "A"], "b", ["c", "C", "extra"]], rows.append)
+    assert get_window(1).quick_panel.rows == [["a", "A"], ["b", ""], ["c", "C"]]
+    with pytest.raises(IndexError):
+        sublime.Window(1).show_quick_panel([["a", "A"], ["b"], ["c", "C"]], rows.append)
+
+
+def test_fold_and_unfold_region_lists():
+    view = sublime.View(VIEW_ID)
+    get_view(VIEW_ID).buffer.insert(0, "0123456789" * 2)
+    view.fold(sublime.RegionList([(2, 4), (10, 15)]))
+    assert view.folded_regions() == [sublime.Region(2, 4), sublime.Region(10, 15)]
+    assert view.unfold(sublime.RegionList([(3, 3), (12, 13)])) == [sublime.Region(2, 4), sublime.Region(10, 15)]
+    assert view.folded_regions() == []
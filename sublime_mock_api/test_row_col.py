@@ -0,0 +1,72 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Tests for converting between text points and (row, col), one at a time and in batch.
+
+"""
+
+import random
+
+import pytest
+
+import sublime
+
+from . import buffer as buffer_module
+from .views import get_view
+
+VIEW_ID = 621
+
+numpy = buffer_module.numpy
+
+
+@pytest.fixture(params=["numpy", "python"])
+def view(request, monkeypatch):
+    if request.param == "numpy":
+        if numpy is None:
+            pytest.skip("NumPy is not installed")
+    else:
+        monkeypatch.setattr(buffer_module, "numpy", None)
+    mock_view = get_view(VIEW_ID)
+    mock_view.buffer.erase(0, len(mock_view.buffer))
+    mock_view.buffer.insert(0, "ab\n\ncdef\ng")
+    return sublime.View(VIEW_ID)
+
+
+def test_row_col_and_text_point(view):
+    assert [view.rowcol(tp) for tp in range(11)] == [
+        (0, 0), (0, 1), (0, 2), (1, 0), (2, 0), (2, 1), (2, 2), (2, 3), (2, 4), (3, 0), (3, 1)]
+    assert view.rowcol(-5) == (0, 0)
+    assert view.rowcol(100) == (3, 1)
+    assert view.text_point(2, 3) == 7
+    assert view.text_point(0, 5) == 5  # Columns past the end of the line continue on the next lines,
+    assert view.text_point(9, 0) == 9  # while rows are clamped to the buffer,
+    assert view.text_point(3, 9) == 10  # and so is the result.
+
+
+def test_batch_conversions_match_single_ones(view):
+    mock_view = get_view(VIEW_ID)
+    rng = random.Random(0)
+    for _ in range(20):
+        # Edit the buffer in between, so that any cached line starts must be refreshed.
+        pt = rng.randint(0, len(mock_view.buffer))
+        mock_view.buffer.insert(pt, rng.choice(["x", "\n", "yz\n\n"]))
+        tps = [rng.randint(-2, len(mock_view.buffer) + 2) for _ in range(10)]
+        row_cols = view.rowcols(tps)
+        assert row_cols == [view.rowcol(tp) for tp in tps]
+        row_cols.append((-1, 3))
+        row_cols.append((1000, 0))
+        assert view.text_points(row_cols) == [view.text_point(row, col) for row, col in row_cols]
+    assert view.rowcols([]) == []
+    assert view.text_points([]) == []
+
+
+def test_batch_conversions_of_numpy_arrays(view):
+    if buffer_module.numpy is None:
+        pytest.skip("NumPy is not used")
+    row_cols = view.rowcols(numpy.array([0, 4, 10]))
+    assert isinstance(row_cols, numpy.ndarray)
+    assert row_cols.tolist() == [[0, 0], [2, 0], [3, 1]]
+    tps = view.text_points(row_cols)
+    assert isinstance(tps, numpy.ndarray)
+    assert tps.tolist() == [0, 4, 10]
@@ -0,0 +1,75 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Tests for compiling and scoring scope selectors.
+
+"""
+
+import pytest
+
+import sublime
+
+from . import scope_selector
+from .scope_selector import compile_selector, score_selector
+from .views import get_view
+
+SCOPE = "source.python meta.function-call.python string.quoted.double.python"
+
+
+@pytest.mark.parametrize("selector, matches", [
+    ("", True),
+    ("source", True),
+    ("source.python", True),
+    ("source.py", False),
+    ("string.quoted", True),
+    ("comment", False),
+    ("meta.function-call", True),
+    ("source string", True),
+    ("string source", False),
+    ("source.python meta string.quoted", True),
+    ("comment, string", True),
+    ("comment | string", True),
+    ("comment, text", False),
+    ("source - string", False),
+    ("source - comment", True),
+    ("source -comment", True),
+    ("-string", False),
+    ("-comment", True),
+    ("source & string", True),
+    ("source & comment", False),
+    ("source - (comment | string)", False),
+    ("source - (comment | text)", True),
+    ("(comment, string) & meta", True),
+    ("text, source - string", False),
+])
+def test_matches(selector, matches):
+    assert (score_selector(SCOPE, selector) > 0) is matches
+
+
+def test_deeper_and_more_specific_matches_score_higher():
+    scores = [score_selector(SCOPE, selector) for selector in
+              ["source", "source.python", "meta", "string", "source string", "string.quoted"]]
+    assert scores == sorted(scores)
+    assert len(set(scores)) == len(scores)
+    assert score_selector(SCOPE, "source, string") == score_selector(SCOPE, "string")
+
+
+def test_selectors_are_compiled_once():
+    assert compile_selector("source - comment") is compile_selector("source - comment")
+    score_selector.cache_clear()
+    for _ in range(3):
+        score_selector(SCOPE, "source - comment")
+    info = score_selector.cache_info()
+    assert (info.hits, info.misses) == (2, 1)
+    assert scope_selector.score_selector is score_selector
+
+
+def test_view_match_selector():
+    mock_view = get_view(631)
+    mock_view.buffer.erase(0, len(mock_view.buffer))
+    mock_view.buffer.insert(0, "plain")
+    view = sublime.View(631)
+    assert view.match_selector(0, "text.plain")
+    assert not view.match_selector(0, "source")
+    assert view.score_selector(0, "text") == sublime.score_selector(view.scope_name(0), "text") > 0
@@ -0,0 +1,144 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Tests for the incremental tokenizer of the ScopeStore.
+
+"""
+
+import random
+
+import pytest
+
+from . import resources
+from . import syntax
+from .buffer import Buffer
+from .scope_store import ScopeStore
+
+pytest.importorskip("yaml")
+
+SYNTAX_NAME = "Packages/Test/Test.sublime-syntax"
+SYNTAX = """\
+%YAML 1.2
+---
+name: Test
+scope: source.test
+file_extensions: [test]
+contexts:
+  main:
+    - match: /\\*
+      push: comment
+    - match: \\b[0-9]+\\b
+      scope: constant.numeric.test
+    - match: '"'
+      push: string
+  comment:
+    - meta_scope: comment.block.test
+    - match: \\*/
+      pop: true
+  string:
+    - meta_scope: string.quoted.test
+    - match: '"'
+      pop: true
+"""
+
+
+@pytest.fixture(autouse=True)
+def test_syntax():
+    resources.add_resource(SYNTAX_NAME, SYNTAX)
+    syntax.clear_cache()
+    yield
+    syntax.clear_cache()
+
+
+def _store(text):
+    buffer = Buffer(text)
+    store = ScopeStore(buffer, {"syntax": SYNTAX_NAME})
+    buffer.add_listener(store)
+    return buffer, store
+
+
+def _all_runs(store):
+    return [store.line_runs(row) for row in range(store.buffer.line_count())]
+
+
+def _fresh_runs(text):
+    return _all_runs(_store(text)[1])
+
+
+def test_scopes():
+    buffer, store = _store('a 12 "x" /* c */ b')
+    assert store.scope_name(2) == "source.test constant.numeric.test "
+    assert store.scope_name(6) == "source.test string.quoted.test "
+    assert store.scope_name(12) == "source.test comment.block.test "
+    assert store.scope_name(17) == "source.test "
+
+
+def test_edit_reopening_comment_retokenizes_following_lines():
+    buffer, store = _store("1\n/* a */\n2\n3\n")
+    assert store.scope_name(buffer.text_point(2, 0)).startswith("source.test constant.numeric")
+    buffer.erase(6, 8)  # Remove the "*/"
+    assert store.scope_name(buffer.text_point(2, 0)) == "source.test comment.block.test "
+    assert _all_runs(store) == _fresh_runs(buffer.text)
+
+
+def test_edit_stops_when_state_converges():
+    lines = ["{} 2 3".format(i) for i in range(200)]
+    buffer, store = _store("\n".join(lines))
+    _all_runs(store)
+    buffer.insert(buffer.text_point(10, 0), "7")
+    store.line_runs(10)
+    # Line 10 is re-tokenized; the state after it is unchanged, so the next lines are reused.
+    assert store._valid == buffer.line_count()
+    assert _all_runs(store) == _fresh_runs(buffer.text)
+
+
+def test_random_edits_match_fresh_tokenization():
+    rnd = random.Random(0)
+    pieces = ["1", " ", "\n", "/*", "*/", '"', "ab", "23"]
+    buffer, store = _store("".join(rnd.choice(pieces) for _ in range(300)))
+    for _ in range(200):
+        size = len(buffer)
+        if rnd.random() < 0.6 or size < 5:
+            buffer.insert(rnd.randint(0, size), "".join(rnd.choice(pieces) for _ in range(rnd.randint(1, 4))))
+        else:
+            a = rnd.randrange(size)
+            buffer.erase(a, min(size, a + rnd.randint(1, 6)))
+        # Query a random line first, so that later lines are left partly tokenized.
+        store.line_runs(rnd.randrange(buffer.line_count()))
+        if rnd.random() < 0.3:
+            assert _all_runs(store) == _fresh_runs(buffer.text)
+    assert _all_runs(store) == _fresh_runs(buffer.text)
+
+
+def test_find_by_selector_after_edits():
+    rnd = random.Random(1)
+    pieces = ["1", " ", "\n", "/*", "*/", '"', "ab", "23"]
+    buffer, store = _store("".join(rnd.choice(pieces) for _ in range(300)))
+    for _ in range(100):
+        # Several edits between queries, some with the lines partly re-tokenized in between.
+        for _ in range(rnd.randint(1, 3)):
+            size = len(buffer)
+            if rnd.random() < 0.6 or size < 5:
+                buffer.insert(rnd.randint(0, size), "".join(rnd.choice(pieces) for _ in range(rnd.randint(1, 4))))
+            else:
+                a = rnd.randrange(size)
+                buffer.erase(a, min(size, a + rnd.randint(1, 6)))
+            if rnd.random() < 0.3:
+                store.line_runs(rnd.randrange(buffer.line_count()))
+        fresh = _store(buffer.text)[1]
+        for selector in ("comment", "constant.numeric", "string", "source - comment"):
+            assert store.find_by_selector(selector) == fresh.find_by_selector(selector)
+
+
+def test_syntax_changes_are_picked_up_without_clear_cache():
+    buffer, store = _store('12 "x"')
+    assert store.scope_name(0) == "source.test constant.numeric.test "
+    resources.add_resource(SYNTAX_NAME, SYNTAX.replace("constant.numeric.test", "constant.integer.test"))
+    assert store.scope_name(0) == "source.test constant.integer.test "
+    name = "Packages/Test/Other.sublime-syntax"
+    assert syntax.syntax_for_scope("source.other") is None
+    assert syntax.syntax_for_file_name("a.other") is None
+    resources.add_resource(name, "name: Other\nscope: source.other\nfile_extensions: [other]\ncontexts: {main: []}\n")
+    assert syntax.syntax_for_scope("source.other") == name
+    assert syntax.syntax_for_file_name("a.other") == name
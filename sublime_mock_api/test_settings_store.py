@@ -0,0 +1,45 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Tests for the settings objects of views and of load_settings().
+
+"""
+
+import sublime
+
+from .settings_store import DEFAULT_VIEW_SETTINGS
+
+
+def test_view_settings_start_from_the_defaults():
+    first, second = sublime.View(611).settings(), sublime.View(612).settings()
+    assert first.get("tab_size") == DEFAULT_VIEW_SETTINGS["tab_size"]
+    assert first.get("word_separators") == DEFAULT_VIEW_SETTINGS["word_separators"]
+    first.set("tab_size", 2)
+    assert sublime.View(611).settings().get("tab_size") == 2
+    assert second.get("tab_size") == DEFAULT_VIEW_SETTINGS["tab_size"]
+    assert DEFAULT_VIEW_SETTINGS["tab_size"] == 4
+
+
+def test_load_settings_per_file():
+    settings = sublime.load_settings("Test.sublime-settings")
+    settings.set("answer", 42)
+    assert sublime.load_settings("Test.sublime-settings").get("answer") == 42
+    assert sublime.load_settings("Other.sublime-settings").get("answer") is None
+
+
+def test_settings_functions():
+    settings = sublime.load_settings("Functions.sublime-settings")
+    changes = []
+    settings.add_on_change("tag", lambda: changes.append(settings.get("key")))
+    assert not settings.has("key")
+    assert settings.get("key", "default") == "default"
+    settings.set("key", [1, 2])
+    assert settings.has("key") and settings.get("key") == [1, 2]
+    settings.erase("key")
+    settings.erase("key")
+    assert not settings.has("key")
+    assert changes == [[1, 2], None]
+    settings.clear_on_change("tag")
+    settings.set("key", 3)
+    assert changes == [[1, 2], None]
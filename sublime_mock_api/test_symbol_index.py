@@ -0,0 +1,86 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Tests for the project symbol index, with and without worker processes.
+
+"""
+
+import functools
+import multiprocessing
+import plistlib
+
+import pytest
+
+from . import resources
+from . import settings
+from . import symbol_index
+from . import syntax
+
+SYNTAX = """\
+%YAML 1.2
+---
+name: IndexTest
+scope: source.indextest
+file_extensions: [indextest]
+contexts:
+  main:
+    - match: \\bdef\\s+(\\w+)
+      captures:
+        1: entity.name.function.indextest
+    - match: \\bcall\\s+(\\w+)
+      captures:
+        1: variable.function.indextest
+"""
+PREFERENCES = {
+    "Packages/IndexTest/Symbols.tmPreferences": plistlib.dumps(
+        {"scope": "source.indextest entity.name.function", "settings": {"showInIndexedSymbolList": 1}}),
+    "Packages/IndexTest/References.tmPreferences": plistlib.dumps(
+        {"scope": "source.indextest variable.function", "settings": {"showInIndexedReferenceList": 1}}),
+}
+
+
+@pytest.fixture
+def folder(tmp_path, monkeypatch):
+    pytest.importorskip("yaml")
+    resources.add_resource("Packages/IndexTest/IndexTest.sublime-syntax", SYNTAX)
+    for name, data in PREFERENCES.items():
+        resources.add_resource(name, data)
+    syntax.clear_cache()
+    monkeypatch.setattr(settings, "CACHE_PATH", str(tmp_path / "cache"))
+    project = tmp_path / "project"
+    project.mkdir()
+    for i in range(6):
+        (project / "f{}.indextest".format(i)).write_text("def f{0}\ncall f{1}\n".format(i, (i + 1) % 6))
+    (project / "notes.txt").write_text("def ignored\n")
+    yield str(project)
+    symbol_index.clear_cache()
+    syntax.clear_cache()
+
+
+def _files(folder):
+    return ["f{}.indextest".format(i) for i in range(6)] + ["notes.txt"]
+
+
+def test_index_in_process(folder):
+    index = symbol_index.FolderIndex(folder)
+    assert index.update(_files(folder), processes=1) == 6
+    assert index.lookup("f2") == [("f2.indextest", 0, 4)]
+    assert index.lookup("f2", references=True) == [("f1.indextest", 1, 5)]
+    assert index.lookup("ignored") == []
+    # The index is saved, and unchanged files aren't indexed again.
+    reloaded = symbol_index.FolderIndex(folder)
+    assert reloaded.update(_files(folder), processes=1) == 0
+    assert reloaded.lookup("f2") == [("f2.indextest", 0, 4)]
+
+
+def test_spawned_workers_see_in_memory_resources(folder, monkeypatch):
+    # Spawned workers don't inherit this process' memory, unlike forked ones.
+    spawn = functools.partial(symbol_index.ProcessPoolExecutor, mp_context=multiprocessing.get_context("spawn"))
+    monkeypatch.setattr(symbol_index, "ProcessPoolExecutor", spawn)
+    monkeypatch.setattr(symbol_index, "CHUNK_SIZE", 2)
+    monkeypatch.setattr(symbol_index, "POOL_THRESHOLD", 2)
+    index = symbol_index.FolderIndex(folder)
+    assert index.update(_files(folder), processes=2) == 6
+    assert index.lookup("f5") == [("f5.indextest", 0, 4)]
+    assert index.lookup("f0", references=True) == [("f5.indextest", 1, 5)]
@@ -0,0 +1,117 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Tests for the per-view symbols made from the tokenizer and the .tmPreferences metadata.
+
+"""
+
+import plistlib
+
+import pytest
+
+from . import resources
+from . import symbol_store
+from .buffer import Buffer
+from .scope_store import ScopeStore
+from .symbol_store import INDEXED_REFERENCES, INDEXED_SYMBOLS, SYMBOLS, SymbolStore, transform
+
+pytest.importorskip("yaml")
+
+SYNTAX_NAME = "Packages/SymTest/SymTest.sublime-syntax"
+SYNTAX = """\
+%YAML 1.2
+---
+name: SymTest
+scope: source.symtest
+contexts:
+  main:
+    - match: ^\\s*def\\s+\\w+\\([^)]*\\)
+      scope: meta.function.symtest
+    - match: \\bcall\\s+\\w+
+      scope: meta.call.symtest
+"""
+PREFERENCES_NAME = "Packages/SymTest/Symbols.tmPreferences"
+
+
+def _preferences(scope, settings):
+    return plistlib.dumps({"scope": scope, "settings": settings})
+
+
+@pytest.fixture(autouse=True)
+def preferences():
+    resources.add_resource(SYNTAX_NAME, SYNTAX)
+    resources.add_resource(PREFERENCES_NAME, _preferences("meta.function.symtest", {
+        "showInSymbolList": 1,
+        "showInIndexedSymbolList": 1,
+        "symbolTransformation": "s/^\\s*def\\s+//;  # Strip the keyword\ns/\\(.*//;",
+        "symbolIndexTransformation": "s/^\\s*def\\s+(\\w+).*/index:$1/",
+    }))
+    resources.add_resource("Packages/SymTest/References.tmPreferences", _preferences("meta.call.symtest", {
+        "showInIndexedReferenceList": "1",
+        "symbolIndexTransformation": "s/^call\\s+//",
+    }))
+
+
+def _store(text):
+    buffer = Buffer(text)
+    scopes = ScopeStore(buffer, {"syntax": SYNTAX_NAME})
+    symbols = SymbolStore(buffer, scopes)
+    buffer.add_listener(scopes)
+    buffer.add_listener(symbols)
+    return buffer, symbols
+
+
+@pytest.mark.parametrize("name, transformation, expected", [
+    ("def foo(a)", "s/^def\\s+//; s/\\(.*//;", "foo"),
+    ("Foo bar", "s/(\\w+) (\\w+)/$2 ${1}/", "bar Foo"),
+    ("a-b-c", "s/-/+/", "a+b-c"),
+    ("a-b-c", "s/-/+/g", "a+b+c"),
+    ("ABC", "s/b/x/i", "AxC"),
+    ("a/b", "s/\\//::/", "a::b"),
+    ("keep", "# Only a comment\n", "keep"),
+    ("keep", "s/(/x/", "keep"),
+])
+def test_transform(name, transformation, expected):
+    assert transform(name, transformation) == expected
+
+
+def test_symbols():
+    buffer, store = _store("def foo(a):\n    call bar\n  def baz()\ncall qux x\n")
+    assert store.symbols(SYMBOLS) == [(0, 10, "foo"), (25, 36, "baz")]
+    assert store.symbols(INDEXED_SYMBOLS) == [(0, 10, "index:foo"), (25, 36, "index:baz")]
+    assert store.symbols(INDEXED_REFERENCES) == [(16, 24, "bar"), (37, 45, "qux")]
+
+
+def test_only_edited_lines_are_scanned_again(monkeypatch):
+    buffer, store = _store("".join("def f{}()\n".format(i) for i in range(50)))
+    assert len(store.symbols()) == 50
+    scanned = []
+    scan_row = SymbolStore._scan_row
+
+    def counting_scan_row(self, row, runs):
+        scanned.append(row)
+        return scan_row(self, row, runs)
+
+    monkeypatch.setattr(SymbolStore, "_scan_row", counting_scan_row)
+    buffer.insert(buffer.text_point(20, 7), "x")
+    symbols = store.symbols()
+    assert symbols[20][2] == "f20x" and symbols[21][2] == "f21"
+    assert scanned == [20]
+    buffer.insert(buffer.text_point(30, 0), "call g\n")
+    assert store.symbols(INDEXED_REFERENCES) == [(buffer.text_point(30, 0), buffer.text_point(30, 6), "g")]
+    assert [s[2] for s in store.symbols()][29:32] == ["f29", "f30", "f31"]
+    # The edited line became rows 30 and 31.
+    assert scanned == [20, 30, 31]
+    # Nothing is scanned when the buffer hasn't changed.
+    store.symbols()
+    assert scanned == [20, 30, 31]
+
+
+def test_symbols_follow_metadata_changes():
+    buffer, store = _store("def foo(a)\n")
+    assert store.symbols() == [(0, 10, "foo")]
+    resources.add_resource(PREFERENCES_NAME, _preferences("meta.function.symtest", {"showInSymbolList": 1}))
+    assert store.symbols() == [(0, 10, "def foo(a)")]
+    assert store.symbols(INDEXED_SYMBOLS) == []
+    assert symbol_store.transform("def foo(a)", None) == "def foo(a)"
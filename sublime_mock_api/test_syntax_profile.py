@@ -0,0 +1,48 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Tests for the syntax definition profiler.
+
+"""
+
+import pytest
+
+from . import resources
+from . import syntax
+from .buffer import Buffer
+from .syntax_profile import SyntaxProfile
+
+pytest.importorskip("yaml")
+
+SYNTAX_NAME = "Packages/ProfileTest/ProfileTest.sublime-syntax"
+SYNTAX = """\
+%YAML 1.2
+---
+name: ProfileTest
+scope: source.profiletest
+contexts:
+  main:
+    - match: //.*$
+      scope: comment.line.profiletest
+    - match: \\b[0-9]+\\b
+      scope: constant.numeric.profiletest
+"""
+
+
+@pytest.fixture(autouse=True)
+def test_syntax():
+    resources.add_resource(SYNTAX_NAME, SYNTAX)
+    syntax.clear_cache()
+    yield
+    syntax.clear_cache()
+
+
+def test_lines_are_split_like_the_buffer():
+    # \x0c, \r and \u2028 don't end a line in a view, so the numbers are part of the comment.
+    text = "// a\x0c 1\r 2\u2028 3\n4\n"
+    profile = SyntaxProfile(syntax.load_syntax(SYNTAX_NAME)).profile(text)
+    assert profile.lines == Buffer(text).line_count() == 3
+    data = profile.to_json()
+    numeric, = [rule for rule in data["rules"] if "numeric" in rule["scope"]]
+    assert numeric["matches"] == 1
@@ -0,0 +1,63 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Tests for the syntax test parser and runner.
+
+"""
+
+import pytest
+
+from . import resources
+from . import syntax
+from .syntax_tests import Assertion, parse_syntax_test, run_syntax_test_text
+
+SYNTAX_NAME = "Packages/SyntaxTestTest/SyntaxTestTest.sublime-syntax"
+SYNTAX = """\
+%YAML 1.2
+---
+name: SyntaxTestTest
+scope: source.stt
+contexts:
+  main:
+    - match: '#.*$'
+      scope: comment.line.stt
+    - match: \\b[0-9]+\\b
+      scope: constant.numeric.stt
+"""
+
+
+@pytest.fixture
+def test_syntax():
+    pytest.importorskip("yaml")
+    resources.add_resource(SYNTAX_NAME, SYNTAX)
+    syntax.clear_cache()
+    yield
+    syntax.clear_cache()
+
+
+def test_parse_assertions():
+    text = '# SYNTAX TEST "{}"\nx 12\n#   ^^ constant\n# <- source\n'.format(SYNTAX_NAME)
+    name, assertions = parse_syntax_test(text)
+    assert name == SYNTAX_NAME
+    assert assertions == [Assertion(2, 1, 4, 6, "constant"), Assertion(3, 1, 0, 1, "source")]
+
+
+def test_plain_comment_is_a_tested_line():
+    text = '# SYNTAX TEST "{}"\n12\n# a comment\n#   ^ comment\n'.format(SYNTAX_NAME)
+    _, assertions = parse_syntax_test(text)
+    assert assertions == [Assertion(3, 2, 4, 5, "comment")]
+
+
+def test_comment_end_token():
+    text = '<!-- SYNTAX TEST "Packages/HTML/HTML.sublime-syntax" -->\n<b>\n<!-- ^ tag -->\n'
+    name, assertions = parse_syntax_test(text)
+    assert name == "Packages/HTML/HTML.sublime-syntax"
+    assert assertions == [Assertion(2, 1, 5, 6, "tag")]
+
+
+def test_run_syntax_test(test_syntax):
+    text = '# SYNTAX TEST "{}"\n1 x\n# <- constant\n# comment\n# ^ comment\n#  ^ constant\n'.format(SYNTAX_NAME)
+    count, failures = run_syntax_test_text("test", text)
+    assert count == 3
+    assert failures == ["test:4:4: [constant] does not match scope [source.stt comment.line.stt]"]
@@ -0,0 +1,91 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Tests for the PointTracker and the region store following buffer edits.
+
+"""
+
+import random
+
+from .buffer import Buffer
+from .region_store import RegionStore
+from .tracking import PointTracker
+
+
+def _store(text, regions):
+    buffer = Buffer(text)
+    store = RegionStore()
+    buffer.add_listener(store)
+    store.add("key", regions)
+    return buffer, store
+
+
+def test_insert_before_moves_points():
+    tracker = PointTracker([5, 2, 9])
+    tracker.on_insert(0, 3)
+    assert tracker.positions() == [8, 5, 12]
+
+
+def test_insert_at_point_respects_sticky():
+    tracker = PointTracker([4, 4], sticky=[True, False])
+    tracker.on_insert(4, 2)
+    assert tracker.positions() == [4, 6]
+    assert tracker.position(0) == 4
+    assert tracker.position(1) == 6
+
+
+def test_erase_collapses_points_inside():
+    tracker = PointTracker([1, 3, 5, 8])
+    tracker.on_erase(2, 6)
+    assert tracker.positions() == [1, 2, 2, 4]
+
+
+def test_erase_restores_sticky_order():
+    # The non-sticky point at 6 lands on the sticky point at 2 after the erase.
+    tracker = PointTracker([2, 6], sticky=[True, False])
+    tracker.on_erase(2, 6)
+    tracker.on_insert(2, 1)
+    assert tracker.positions() == [2, 3]
+
+
+def test_tracker_matches_naive_model():
+    rnd = random.Random(0)
+    points = [rnd.randrange(200) for _ in range(50)]
+    sticky = [rnd.random() < 0.5 for _ in points]
+    tracker = PointTracker(points, sticky)
+    expected = list(points)
+    size = 200
+    for _ in range(500):
+        if rnd.random() < 0.5 or size < 10:
+            pt, n = rnd.randrange(size + 1), rnd.randint(1, 5)
+            expected = [p + n if p > pt or (p == pt and not s) else p for p, s in zip(expected, sticky)]
+            tracker.on_insert(pt, n)
+            size += n
+        else:
+            a = rnd.randrange(size)
+            b = min(size, a + rnd.randint(1, 10))
+            expected = [p if p <= a else (a if p < b else p - (b - a)) for p in expected]
+            tracker.on_erase(a, b)
+            size -= b - a
+        assert tracker.positions() == expected
+
+
+def test_regions_follow_edits():
+    buffer, store = _store("hello world", [(6, 11), (0, 5)])
+    buffer.insert(0, ">> ")
+    assert store.get("key") == [(3, 8), (9, 14)]
+    # Text inserted at the end of a region is not included, at the beginning it pushes the region.
+    buffer.insert(8, "!")
+    buffer.insert(10, "_")
+    assert store.get("key") == [(3, 8), (11, 16)]
+
+
+def test_insert_after_erasing_region_text():
+    buffer, store = _store("abc def ghi", [(4, 7)])
+    buffer.erase(4, 7)
+    assert store.get("key") == [(4, 4)]
+    buffer.insert(4, "xyz")
+    begin, end = store.get("key")[0]
+    assert begin <= end
+    assert store.get("key") == [(7, 7)]
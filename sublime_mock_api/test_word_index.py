@@ -0,0 +1,59 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Tests for the buffer word index behind view.extract_completions().
+
+"""
+
+import random
+
+from .buffer import Buffer
+from .word_index import WordIndex
+
+
+def _index(text, settings=None):
+    buffer = Buffer(text)
+    index = WordIndex(buffer, settings)
+    buffer.add_listener(index)
+    return buffer, index
+
+
+def test_completions_by_distance_and_frequency():
+    buffer, index = _index("apple apricot\nbanana\napple ap")
+    tp = len(buffer)
+    assert index.completions("ap", tp) == ["apple", "apricot"]
+    assert index.completions("AP") == ["apple", "ap", "apricot"]
+    assert index.completions("z") == []
+
+
+def test_word_being_typed_is_skipped():
+    buffer, index = _index("foo fooba")
+    assert index.completions("foo", len(buffer)) == ["foo"]
+
+
+def test_edits_update_the_index():
+    rnd = random.Random(0)
+    words = ["alpha", "beta", "al-pha", "\n", " ", "be.ta", "alp"]
+    buffer, index = _index("".join(rnd.choice(words) for _ in range(100)))
+    index.build()
+    for _ in range(100):
+        if rnd.random() < 0.6:
+            buffer.insert(rnd.randint(0, len(buffer)), rnd.choice(words))
+        else:
+            a = rnd.randrange(len(buffer))
+            buffer.erase(a, min(len(buffer), a + rnd.randint(1, 8)))
+        fresh = WordIndex(Buffer(buffer.text))
+        fresh.build()
+        assert index.counts == fresh.counts
+
+
+def test_word_separators_setting():
+    settings = {}
+    buffer, index = _index("foo-bar foo.baz", settings)
+    assert index.words_with_prefix("foo") == ["foo"]
+    settings["word_separators"] = "."
+    assert index.words_with_prefix("foo") == ["foo", "foo-bar"]
+    buffer.insert(0, "foo-qux ")
+    assert index.words_with_prefix("foo") == ["foo", "foo-bar", "foo-qux"]
+    assert index.counts == {"foo-qux": 1, "foo-bar": 1, "foo": 1, "baz": 1}
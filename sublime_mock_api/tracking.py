@@ -0,0 +1,160 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Tracking of text points across buffer edits.
+
+`PointTracker` holds a set of text points (e.g. the begin and end points of a list of regions)
+and moves them along when the buffer is edited, the same way Sublime Text moves regions,
+phantoms and folds around as you type.
+
+Instead of storing the absolute positions, the points are kept in sorted order and stored
+as the gaps between consecutive points, in a Fenwick (binary indexed) tree.
+An insert only grows a single gap and an erase only touches the gaps of the points that
+are collapsed by the erase, so each edit costs O(log n) rather than O(n).
+The absolute positions are only computed when asked for.
+
+Since an edit never changes the relative order of the points, the sorted order (and thus
+the mapping from input points to tree slots) is fixed once the tracker has been created.
+
+"""
+
+
+class PointTracker(object):
+    """ Keeps a fixed set of points in sync with buffer edits.
+
+    Args:
+        points: List of text points (in any order).
+        sticky: Optional list of flags, one per point. A sticky point stays put when text is
+            inserted exactly at its position; a non-sticky point is pushed to the right.
+            By default points are non-sticky.
+    """
+
+    def __init__(self, points, sticky=None):
+        n = len(points)
+        if sticky is None:
+            sticky = [False] * n
+        order = sorted(range(n), key=lambda i: (points[i], not sticky[i]))
+        self.order = order
+        self.slot_of = [0] * n
+        for slot, i in enumerate(order):
+            self.slot_of[i] = slot
+        self.sticky = [sticky[i] for i in order]
+        self.gaps = gaps = [0] * n
+        prev = 0
+        for slot, i in enumerate(order):
+            gaps[slot] = points[i] - prev
+            prev = points[i]
+        # Fenwick tree over the gaps, built in O(n):
+        self.tree = tree = [0] + gaps
+        for j in range(1, n + 1):
+            parent = j + (j & -j)
+            if parent <= n:
+                tree[parent] += tree[j]
+        self.size = n
+
+    def __len__(self):
+        return self.size
+
+    def _add(self, slot, delta):
+        self.gaps[slot] += delta
+        tree = self.tree
+        j = slot + 1
+        n = self.size
+        while j <= n:
+            tree[j] += delta
+            j += j & -j
+
+    def _position(self, slot):
+        """ Absolute position of the point in `slot` (prefix sum of the gaps). """
+        tree = self.tree
+        j = slot + 1
+        total = 0
+        while j > 0:
+            total += tree[j]
+            j -= j & -j
+        return total
+
+    def first_at_or_after(self, pt):
+        """ Return (slot, position) of the first point at or after `pt`. """
+        tree = self.tree
+        n = self.size
+        slot = 0
+        total = 0
+        step = 1 << n.bit_length()
+        while step:
+            j = slot + step
+            if j <= n and total + tree[j] < pt:
+                slot = j
+                total += tree[j]
+            step >>= 1
+        if slot < n:
+            total += self.gaps[slot]
+        return slot, total
+
+    def on_insert(self, pt, length):
+        slot, pos = self.first_at_or_after(pt)
+        n = self.size
+        # Sticky points sitting exactly at pt stay where they are:
+        while slot < n and pos == pt and self.sticky[slot]:
+            slot += 1
+            if slot < n:
+                pos += self.gaps[slot]
+        if slot < n:
+            self._add(slot, length)
+
+    def on_erase(self, a, b):
+        # Points strictly inside (a, b) collapse onto a, points from b onwards move back.
+        slot, pos = self.first_at_or_after(a + 1)
+        n = self.size
+        if slot >= n:
+            return
+        prev = pos - self.gaps[slot]
+        gaps = self.gaps
+        while slot < n and pos < b:
+            new_gap = a - prev
+            prev = a
+            if gaps[slot] != new_gap:
+                self._add(slot, new_gap - gaps[slot])
+            slot += 1
+            if slot < n:
+                pos += gaps[slot]
+        if slot < n:
+            self._add(slot, pos - (b - a) - prev - gaps[slot])
+        self._restore_order(a)
+
+    def _restore_order(self, pt):
+        """ Re-establish sticky-before-non-sticky order among the points at `pt`.
+
+        After an erase, the points that were inside the erased text and the points right after it
+        all end up at the same position, possibly with a non-sticky point before a sticky one.
+        Since all of these points share a position, only the slot assignment needs to change,
+        not the gaps.
+        """
+        start, _ = self.first_at_or_after(pt)
+        end, _ = self.first_at_or_after(pt + 1)
+        if end - start < 2:
+            return
+        sticky = self.sticky[start:end]
+        if all(sticky[i] or not sticky[i + 1] for i in range(len(sticky) - 1)):
+            return
+        group = self.order[start:end]
+        group = ([i for i, s in zip(group, sticky) if s] +
+                 [i for i, s in zip(group, sticky) if not s])
+        self.order[start:end] = group
+        self.sticky[start:end] = sorted(sticky, reverse=True)
+        for slot, i in enumerate(group, start):
+            self.slot_of[i] = slot
+
+    def position(self, i):
+        """ Current position of input point `i`, in O(log n). """
+        return self._position(self.slot_of[i])
+
+    def positions(self):
+        """ Current positions of all points, in input order. """
+        pos = []
+        total = 0
+        for gap in self.gaps:
+            total += gap
+            pos.append(total)
+        return [pos[slot] for slot in self.slot_of]
@@ -0,0 +1,106 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+State of the mocked views.
+
+The mock_api functions take a `view_id`, and look up the state for that view here.
+Views are created on demand, so e.g. `sublime.View(1)` (which is what the mocked
+`active_window().active_view()` returns) can be used right away.
+
+"""
+
+import os
+
+from .buffer import Buffer
+from .color_scheme import DEFAULT_COLOR_SCHEME, load_color_scheme
+from .region_store import RegionStore
+from .phantom_store import PhantomStore
+from .fold_store import FoldStore
+from .word_index import WordIndex
+from .selection_store import SelectionStore
+from .scope_store import ScopeStore
+from .symbol_store import SymbolStore
+from .settings_store import DEFAULT_VIEW_SETTINGS, get_settings, new_settings
+from .syntax import syntax_for_file_name
+
+
+class MockView(object):
+
+    def __init__(self, view_id, window_id=1):
+        self.view_id = view_id
+        self.window_id = window_id
+        self.buffer = Buffer()
+        self.file_name = None
+        self.settings_id = new_settings(DEFAULT_VIEW_SETTINGS)
+        self.selection = SelectionStore()
+        self.regions = RegionStore()
+        self.phantoms = PhantomStore()
+        self.folds = FoldStore()
+        self.words = WordIndex(self.buffer, self.settings())
+        self.scopes = ScopeStore(self.buffer, self.settings())
+        self.symbols = SymbolStore(self.buffer, self.scopes)
+        self.buffer.add_listener(self.selection)
+        self.buffer.add_listener(self.regions)
+        self.buffer.add_listener(self.phantoms)
+        self.buffer.add_listener(self.folds)
+        self.buffer.add_listener(self.words)
+        self.buffer.add_listener(self.scopes)
+        self.buffer.add_listener(self.symbols)
+
+    def settings(self):
+        return get_settings(self.settings_id).values
+
+    def word_separators(self, separators=""):
+        """ `separators` if given, else the view's word_separators setting. """
+        return separators or self.settings().get("word_separators", DEFAULT_VIEW_SETTINGS["word_separators"])
+
+    def color_scheme(self):
+        """ The ColorScheme of the view's color_scheme setting. """
+        return load_color_scheme(self.settings().get("color_scheme") or DEFAULT_COLOR_SCHEME)
+
+
+_views = {}
+
+
+def get_view(view_id):
+    view = _views.get(view_id)
+    if view is None:
+        view = _views[view_id] = MockView(view_id)
+    return view
+
+
+def all_views():
+    return list(_views.values())
+
+
+def close_view(view_id):
+    _views.pop(view_id, None)
+
+
+def find_open_file(window_id, file_name):
+    """ The view of the file `file_name` in the window, or None if it isn't open. """
+    file_name = os.path.abspath(file_name)
+    for view in _views.values():
+        if view.window_id == window_id and view.file_name == file_name:
+            return view
+    return None
+
+
+def open_file(window_id, file_name):
+    """ The view of the file `file_name` in the window, loading it in a new view if it isn't open. """
+    view = find_open_file(window_id, file_name)
+    if view is not None:
+        return view
+    view_id = max(_views, default=0) + 1
+    view = _views[view_id] = MockView(view_id, window_id)
+    view.file_name = os.path.abspath(file_name)
+    syntax_name = syntax_for_file_name(view.file_name)
+    if syntax_name is not None:
+        view.settings()["syntax"] = syntax_name
+    try:
+        with open(view.file_name, encoding="utf-8", errors="replace") as fp:
+            view.buffer.insert(0, fp.read().replace("\r\n", "\n"))
+    except OSError:
+        pass    # Like Sublime Text, a file that doesn't exist opens as an empty view.
+    return view
@@ -0,0 +1,86 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+State of the mocked windows.
+
+Like views, windows are created on demand by the mock_api functions taking a `window_id`.
+A window has no project until one is opened with `open_project()`, e.g.:
+
+    get_window(1).open_project("/path/to/My.sublime-project")
+
+or until project data is set with `window.set_project_data()`.
+
+"""
+
+from . import views
+from .command_palette import CommandPalette
+from .project import Project, load_project
+
+
+class MockWindow(object):
+
+    def __init__(self, window_id):
+        self.window_id = window_id
+        self.project = Project()
+        self.active_view_id = 1
+        self.quick_panel = None     # The QuickPanel shown by show_quick_panel(), if any
+        self.command_palette = CommandPalette()
+        self.palette_items = None   # The PaletteItems of the shown command palette, if any
+
+    @property
+    def folders(self):
+        """ Absolute paths of the folders open in the window. """
+        return self.project.folder_paths()
+
+    def open_project(self, file_name):
+        """ Open the .sublime-project file `file_name` in the window. Returns False if it can't be loaded. """
+        data = load_project(file_name)
+        if data is None:
+            return False
+        self.project = Project(data, file_name)
+        return True
+
+    def set_project_data(self, data):
+        self.project = Project(data, self.project.file_name)
+
+    def show_command_palette(self):
+        """ Evaluate the command palette for the active view, like the show_overlay command. """
+        self.palette_items = self.command_palette.items(self.window_id, self.active_view_id)
+        return self.palette_items
+
+    def hide_overlay(self):
+        self.palette_items = None
+
+    def views(self):
+        """ The MockViews in this window. """
+        return [view for view in views.all_views() if view.window_id == self.window_id]
+
+
+_windows = {}
+
+
+def get_window(window_id):
+    window = _windows.get(window_id)
+    if window is None:
+        window = _windows[window_id] = MockWindow(window_id)
+    return window
+
+
+def close_view(view_id):
+    """ Close the view, calling the plugins' on_pre_close and on_close handlers. """
+    import sublime_plugin
+    sublime_plugin.on_pre_close(view_id)
+    sublime_plugin.on_close(view_id)
+    views.close_view(view_id)
+
+
+def close_window(window_id):
+    """ Close the window and its views, and forget the plugins' command instances for it. """
+    import sublime_plugin
+    window = _windows.pop(window_id, None)
+    if window is None:
+        return
+    for view in window.views():
+        close_view(view.view_id)
+    sublime_plugin.detach_window(window_id)
@@ -0,0 +1,154 @@
+# Copyright 2019, Rasmus Sorensen <rasmusscholer@gmail.com>
+
+"""
+
+Buffer word index, used for `view.extract_completions()`.
+
+The index keeps the words of each line, the number of occurrences of each word, and a
+sorted list of the distinct words (for prefix lookups with bisect).
+It is built the first time it is used, and after that it is updated from the buffer edits:
+only the lines touched by an edit are re-scanned.
+
+Words are split at the view's `word_separators` setting, like `view.word()` and
+`view.classify()`; the index is rebuilt when the setting changes.
+
+"""
+
+import re
+from bisect import bisect_left, insort
+
+# Default value of the `word_separators` setting in Sublime Text:
+DEFAULT_WORD_SEPARATORS = "./\\()\"'-:,.;<>~!@#$%^&*|+=[]{}`~?"
+
+
+def word_regex(separators=DEFAULT_WORD_SEPARATORS):
+    """ Compiled regex matching a word, i.e. a run of non-whitespace, non-separator characters. """
+    return re.compile(r"[^\s" + re.escape(separators) + "]+")
+
+
+class WordIndex(object):
+
+    def __init__(self, buffer, settings=None):
+        self.buffer = buffer
+        self.settings = settings if settings is not None else {}
+        self.separators = None
+        self.regex = None
+        self._lines = None      # Per line: list of (column, word), or None until built.
+        self.counts = {}
+        self._sorted = []       # Sorted list of (word.lower(), word)
+
+    def _check_separators(self):
+        """ Drop the index if the word_separators setting changed. Returns False if it did. """
+        separators = self.settings.get("word_separators", DEFAULT_WORD_SEPARATORS)
+        if separators == self.separators:
+            return True
+        self.separators = separators
+        self.regex = word_regex(separators)
+        self._lines = None
+        self.counts = {}
+        self._sorted = []
+        return False
+
+    def _scan_rows(self, first, last):
+        """ Words of the buffer rows first..last (inclusive). """
+        buffer = self.buffer
+        text = buffer.text
+        finditer = self.regex.finditer
+        lines = []
+        for row in range(first, last + 1):
+            begin = buffer.line_start(row)
+            lines.append([(m.start() - begin, m.group()) for m in finditer(text, begin, buffer.line_end(row))])
+        return lines
+
+    def _count(self, lines, delta):
+        counts = self.counts
+        for line in lines:
+            for _, word in line:
+                n = counts.get(word, 0) + delta
+                if n > 0:
+                    counts[word] = n
+                    if n == delta:
+                        insort(self._sorted, (word.lower(), word))
+                else:
+                    del counts[word]
+                    entry = (word.lower(), word)
+                    del self._sorted[bisect_left(self._sorted, entry)]
+
+    def _replace_rows(self, first, old_count, new_count):
+        old = self._lines[first:first + old_count]
+        new = self._scan_rows(first, first + new_count - 1)
+        self._count(old, -1)
+        self._count(new, 1)
+        self._lines[first:first + old_count] = new
+
+    def build(self):
+        self._check_separators()
+        if self._lines is None:
+            self._lines = []
+            self._replace_rows(0, 0, self.buffer.line_count())
+
+    def on_insert(self, pt, length):
+        if self._lines is None or not self._check_separators():
+            return
+        row = self.buffer.row_of(pt)
+        added = self.buffer.line_count() - len(self._lines)
+        self._replace_rows(row, 1, added + 1)
+
+    def on_erase(self, a, b):
+        if self._lines is None or not self._check_separators():
+            return
+        row = self.buffer.row_of(a)
+        removed = len(self._lines) - self.buffer.line_count()
+        self._replace_rows(row, removed + 1, 1)
+
+    def words_with_prefix(self, prefix):
+        """ Distinct words starting with `prefix` (case-insensitive). """
+        self.build()
+        key = prefix.lower()
+        words = []
+        i = bisect_left(self._sorted, (key,))
+        while i < len(self._sorted) and self._sorted[i][0].startswith(key):
+            words.append(self._sorted[i][1])
+            i += 1
+        return words
+
+    def completions(self, prefix, tp=-1):
+        """ Words starting with `prefix`, nearest to `tp` first (or most frequent first if tp is -1).
+
+        The occurrence of the word being typed at `tp` is not counted.
+        """
+        candidates = set(self.words_with_prefix(prefix))
+        if not candidates:
+            return []
+        if tp < 0:
+            return sorted(candidates, key=lambda w: (-self.counts[w], w))
+
+        # Scan the lines outwards from tp until all candidates have been seen:
+        buffer = self.buffer
+        row = buffer.row_of(min(tp, len(buffer)))
+        nrows = len(self._lines)
+        begin = buffer.line_start(row)
+        for col, word in self._lines[row]:
+            if begin + col <= tp <= begin + col + len(word) and self.counts[word] == 1:
+                candidates.discard(word)    # Only occurs where it is being typed.
+        found = []
+        seen = set()
+        for dist in range(max(row + 1, nrows - row)):
+            for r in ((row,) if dist == 0 else (row - dist, row + dist)):
+                if r < 0 or r >= nrows:
+                    continue
+                begin = buffer.line_start(r)
+                hits = []
+                for col, word in self._lines[r]:
+                    if word in candidates and word not in seen:
+                        start = begin + col
+                        if start <= tp <= start + len(word):
+                            continue    # The word being typed.
+                        hits.append((abs(start - tp), word))
+                for _, word in sorted(hits):
+                    if word not in seen:
+                        seen.add(word)
+                        found.append(word)
+            if len(seen) == len(candidates):
+                break
+        return found
@@ -12,6 +12,7 @@ to your environment PATH (or your PYTHONPATH variable).
 """
 
 
+import heapq
 import imp
 import importlib
 import os
@@ -78,6 +79,9 @@ pending_on_activated_async_callbacks = {
 
 profile = {}
 
+# Maximum number of completions returned by on_query_completions, or None for no limit.
+max_completions = None
+
 
 def unload_module(module):
     if "plugin_unloaded" in module.__dict__:
@@ -117,6 +121,8 @@ def unload_module(module):
             except ValueError:
                 pass
 
+        invalidate_command_registry()
+
 
 def unload_plugin(modulename):
     print("unloading plugin", modulename)
@@ -203,6 +209,7 @@ def load_module(m):
 
     if len(module_plugins) > 0:
         m.__plugins__ = module_plugins
+        invalidate_command_registry()
 
     if api_ready:
         if "plugin_loaded" in m.__dict__:
@@ -280,27 +287,135 @@ def synthesize_on_activated_async():
             traceback.print_exc()
 
 
+command_names = {}
+
+# Command name -> class, for application, window and text commands. Rebuilt when the
+# command classes change (see command_registry()).
+_command_registry = None
+_command_registry_key = None
+
+# Command instances by class (and window or view id), created the first time they are needed:
+application_commands = {}
+window_commands = {}
+text_commands = {}
+
+
+def command_name(cls):
+    """ The name of a command class, e.g. "insert_snippet" for InsertSnippetCommand. """
+    name = command_names.get(cls)
+    if name is None:
+        clsname = cls.__name__
+        name = clsname[0].lower()
+        last_upper = False
+        for c in clsname[1:]:
+            if c.isupper() and not last_upper:
+                name += '_'
+                name += c.lower()
+            else:
+                name += c
+            last_upper = c.isupper()
+        if name.endswith("_command"):
+            name = name[0:-8]
+        command_names[cls] = name
+    return name
+
+
+def invalidate_command_registry():
+    """ Rebuild the registry on next use, and forget the instances of unloaded command classes. """
+    global _command_registry
+    _command_registry = None
+    loaded = set(application_command_classes + window_command_classes + text_command_classes)
+    for instances in [application_commands] + list(window_commands.values()) + list(text_commands.values()):
+        for class_ in [class_ for class_ in instances if class_ not in loaded]:
+            del instances[class_]
+
+
+def command_registry():
+    """ (application, window, text) dicts of command name -> class. """
+    global _command_registry, _command_registry_key
+    # Comparing to a copy of the lists catches classes added, removed or replaced in the lists directly.
+    if _command_registry is None or _command_registry_key != all_command_classes:
+        _command_registry = tuple(
+            {command_name(class_): class_ for class_ in classes} for classes in all_command_classes)
+        _command_registry_key = [list(classes) for classes in all_command_classes]
+    return _command_registry
+
+
+def application_command(class_):
+    """ The instance of the ApplicationCommand class `class_`. """
+    cmd = application_commands.get(class_)
+    if cmd is None:
+        cmd = application_commands[class_] = class_()
+    return cmd
+
+
+def window_command(window_id, class_):
+    """ The instance of the WindowCommand class `class_` in the window. """
+    instances = window_commands.setdefault(window_id, {})
+    cmd = instances.get(class_)
+    if cmd is None:
+        cmd = instances[class_] = class_(sublime.Window(window_id))
+    return cmd
+
+
+def text_command(view_id, class_):
+    """ The instance of the TextCommand class `class_` in the view. """
+    instances = text_commands.setdefault(view_id, {})
+    cmd = instances.get(class_)
+    if cmd is None:
+        cmd = instances[class_] = class_(sublime.View(view_id))
+    return cmd
+
+
+def find_application_command(name):
+    """ The ApplicationCommand instance for `name`, or None. """
+    class_ = command_registry()[0].get(name)
+    return application_command(class_) if class_ is not None else None
+
+
+def find_window_command(window_id, name):
+    """ The WindowCommand instance for `name` in the window, or None. """
+    class_ = command_registry()[1].get(name)
+    return window_command(window_id, class_) if class_ is not None else None
+
+
+def find_text_command(view_id, name):
+    """ The TextCommand instance for `name` in the view, or None. """
+    class_ = command_registry()[2].get(name)
+    return text_command(view_id, class_) if class_ is not None else None
+
+
+class LazyCommandList(object):
+    """ The commands of a window or view, only instantiated when accessed. """
+
+    def __init__(self, classes, instance):
+        self.classes = list(classes)
+        self.instance = instance
+
+    def __len__(self):
+        return len(self.classes)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.instance(class_) for class_ in self.classes[index]]
+        return self.instance(self.classes[index])
+
+    def __iter__(self):
+        for class_ in self.classes:
+            yield self.instance(class_)
+
+
 def create_application_commands():
-    cmds = []
-    for class_ in application_command_classes:
-        cmds.append(class_())
-    sublime_api.notify_application_commands(cmds)
+    sublime_api.notify_application_commands(
+        LazyCommandList(application_command_classes, application_command))
 
 
 def create_window_commands(window_id):
-    window = sublime.Window(window_id)
-    cmds = []
-    for class_ in window_command_classes:
-        cmds.append(class_(window))
-    return cmds
+    return LazyCommandList(window_command_classes, lambda class_: window_command(window_id, class_))
 
 
 def create_text_commands(view_id):
-    view = sublime.View(view_id)
-    cmds = []
-    for class_ in text_command_classes:
-        cmds.append(class_(view))
-    return cmds
+    return LazyCommandList(text_command_classes, lambda class_: text_command(view_id, class_))
 
 
 def on_api_ready():
@@ -394,9 +509,15 @@ def check_all_view_event_listeners():
             check_view_event_listeners(v)
 
 
+def detach_window(window_id):
+    """ Forget the command instances of a closed window. """
+    window_commands.pop(window_id, None)
+
+
 def detach_view(view):
     if view.view_id in view_event_listeners:
         del view_event_listeners[view.view_id]
+    text_commands.pop(view.view_id, None)
 
     # A view has closed, which implies 'is_primary' may have changed, so see if
     # any of the ViewEventListener classes need to be created.
@@ -692,36 +813,86 @@ def normalise_completion(c):
         return c
 
 
+def completion_trigger(c):
+    """ The word a completion inserts for, i.e. its trigger without the "\thint" suffix. """
+    trigger = c if isinstance(c, str) else c[0]
+    return trigger.split("\t", 1)[0]
+
+
+def merge_completions(results, prefix, limit=None):
+    """
+    Merges the completions returned by several listeners. results is an iterable of
+    completion iterables, which may be generators; they are consumed lazily.
+
+    Without a limit, all completions are returned in order, like Sublime Text does.
+    If limit is given, only the first completion for each trigger word is kept (ignoring
+    the "\thint" suffix), and only the limit best of those (using a bounded heap),
+    preferring triggers that start with prefix, then with prefix ignoring case,
+    and otherwise keeping the order in which the completions were given.
+    """
+    if limit is None:
+        return [normalise_completion(c) for res in results for c in res]
+
+    seen = set()
+
+    def unique():
+        for res in results:
+            for c in res:
+                trigger = completion_trigger(c)
+                if trigger not in seen:
+                    seen.add(trigger)
+                    yield trigger, c
+
+    lower_prefix = prefix.lower()
+
+    def ranked():
+        for i, (trigger, c) in enumerate(unique()):
+            if trigger.startswith(prefix):
+                rank = 0
+            elif trigger.lower().startswith(lower_prefix):
+                rank = 1
+            else:
+                rank = 2
+            yield (rank, i, c)
+
+    return [normalise_completion(c) for _, _, c in heapq.nsmallest(limit, ranked())]
+
+
 def on_query_completions(view_id, prefix, locations):
     v = sublime.View(view_id)
 
-    completions = []
+    results = []
     flags = 0
+
+    def add_result(res):
+        nonlocal flags
+        if isinstance(res, tuple):
+            results.append(res[0])
+            flags |= res[1]
+        elif isinstance(res, list) or hasattr(res, '__next__'):
+            results.append(res)
+
     for callback in all_callbacks['on_query_completions']:
         try:
-            res = callback.on_query_completions(v, prefix, locations)
-
-            if isinstance(res, tuple):
-                completions += [normalise_completion(c) for c in res[0]]
-                flags |= res[1]
-            elif isinstance(res, list):
-                completions += [normalise_completion(c) for c in res]
+            add_result(callback.on_query_completions(v, prefix, locations))
         except:
             traceback.print_exc()
 
     for vel in event_listeners_for_view(v):
         if 'on_query_completions' in vel.__class__.__dict__:
             try:
-                res = vel.on_query_completions(prefix, locations)
-
-                if isinstance(res, tuple):
-                    completions += [normalise_completion(c) for c in res[0]]
-                    flags |= res[1]
-                elif isinstance(res, list):
-                    completions += [normalise_completion(c) for c in res]
+                add_result(vel.on_query_completions(prefix, locations))
             except:
                 traceback.print_exc()
 
+    def guarded(res):
+        # Errors raised while consuming a generator are reported like errors in the listener
+        try:
+            yield from res
+        except:
+            traceback.print_exc()
+
+    completions = merge_completions((guarded(res) for res in results), prefix, max_completions)
     return (completions, flags)
 
 
@@ -922,19 +1093,7 @@ class ListInputHandler(CommandInputHandler):
 
 class Command(object):
     def name(self):
-        clsname = self.__class__.__name__
-        name = clsname[0].lower()
-        last_upper = False
-        for c in clsname[1:]:
-            if c.isupper() and not last_upper:
-                name += '_'
-                name += c.lower()
-            else:
-                name += c
-            last_upper = c.isupper()
-        if name.endswith("_command"):
-            name = name[0:-8]
-        return name
+        return command_name(self.__class__)
 
     def is_enabled_(self, args):
         ret = None